@@ -0,0 +1,183 @@
+"""
+Post-training export of the gesture fold models to TFLite.
+
+- export_tflite: converts a Keras model into a TFLite flatbuffer with a fixed
+  (1, TIMESTEPS, 11) input (builtin ops only, so no Flex delegate is needed), optionally
+  with dynamic-range int8 weight quantization.
+- check_parity: scores held-out windows with both the Keras model and the TFLite
+  artifact and compares accuracy / argmax agreement.
+- export_fold: export + parity check for one fold; an artifact that fails parity is
+  removed so core.runtime never prefers it.
+
+The standalone export checks parity on each fold's held-out validation windows, rebuilt
+from the dataset, scaler and k-fold split recorded in training_metrics.json; a fold
+whose training data is no longer available is skipped.
+
+Usage:
+  python backend/AI/export_model.py           # export every gesture_model_fold{N}.h5 in MODEL_DIR
+  python backend/AI/export_model.py --int8    # also write gesture_model_fold{N}.int8.tflite
+"""
+import argparse
+import glob
+import os
+import pickle
+import re
+import shutil
+import sys
+import tempfile
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+import tensorflow as tf
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from core.settings import settings
+from core.runtime import TFLiteRuntime, tflite_path_for
+from core.model_artifacts import publish_run, read_marker
+from core.training_dataset import load_dataset, read_index
+
+# Max accuracy drop (absolute) tolerated versus the Keras model on the held-out fold
+PARITY_TOLERANCE = 0.01
+PARITY_TOLERANCE_INT8 = 0.02
+
+
+def export_tflite(keras_model, out_path: str, quantize: bool = False) -> str:
+    """Write keras_model as a TFLite flatbuffer at out_path and return the path."""
+    _, timesteps, num_features = keras_model.input_shape
+    # A static batch dimension lets the converter lower the GRU loops to builtin ops
+    inputs = tf.keras.Input(batch_shape=(1, timesteps, num_features))
+    fixed_model = tf.keras.Model(inputs, keras_model(inputs, training=False))
+
+    converter = tf.lite.TFLiteConverter.from_keras_model(fixed_model)
+    if quantize:
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]  # dynamic-range int8 weights
+    flatbuffer = converter.convert()
+
+    with open(out_path, "wb") as f:
+        f.write(flatbuffer)
+    return out_path
+
+
+def check_parity(keras_model, tflite_path: str, X: np.ndarray, y_true: Optional[np.ndarray] = None) -> Dict[str, Any]:
+    """
+    Compare Keras and TFLite predictions on X (windows, TIMESTEPS, 11).
+    y_true (class indices) is optional; without it only agreement is reported.
+    """
+    X = np.asarray(X, dtype=np.float32)
+    keras_proba = keras_model.predict(X, verbose=0)
+    tflite_proba = TFLiteRuntime(tflite_path)(X)
+    keras_pred = np.argmax(keras_proba, axis=1)
+    tflite_pred = np.argmax(tflite_proba, axis=1)
+
+    result = {
+        "samples": int(len(X)),
+        "agreement": float(np.mean(keras_pred == tflite_pred)) if len(X) else 1.0,
+        "max_abs_diff": float(np.max(np.abs(keras_proba - tflite_proba))) if len(X) else 0.0,
+    }
+    if y_true is not None and len(X):
+        result["keras_accuracy"] = float(np.mean(keras_pred == y_true))
+        result["tflite_accuracy"] = float(np.mean(tflite_pred == y_true))
+    return result
+
+
+def export_fold(keras_model, h5_path: str, X_val: np.ndarray, y_val: Optional[np.ndarray] = None,
+                quantize: bool = False) -> Dict[str, Any]:
+    """Export one fold model next to its .h5 and keep the artifact only if parity holds."""
+    out_path = tflite_path_for(h5_path, quantized=quantize)
+    export_tflite(keras_model, out_path, quantize=quantize)
+    parity = check_parity(keras_model, out_path, X_val, y_val)
+
+    tolerance = PARITY_TOLERANCE_INT8 if quantize else PARITY_TOLERANCE
+    if "keras_accuracy" in parity:
+        passed = parity["keras_accuracy"] - parity["tflite_accuracy"] <= tolerance
+    else:
+        passed = parity["agreement"] >= 1.0 - tolerance
+    if not passed:
+        os.remove(out_path)
+
+    parity.update({"path": out_path, "quantized": quantize, "passed": passed})
+    status = "OK" if passed else "FAILED (artifact removed)"
+    print(f"TFLite export {os.path.basename(out_path)}: parity {status} {parity}")
+    return parity
+
+
+def held_out_windows(fold: int, limit: int) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+    """
+    Up to `limit` validation windows of `fold` (1-based) and their class indices, as the
+    training run recorded in training_metrics.json held them out. None when the run did
+    not record its split or its dataset has been rebuilt since.
+    """
+    from sklearn.model_selection import KFold
+
+    split = (read_marker(settings.METRICS_PATH) or {}).get("split")
+    if not split:
+        return None
+    index = read_index(split["dataset"])
+    if index is None or index["build"] != split["build"]:
+        return None
+    dataset = load_dataset(split["dataset"])
+    with open(settings.SCALER_PATH, "rb") as f:
+        scaler = pickle.load(f)
+    with open(settings.ENCODER_PATH, "rb") as f:
+        label_encoder = pickle.load(f)
+
+    timesteps = split["timesteps"]
+    X = scaler.transform(dataset.values).astype(np.float32)
+    y = label_encoder.transform(dataset.index["labels"])[dataset.labels]
+    num_windows = len(X) - timesteps + 1
+    kf = KFold(n_splits=split["folds"], shuffle=True, random_state=split["seed"])
+    _, val_idx = list(kf.split(np.arange(num_windows)))[fold - 1]
+    val_idx = val_idx[np.linspace(0, len(val_idx) - 1, min(limit, len(val_idx))).astype(int)]
+    windows = np.lib.stride_tricks.sliding_window_view(X, timesteps, axis=0).transpose(0, 2, 1)[val_idx]
+    return np.ascontiguousarray(windows), y[val_idx + timesteps - 1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--int8", action="store_true", help="also export dynamic-range int8 variants")
+    parser.add_argument("--samples", type=int, default=256, help="held-out windows per fold for the parity check")
+    args = parser.parse_args()
+
+    from tensorflow.keras.models import load_model
+    paths = sorted(glob.glob(settings.MODEL_PATH_TEMPLATE.format("*")))
+    if not paths:
+        print(f"No fold models found in {settings.MODEL_DIR}")
+        return
+
+    # Export into a staging directory, then publish the artifacts into the current
+    # training run so the server's loader still finds them consistent with its marker
+    staging = tempfile.mkdtemp(prefix=".staging-", dir=settings.MODEL_DIR)
+    try:
+        files, failed = {}, []
+        for h5_path in paths:
+            held_out = held_out_windows(int(re.search(r"fold(\d+)", os.path.basename(h5_path)).group(1)), args.samples)
+            if held_out is None:
+                print(f"Skipping {os.path.basename(h5_path)}: the held-out windows of its training run "
+                      f"are not available (retrain to export it)")
+                continue
+            X, y = held_out
+            keras_model = load_model(h5_path)
+            for quantize in ([False, True] if args.int8 else [False]):
+                parity = export_fold(keras_model, os.path.join(staging, os.path.basename(h5_path)), X, y,
+                                     quantize=quantize)
+                final_path = tflite_path_for(h5_path, quantized=quantize)
+                if parity["passed"]:
+                    files[final_path] = parity["path"]
+                else:
+                    failed.append(final_path)
+
+        marker = read_marker(settings.METRICS_PATH)
+        if marker is not None:
+            publish_run(settings.METRICS_PATH, marker, files, remove=failed, keep_previous=True)
+        else:
+            for final_path, staged_path in files.items():
+                os.replace(staged_path, final_path)
+            for final_path in failed:
+                if os.path.exists(final_path):
+                    os.remove(final_path)
+    finally:
+        shutil.rmtree(staging, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
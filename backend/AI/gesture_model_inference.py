@@ -1,11 +1,11 @@
 # gesture_model_inference.py
 import numpy as np
-import pickle
-from tensorflow.keras.models import load_model
 from collections import deque
-from scipy.stats import mode
+from typing import Callable, List, Optional
 from core.settings import settings
-import os
+from core.model import model_registry
+from ingestion.streaming.movement_detection import MovementDetector
+from ingestion.streaming.preprocessing import normalize_block
 
 # ==================== SETTINGS ====================
 RESULTS_DIR = settings.RESULTS_DIR
@@ -17,75 +17,280 @@ SCALER_PATH = settings.SCALER_PATH
 ENCODER_PATH = settings.ENCODER_PATH
 
 TIMESTEPS = 50   # must match training
+NUM_FEATURES = settings.TOTAL_SENSORS   # 5 flex + 6 IMU
 ROLLING_WINDOW = 5   # number of recent predictions to smooth
 SKIP_GESTURES = ["Rest"]   # gestures to ignore
 
-# ==================== LOAD MODEL & PREPROCESSORS ====================
-# Load model only if the file exists
-if os.path.exists(MODEL_PATH):
-    model = load_model(MODEL_PATH)
-else:
-    print(f"[Warning] Model file not found at {MODEL_PATH}. Model will not be loaded.")
-    model = None
-
-# Load scaler
-if os.path.exists(SCALER_PATH):
-    with open(SCALER_PATH, "rb") as f:
-        scaler = pickle.load(f)
-else:
-    print(f"[Warning] Scaler file not found at {SCALER_PATH}.")
-    scaler = None
-
-# Load label encoder
-if os.path.exists(ENCODER_PATH):
-    with open(ENCODER_PATH, "rb") as f:
-        label_encoder = pickle.load(f)
-else:
-    print(f"[Warning] Label encoder file not found at {ENCODER_PATH}.")
-    label_encoder = None
-
-# ==================== BUFFERS ====================
-sequence_buffer = []  # stores recent frames for LSTM input
-prediction_buffer = deque(maxlen=ROLLING_WINDOW)  # stores recent predictions for smoothing
+# ==================== MODEL & PREPROCESSORS ====================
+# Shared with core.model: one registry, one loaded model (loaded on first use here,
+# or in the background at server startup), hot-swapped after retraining.
+def _bundle():
+    return model_registry.ensure_loaded()
+
+# Prediction gating counters, summed over every streaming session
+_gate_counters = {"run": 0, "skipped": 0, "segments": 0}
+
+# ==================== STREAMING SESSION ====================
+class StreamingGestureSession:
+    """
+    Per-connection streaming state for one glove: the latest TIMESTEPS frames and the
+    rolling window of recent predictions used for smoothing.
+
+    Frames live in a preallocated (2 * TIMESTEPS, NUM_FEATURES) ring buffer. Each frame is
+    written twice (at i and i + TIMESTEPS), so the current window is always one contiguous
+    slice: appends are O(1) and window() returns a view instead of rebuilding an array.
+
+    Prediction gating (see due()): with stride K a window is scored at most once every
+    K new frames, and with motion gating only while the MovementDetector sees motion
+    (plus once when a movement ends), so inference follows gesture activity instead
+    of the glove's sample rate.
+
+    Segment mode (segment=True) is for clients that stream raw frames instead of
+    collector-cut gesture windows: incoming frames are normalized and run through the
+    collector's MovementDetector. Each finished movement is queued as its own window
+    (take_segments()), never mixed with the ring buffer or another movement, so a
+    prediction runs once per gesture and never while the glove rests. The same gating
+    applies before a movement is queued: with stride K it must end at least K frames
+    after the previously queued one, and with motion gating the raw frames must have
+    crossed INFERENCE_MOTION_THRESHOLD since then; otherwise it is dropped as a skip.
+    """
+
+    def __init__(self, timesteps: int = TIMESTEPS, num_features: int = NUM_FEATURES,
+                 rolling_window: int = ROLLING_WINDOW,
+                 transform: Optional[Callable[[np.ndarray], np.ndarray]] = None,
+                 stride: Optional[int] = None, motion_gate: Optional[bool] = None,
+                 segment: bool = False):
+        """
+        transform: optional per-block preprocessing applied on append, called with a
+        (frames, num_features) array (e.g. the fitted scaler).
+        stride / motion_gate: prediction gating, defaulting to INFERENCE_STRIDE and
+        INFERENCE_MOTION_GATE.
+        segment: segment raw frames server-side; gating then decides which finished
+        movements are queued.
+        """
+        self.timesteps = timesteps
+        self.num_features = num_features
+        self.transform = transform
+        self._buffer = np.zeros((2 * timesteps, num_features), dtype=np.float32)
+        self._pos = 0            # slot of the oldest frame == next slot to overwrite
+        self.frames_seen = 0
+        self.prediction_buffer = deque(maxlen=rolling_window)
+
+        self.stride = max(1, settings.INFERENCE_STRIDE if stride is None else stride)
+        if motion_gate is None:
+            motion_gate = settings.INFERENCE_MOTION_GATE
+        self.segmenter = None
+        if segment:
+            # Same detector settings as the collector, on the same normalized values
+            self.segmenter = MovementDetector(threshold=settings.STREAM_SEGMENT_THRESHOLD, window_size=5,
+                                              min_length=settings.STREAM_SEGMENT_MIN_FRAMES)
+        self.segments = 0
+        self._pending_segments = deque()  # segment mode: finished movements not yet taken
+        self._received = False         # segment mode: raw frames arrived since the last take_segments()
+        # Fed raw (untransformed) frames, the same values the collector thresholds on
+        self.motion_detector = MovementDetector(threshold=settings.INFERENCE_MOTION_THRESHOLD) if motion_gate else None
+        self._frames_since_prediction = 0
+        self._motion_pending = False   # motion seen since the last prediction
+        self.predictions_run = 0
+        self.predictions_skipped = 0
+        self.last_result = None        # handlers keep the latest prediction here to reuse on skips
+
+    @property
+    def is_ready(self) -> bool:
+        """True once a full TIMESTEPS window has been received."""
+        return self.frames_seen >= self.timesteps
+
+    def push(self, frame) -> Optional[np.ndarray]:
+        """Append one frame. Returns the (1, TIMESTEPS, NUM_FEATURES) model input once full."""
+        frame = np.asarray(frame, dtype=np.float32)
+        if self.segmenter is not None:
+            return self.extend(frame.reshape(1, -1))
+        self._track_motion(frame.reshape(1, -1))
+        if self.transform is not None:
+            frame = self.transform(frame.reshape(1, -1))[0]
+        self._buffer[self._pos] = frame
+        self._buffer[self._pos + self.timesteps] = frame
+        self._pos = (self._pos + 1) % self.timesteps
+        self.frames_seen += 1
+        self._frames_since_prediction += 1
+        return self.model_input()
+
+    def extend(self, frames) -> Optional[np.ndarray]:
+        """Append a block of frames (frames, NUM_FEATURES) in one vectorized write."""
+        frames = np.asarray(frames, dtype=np.float32).reshape(-1, self.num_features)
+        n = len(frames)
+        if n == 0:
+            return self.model_input()
+        if self.segmenter is not None:
+            self._received = True
+            self._track_motion(frames)
+            self._frames_since_prediction += n
+            self._segment(frames)
+            return None  # finished movements are queued for take_segments()
+        self._track_motion(frames)
+        if n > self.timesteps:
+            frames = frames[-self.timesteps:]  # older frames would be overwritten anyway
+        if self.transform is not None:
+            frames = self.transform(frames)
+        slots = (self._pos + np.arange(len(frames))) % self.timesteps
+        self._buffer[slots] = frames
+        self._buffer[slots + self.timesteps] = frames
+        self._pos = (self._pos + len(frames)) % self.timesteps
+        self.frames_seen += n
+        self._frames_since_prediction += n
+        return self.model_input()
+
+    def _segment(self, frames: np.ndarray):
+        """
+        Run raw frames through the segmenter and queue each movement that ended in them
+        and passes the gate. Frames since the last queued movement are counted per block;
+        a later movement in the same block counts its own frames.
+        """
+        finished = self.segmenter.update_block(normalize_block(frames))
+        active = self.segmenter.sequence
+        if len(active) > settings.STREAM_SEGMENT_MAX_FRAMES:
+            del active[:len(active) - settings.STREAM_SEGMENT_MAX_FRAMES]  # bound a never-ending movement
+        queued_in_block = False
+        for seq in finished:
+            if queued_in_block:
+                self._frames_since_prediction += len(seq)
+            if self._frames_since_prediction < self.stride or \
+                    (self.motion_detector is not None and not self._motion_pending):
+                self.predictions_skipped += 1
+                _gate_counters["skipped"] += 1
+                continue
+            segment = np.asarray(seq, dtype=np.float32)
+            if self.transform is not None:
+                segment = self.transform(segment)
+            self._pending_segments.append(segment)
+            self.frames_seen += len(segment)
+            self._frames_since_prediction = 0
+            queued_in_block = True
+        if queued_in_block:
+            # What is known to follow the last queued movement: one still in progress
+            in_progress = self.segmenter.in_motion
+            self._frames_since_prediction = len(self.segmenter.sequence) if in_progress else 0
+            self._motion_pending = self._motion_pending and in_progress
+        self.segments += len(finished)
+        _gate_counters["segments"] += len(finished)
+
+    def take_segments(self) -> List[np.ndarray]:
+        """
+        Segment mode's counterpart of due() + window(): the movements queued since the
+        last call, oldest first, one (frames, NUM_FEATURES) window each. Each counts as
+        one prediction run; a call after raw frames without a queued movement counts
+        as one skip (gated movements were counted when they were dropped).
+        """
+        received, self._received = self._received, False
+        segments = list(self._pending_segments)
+        self._pending_segments.clear()
+        if segments:
+            self.predictions_run += len(segments)
+            _gate_counters["run"] += len(segments)
+        elif received:
+            self.predictions_skipped += 1
+            _gate_counters["skipped"] += 1
+        return segments
+
+    def _track_motion(self, frames: np.ndarray):
+        if self.motion_detector is None:
+            return
+        self.motion_detector.update_block(frames)
+        if self.motion_detector.saw_motion:
+            self._motion_pending = True
+
+    def due(self) -> bool:
+        """
+        Decide whether the frames appended since the last prediction warrant a new one,
+        and count the decision. Returns True at most once per batch of new frames.
+        """
+        if self._frames_since_prediction == 0:
+            return False
+        if self.motion_detector is None or self.motion_detector.is_moving:
+            predict = self._frames_since_prediction >= self.stride
+        else:
+            # At rest: score once more if a movement just ended, otherwise idle
+            predict = self._motion_pending
+
+        if predict:
+            self._frames_since_prediction = 0
+            self._motion_pending = False
+            self.predictions_run += 1
+            _gate_counters["run"] += 1
+        else:
+            self.predictions_skipped += 1
+            _gate_counters["skipped"] += 1
+        return predict
+
+    def window(self) -> np.ndarray:
+        """View of the buffered frames, oldest first (fewer than TIMESTEPS until full)."""
+        n = min(self.frames_seen, self.timesteps)
+        start = self._pos + self.timesteps - n
+        return self._buffer[start:start + n]
+
+    def model_input(self) -> Optional[np.ndarray]:
+        """(1, TIMESTEPS, NUM_FEATURES) view of the full window, or None if not full yet."""
+        if not self.is_ready:
+            return None
+        return self.window()[np.newaxis]
+
+    def smooth(self, pred_class: int) -> int:
+        """Record a raw class prediction and return the mode over the rolling window."""
+        self.prediction_buffer.append(int(pred_class))
+        return int(np.bincount(np.fromiter(self.prediction_buffer, dtype=np.int64)).argmax())
+
+    def reset(self):
+        self._pos = 0
+        self.frames_seen = 0
+        self._frames_since_prediction = 0
+        self._motion_pending = False
+        self._received = False
+        self._pending_segments.clear()
+        if self.segmenter is not None:
+            self.segmenter = MovementDetector(threshold=self.segmenter.threshold, window_size=self.segmenter.window_size,
+                                              min_length=self.segmenter.min_length)
+        self.last_result = None
+        self.prediction_buffer.clear()
+
+def _scale_frames(frames: np.ndarray) -> np.ndarray:
+    return _bundle().scale(frames)
+
+# Default session backing the module-level helpers below (single-stream scripts).
+# WebSocket handlers create their own StreamingGestureSession per connection.
+_default_session = StreamingGestureSession(transform=_scale_frames)
 
 # ==================== PREPROCESS FRAME ====================
-def preprocess_frame(frame):
+def preprocess_frame(frame, session: Optional[StreamingGestureSession] = None):
     """
     Add new sensor frame to the buffer and prepare input for prediction.
     frame: 1D numpy array of shape (NUM_FEATURES,)
     Returns: input tensor of shape (1, TIMESTEPS, NUM_FEATURES) or None if buffer not full
     """
-    if scaler is None:
+    bundle = _bundle()
+    if bundle is None or bundle.scaler is None:
         raise ValueError("Scaler not loaded. Cannot preprocess frame.")
-
-    global sequence_buffer
-    frame_scaled = scaler.transform(frame.reshape(1, -1))
-    sequence_buffer.append(frame_scaled[0])
-
-    if len(sequence_buffer) > TIMESTEPS:
-        sequence_buffer.pop(0)
-
-    if len(sequence_buffer) == TIMESTEPS:
-        X_input = np.array(sequence_buffer).reshape(1, TIMESTEPS, frame.shape[0])
-        return X_input
-    return None
+    session = session or _default_session
+    X_input = session.push(frame)
+    if X_input is None or not session.due():
+        return None  # window not full yet, or gated by stride / motion
+    return X_input
 
 # ==================== PREDICTION WITH SMOOTHING ====================
-def predict_gesture(X_input):
+def predict_gesture(X_input, session: Optional[StreamingGestureSession] = None):
     """
     Predict gesture from input tensor and apply rolling window smoothing.
     Returns gesture label as string or None if skipped.
     """
-    if model is None or label_encoder is None:
+    bundle = _bundle()
+    if bundle is None or bundle.runtime is None or bundle.classes is None:
         raise ValueError("Model or label encoder not loaded. Cannot predict gesture.")
 
-    pred_proba = model.predict(X_input)
+    pred_proba = bundle.runtime(X_input)
     pred_class = np.argmax(pred_proba, axis=1)[0]
-    prediction_buffer.append(pred_class)
 
     # Apply mode over rolling window
-    smoothed_class = mode(list(prediction_buffer))[0][0]
-    gesture_name = label_encoder.inverse_transform([smoothed_class])[0]
+    smoothed_class = (session or _default_session).smooth(pred_class)
+    gesture_name = bundle.decode(smoothed_class)
 
     if gesture_name in SKIP_GESTURES:
         return None
@@ -93,6 +298,18 @@ def predict_gesture(X_input):
 
 # ==================== RESET BUFFERS ====================
 def reset_buffers():
-    global sequence_buffer, prediction_buffer
-    sequence_buffer = []
-    prediction_buffer.clear()
+    _default_session.reset()
+
+# ==================== METRICS ====================
+def get_stream_stats() -> dict:
+    """Prediction gating counters across all streaming sessions."""
+    run, skipped = _gate_counters["run"], _gate_counters["skipped"]
+    total = run + skipped
+    return {
+        "stride": max(1, settings.INFERENCE_STRIDE),
+        "motion_gate": settings.INFERENCE_MOTION_GATE,
+        "predictions_run": run,
+        "predictions_skipped": skipped,
+        "segments": _gate_counters["segments"],
+        "skip_ratio": round(skipped / total, 4) if total else 0.0,
+    }
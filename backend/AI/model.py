@@ -1,6 +1,6 @@
 import numpy as np
 import pandas as pd
-import os, json, pickle
+import os, pickle, glob, shutil
 import matplotlib.pyplot as plt
 import seaborn as sns
 from sklearn.model_selection import KFold
@@ -12,9 +12,13 @@ from tensorflow.keras.layers import Dense, Conv1D, GRU, Dropout, BatchNormalizat
 from tensorflow.keras.utils import to_categorical, Sequence
 from tensorflow.keras.callbacks import EarlyStopping, ReduceLROnPlateau
 from tensorflow.keras import regularizers
-import sys, os
+import sys
 sys.path.append(os.path.dirname(os.path.dirname(__file__)))
 from core.settings import settings
+from core.training_dataset import load_dataset, read_index, write_dataset
+from core.model_artifacts import new_run_id, publish_run
+from core.runtime import tflite_path_for
+from AI.export_model import export_fold
 
 # ==================== PATHS ====================
 SCALER_PATH = os.path.join(settings.RESULTS_DIR, 'scaler.pkl')
@@ -26,10 +30,25 @@ RESULTS_DIR = settings.RESULTS_DIR
 RAW_DATA_PATH = settings.RAW_DATA_PATH
 os.makedirs(RESULTS_DIR, exist_ok=True)
 
+# Artifacts are written into a staging directory and published together at the end
+# (publish_run), so the server never loads a half-written run
+RUN_ID = new_run_id()
+for leftover in glob.glob(os.path.join(RESULTS_DIR, ".staging-*")):
+    shutil.rmtree(leftover, ignore_errors=True)  # from a run that crashed before publishing
+STAGING_DIR = os.path.join(RESULTS_DIR, f".staging-{RUN_ID}")
+os.makedirs(STAGING_DIR)
+
+def staged(path):
+    return os.path.join(STAGING_DIR, os.path.basename(path))
+
 TIMESTEPS = 50
 KFOLD_SPLITS = 5
+KFOLD_SEED = 42
 EPOCHS = 25
 BATCH_SIZE = 32
+SCALE_CHUNK_ROWS = 65536  # dataset rows standardized at a time
+EXPORT_TFLITE = True   # write gesture_model_fold{N}.tflite next to each .h5
+EXPORT_INT8 = False    # also write a dynamic-range int8 .int8.tflite variant
 
 # ==================== AUGMENTATION CONFIG ====================
 def get_augmentation_config(dataset_size):
@@ -77,53 +96,79 @@ COLUMNS = [
     "gyro_x", "gyro_y", "gyro_z"
 ]
 
-dfs = []
-for fname in gesture_files:
-    fpath = os.path.join(DATA_DIR, fname)
+def gesture_file_stats():
+    return [[fname, os.path.getsize(p), os.stat(p).st_mtime_ns]
+            for fname, p in ((f, os.path.join(DATA_DIR, f)) for f in gesture_files)]
 
-    # Force header names, ignore original header row
-    df = pd.read_csv(fpath, header=None, names=COLUMNS, skiprows=1)
+def merge_gesture_files(dataset_path):
+    """Parse the per-gesture CSVs once into a columnar dataset (and raw_data.csv for the processors)."""
+    dfs = []
+    for fname in gesture_files:
+        fpath = os.path.join(DATA_DIR, fname)
 
-    # Inject gesture label from filename
-    label_name = os.path.splitext(fname)[0]
-    df["label"] = label_name
+        # Force header names, ignore original header row
+        df = pd.read_csv(fpath, header=None, names=COLUMNS, skiprows=1)
 
-    dfs.append(df)
+        # Inject gesture label from filename
+        label_name = os.path.splitext(fname)[0]
+        df["label"] = label_name
 
-# Merge into one dataframe
-df = pd.concat(dfs, ignore_index=True)
+        dfs.append(df)
 
-# Save merged dataset
-df.to_csv(RAW_DATA_PATH, index=False)
-print(f"✅ Merged dataset saved with shape {df.shape} and columns: {df.columns.tolist()}")
+    # Merge into one dataframe
+    df = pd.concat(dfs, ignore_index=True)
 
-# ==================== LOAD & NORMALIZE DATA ====================
-df = pd.read_csv(RAW_DATA_PATH)
+    # Save merged dataset (still read by processors/noise_reducer.py and utils/shuffle.py)
+    df.to_csv(RAW_DATA_PATH, index=False)
+    print(f"✅ Merged dataset saved with shape {df.shape} and columns: {df.columns.tolist()}")
+
+    chunk = {
+        "values": df[COLUMNS[1:]].to_numpy(dtype=np.float32),
+        "label": df["label"].to_numpy(dtype=str),
+        "session_id": df["session_id"].astype(str).to_numpy(dtype=str),
+    }
+    write_dataset(dataset_path, [chunk], rows=len(df), width=len(COLUMNS) - 1, source=gesture_file_stats())
 
-X_raw = df.drop(["label", "session_id"], axis=1).values
-y = df["label"].values
+# ==================== LOAD & NORMALIZE DATA ====================
+# The trigger export passes the dataset it wrote; otherwise the per-gesture CSVs are
+# converted once and the cached dataset is reused until one of them changes
+DATASET_PATH = os.environ.get("TRAINING_DATASET_DIR")
+if not DATASET_PATH or read_index(DATASET_PATH) is None:
+    DATASET_PATH = os.path.join(settings.TRAINING_DATASET_DIR, "gesture_files")
+    index = read_index(DATASET_PATH)
+    if index is None or index["source"] != gesture_file_stats():
+        merge_gesture_files(DATASET_PATH)
+dataset = load_dataset(DATASET_PATH)
+print(f"Loaded {dataset.index['rows']} frames from {DATASET_PATH}: {dataset.index['label_counts']}")
+
+X_raw = dataset.values  # memory-mapped float32
 NUM_FEATURES = X_raw.shape[1]
 
+# Fit and scale in chunks: fit_transform on the whole map would make a float64 copy
 scaler = StandardScaler()
-X_raw = scaler.fit_transform(X_raw)
-
-with open(SCALER_PATH, "wb") as f:
+for start in range(0, len(X_raw), SCALE_CHUNK_ROWS):
+    scaler.partial_fit(X_raw[start:start + SCALE_CHUNK_ROWS])
+X_scaled = np.empty(X_raw.shape, dtype=np.float32)
+for start in range(0, len(X_raw), SCALE_CHUNK_ROWS):
+    X_scaled[start:start + SCALE_CHUNK_ROWS] = scaler.transform(X_raw[start:start + SCALE_CHUNK_ROWS])
+X_raw = X_scaled
+
+with open(staged(SCALER_PATH), "wb") as f:
     pickle.dump(scaler, f)
 
 # ==================== LABEL ENCODING ====================
 label_encoder = LabelEncoder()
-y_encoded = label_encoder.fit_transform(y)
+label_encoder.fit(dataset.index["labels"])
+y_encoded = label_encoder.transform(dataset.index["labels"])[dataset.labels]  # encode the vocabulary, not every row
 num_classes = len(np.unique(y_encoded))
-with open(ENCODER_PATH, "wb") as f:
+with open(staged(ENCODER_PATH), "wb") as f:
     pickle.dump(label_encoder, f)
 
 # ==================== SEQUENCE BUILDING ====================
 def build_sequences(X, y, timesteps):
-    X_seq, y_seq = [], []
-    for i in range(len(X) - timesteps + 1):
-        X_seq.append(X[i:i+timesteps])
-        y_seq.append(y[i+timesteps-1])
-    return np.array(X_seq), np.array(y_seq)
+    # Windows are views into X; folds and batches copy only the windows they use
+    X_seq = np.lib.stride_tricks.sliding_window_view(X, timesteps, axis=0).transpose(0, 2, 1)
+    return X_seq, np.asarray(y[timesteps-1:])
 
 X_seq, y_seq = build_sequences(X_raw, y_encoded, TIMESTEPS)
 y_seq_cat = to_categorical(y_seq, num_classes=num_classes)
@@ -264,7 +309,10 @@ def plot_confusion_matrix(y_true, y_pred, fold_num):
 
 # ==================== K-FOLD TRAINING + VISUALIZATION ====================
 fold_results = []
-kf = KFold(n_splits=KFOLD_SPLITS, shuffle=True, random_state=42)
+export_results = []
+fold_models = []   # kept for the ensemble evaluation below
+fold_val_indices = []
+kf = KFold(n_splits=KFOLD_SPLITS, shuffle=True, random_state=KFOLD_SEED)
 
 for fold, (train_idx, val_idx) in enumerate(kf.split(X_seq)):
     print(f"\n===== Fold {fold+1}/{KFOLD_SPLITS} =====")
@@ -294,9 +342,23 @@ for fold, (train_idx, val_idx) in enumerate(kf.split(X_seq)):
     acc = np.mean(y_val_pred_classes == y_val_true_classes)
     print(f"Fold {fold+1} Accuracy: {acc:.3f}")
     fold_results.append(acc)
+    fold_models.append(model)
+    fold_val_indices.append(val_idx)
 
     # Save fold model
-    model.save(MODEL_PATH_TEMPLATE.format(fold+1))
+    model_path = MODEL_PATH_TEMPLATE.format(fold+1)
+    model.save(staged(model_path))
+
+    # Export TFLite artifact(s) and check accuracy parity on this fold's held-out windows
+    if EXPORT_TFLITE:
+        for quantize in ([False, True] if EXPORT_INT8 else [False]):
+            try:
+                parity = export_fold(model, staged(model_path),
+                                     X_val_fold, y_val_true_classes, quantize=quantize)
+                parity["path"] = tflite_path_for(model_path, quantized=quantize)
+                export_results.append({"fold": fold+1, **parity})
+            except Exception as e:
+                print(f"TFLite export failed for fold {fold+1}: {e}")
 
     # Visualization
     plot_metrics(history, fold+1)
@@ -306,12 +368,36 @@ for fold, (train_idx, val_idx) in enumerate(kf.split(X_seq)):
 avg_acc = np.mean(fold_results)
 print(f"\n Average K-Fold Accuracy: {avg_acc:.3f}")
 
+# Probability-averaged ensemble (what INFERENCE_ENSEMBLE serves), scored on every
+# validation fold. Each window was in the training split of the other folds' models,
+# so this reads higher than the per-fold accuracies.
+ensemble_hits = 0
+for val_idx in fold_val_indices:
+    val_gen = GestureDataGenerator(X_seq[val_idx], y_seq_cat[val_idx], batch_size=BATCH_SIZE, shuffle=False)
+    ensemble_proba = np.mean([m.predict(val_gen, verbose=0) for m in fold_models], axis=0)
+    ensemble_hits += int(np.sum(np.argmax(ensemble_proba, axis=1) == y_seq[val_idx]))
+ensemble_acc = ensemble_hits / sum(len(val_idx) for val_idx in fold_val_indices)
+print(f" Ensemble Accuracy (validation folds): {ensemble_acc:.3f}")
+
 metrics_data = {
+    "run_id": RUN_ID,
     "average_accuracy": float(avg_acc),
-    "fold_accuracies": [float(x) for x in fold_results]
+    "fold_accuracies": [float(x) for x in fold_results],
+    "ensemble_accuracy": float(ensemble_acc),
+    "tflite_export": export_results,
+    # Lets AI/export_model.py rebuild each fold's held-out windows for its parity check
+    "split": {"dataset": DATASET_PATH, "build": dataset.index["build"], "timesteps": TIMESTEPS,
+              "folds": KFOLD_SPLITS, "seed": KFOLD_SEED},
 }
 
-with open(METRICS_PATH, 'w') as f:
-    json.dump(metrics_data, f, indent=2)
+# Publish: move this run's artifacts into place, drop fold files it did not produce
+# (e.g. a .tflite whose export failed), and write training_metrics.json last
+final_paths = [SCALER_PATH, ENCODER_PATH] + [
+    os.path.join(settings.MODEL_DIR, name) for name in os.listdir(STAGING_DIR) if name.startswith("gesture_model_fold")
+]
+stale = [path for path in glob.glob(os.path.splitext(MODEL_PATH_TEMPLATE.format("*"))[0] + ".*")
+         if path not in final_paths]
+publish_run(METRICS_PATH, metrics_data, {path: staged(path) for path in final_paths}, remove=stale)
+shutil.rmtree(STAGING_DIR, ignore_errors=True)
 
 print(f"Models, metrics & visualizations saved in {RESULTS_DIR}")
@@ -0,0 +1,232 @@
+"""
+Async micro-batching scheduler for gesture inference.
+
+- MicroBatcher: collects concurrent prediction requests for a short window (or until
+  max_batch_size requests are pending), groups them by sequence length, runs one
+  forward pass per group and resolves each caller's future with its own result.
+  Forward passes run on an executor so they never block the event loop, and the
+  number of pending requests is bounded (InferenceBusyError when full).
+- Histogram: fixed-bucket histogram used for batch-size and queue-wait metrics.
+"""
+import asyncio
+import logging
+import time
+from concurrent.futures import Executor
+from typing import Any, Callable, Dict, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+logger = logging.getLogger("signglove")
+
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128)
+QUEUE_WAIT_MS_BUCKETS = (0.5, 1, 2, 5, 10, 25, 50, 100, 250)
+
+
+class InferenceBusyError(Exception):
+    """Raised when the inference queue is full and the request should be retried later."""
+
+    def __init__(self, pending: int, max_pending: int):
+        super().__init__(f"Inference queue full ({pending}/{max_pending} pending)")
+        self.pending = pending
+        self.max_pending = max_pending
+
+
+class Histogram:
+    """Cumulative fixed-bucket histogram (Prometheus-style `le` buckets)."""
+
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * (len(self.buckets) + 1)  # last slot is +Inf
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        else:
+            self.counts[-1] += 1
+        self.count += 1
+        self.sum += value
+
+    def snapshot(self) -> Dict[str, Any]:
+        cumulative = 0
+        buckets = {}
+        for bound, n in zip(self.buckets, self.counts):
+            cumulative += n
+            buckets[f"le_{bound:g}"] = cumulative
+        buckets["le_inf"] = cumulative + self.counts[-1]
+        return {
+            "buckets": buckets,
+            "count": self.count,
+            "sum": self.sum,
+            "avg": self.sum / self.count if self.count else 0.0,
+        }
+
+
+class MicroBatcher:
+    """
+    Coalesce single-sequence prediction requests into batched forward passes.
+
+    forward_fn receives a float32 array of shape (batch, frames, features) and must
+    return one result per sequence, in order (core.model returns formatted prediction
+    dicts; a (batch, num_classes) array works too). Sequences of different lengths are
+    never padded into the same batch (the GRU output depends on every timestep), so
+    each distinct length is run as its own bucket.
+
+    When an executor is given, forward_fn runs on it and up to max_concurrent_batches
+    batches may be in flight at once; otherwise it is called inline on the loop.
+    close() lets in-flight batches finish and fails requests that were still queued.
+    """
+
+    def __init__(
+        self,
+        forward_fn: Callable[[np.ndarray], Sequence[Any]],
+        max_batch_size: int = 32,
+        max_wait_ms: float = 3.0,
+        executor: Optional[Executor] = None,
+        max_concurrent_batches: int = 1,
+        max_pending: int = 0,
+    ):
+        self.forward_fn = forward_fn
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0.0, float(max_wait_ms)) / 1000.0
+        self.executor = executor
+        self.max_concurrent_batches = max(1, int(max_concurrent_batches))
+        self.max_pending = max(0, int(max_pending))  # 0 = unbounded
+        self.batch_size_hist = Histogram(BATCH_SIZE_BUCKETS)
+        self.queue_wait_hist = Histogram(QUEUE_WAIT_MS_BUCKETS)
+        self.batches_run = 0
+        self.requests_served = 0
+        self.rejected = 0
+        self._pending = 0
+        self._queue: Optional[asyncio.Queue] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._dispatches: Set[asyncio.Task] = set()  # in-flight batches
+        self._collecting: List[Tuple[np.ndarray, asyncio.Future, float]] = []  # taken off the queue, not yet dispatched
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _ensure_worker(self):
+        loop = asyncio.get_running_loop()
+        if self._worker is None or self._worker.done() or self._loop is not loop:
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._slots = asyncio.Semaphore(self.max_concurrent_batches)
+            self._worker = loop.create_task(self._run())
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    async def submit(self, sequence: np.ndarray) -> Any:
+        """
+        Queue one (frames, features) sequence and await its result from forward_fn.
+        Raises InferenceBusyError if max_pending requests are already waiting.
+        """
+        self._ensure_worker()
+        if self.max_pending and self._pending >= self.max_pending:
+            self.rejected += 1
+            raise InferenceBusyError(self._pending, self.max_pending)
+        self._pending += 1
+        try:
+            future = self._loop.create_future()
+            self._queue.put_nowait((sequence, future, time.perf_counter()))
+            return await future
+        finally:
+            self._pending -= 1
+
+    async def _collect(self, batch: List[Tuple[np.ndarray, asyncio.Future, float]]):
+        batch.append(await self._queue.get())
+        deadline = self._loop.time() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+                continue
+            except asyncio.QueueEmpty:
+                pass
+            timeout = deadline - self._loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+
+    async def _run(self):
+        while True:
+            batch = self._collecting = []
+            await self._collect(batch)
+            await self._slots.acquire()
+            task = self._loop.create_task(self._dispatch(batch))
+            self._collecting = []
+            self._dispatches.add(task)
+            task.add_done_callback(self._dispatches.discard)
+
+    async def _forward(self, batch: np.ndarray) -> np.ndarray:
+        if self.executor is None:
+            return self.forward_fn(batch)
+        return await self._loop.run_in_executor(self.executor, self.forward_fn, batch)
+
+    async def _dispatch(self, batch: List[Tuple[np.ndarray, asyncio.Future, float]]):
+        try:
+            await self._dispatch_buckets(batch)
+        finally:
+            self._slots.release()
+
+    async def _dispatch_buckets(self, batch: List[Tuple[np.ndarray, asyncio.Future, float]]):
+        now = time.perf_counter()
+        buckets: Dict[int, list] = {}
+        for sequence, future, enqueued_at in batch:
+            self.queue_wait_hist.observe((now - enqueued_at) * 1000.0)
+            if future.cancelled():
+                continue
+            buckets.setdefault(sequence.shape[0], []).append((sequence, future))
+
+        for items in buckets.values():
+            self.batch_size_hist.observe(len(items))
+            self.batches_run += 1
+            self.requests_served += len(items)
+            try:
+                outputs = await self._forward(np.stack([seq for seq, _ in items]))
+            except Exception as e:
+                logger.error(f"Batched inference failed: {e}")
+                for _, future in items:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            for (_, future), row in zip(items, outputs):
+                if not future.done():
+                    future.set_result(row)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000.0,
+            "batches_run": self.batches_run,
+            "requests_served": self.requests_served,
+            "pending": self._pending,
+            "max_pending": self.max_pending,
+            "rejected": self.rejected,
+            "workers": self.max_concurrent_batches if self.executor is not None else 0,
+            "batch_size": self.batch_size_hist.snapshot(),
+            "queue_wait_ms": self.queue_wait_hist.snapshot(),
+        }
+
+    async def close(self):
+        if self._worker is not None and not self._worker.done():
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+        self._worker = None
+        if self._dispatches:
+            await asyncio.gather(*self._dispatches, return_exceptions=True)
+        waiting, self._collecting = self._collecting, []
+        while self._queue is not None and not self._queue.empty():
+            waiting.append(self._queue.get_nowait())
+        for _, future, _ in waiting:
+            if not future.done():
+                future.set_exception(RuntimeError("Inference scheduler closed"))
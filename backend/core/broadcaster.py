@@ -0,0 +1,216 @@
+"""
+Pub/sub fan-out for the gesture WebSockets.
+
+The receive loop never writes to a socket: it publishes prediction updates to the
+Broadcaster and goes back to reading input. Once per UI tick a ticker task
+coalesces everything published since the previous tick into one message per glove
+session (core.outbox.SessionCoalescer), serializes it once, and hands the same text
+to every subscriber's bounded queue. Each subscriber has its own writer task, so a slow browser only ever delays
+itself: when its queue is full the oldest message is dropped (and counted), and a
+send that stalls past send_timeout_s disconnects it.
+"""
+import asyncio
+import logging
+from collections import deque
+from typing import Any, Deque, Dict, Optional, Sequence
+
+from core.outbox import MAX_FRAMES_PER_MESSAGE, UI_TICK, SessionCoalescer
+from core.serialization import dumps_str
+
+logger = logging.getLogger("signglove")
+
+SUBSCRIBER_QUEUE_SIZE = 64   # serialized messages buffered per client
+SEND_TIMEOUT = 2.0           # a client whose send stalls this long is disconnected
+
+
+def serialize(message: dict) -> str:
+    """Compact JSON text; frames may be lists or NumPy arrays."""
+    return dumps_str(message)
+
+
+class Subscriber:
+    """One client: a bounded queue of serialized messages drained by its writer task."""
+
+    def __init__(self, websocket, queue_size: int = SUBSCRIBER_QUEUE_SIZE):
+        self.websocket = websocket
+        self.queue_size = queue_size
+        self._queue: Deque[str] = deque()
+        self._ready = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self.closed = False
+        self.close_reason: Optional[str] = None
+        self.sent = 0
+        self.dropped = 0
+
+    def put(self, text: str):
+        if self.closed:
+            return
+        if len(self._queue) >= self.queue_size:
+            self._queue.popleft()  # drop the oldest: the UI only needs the latest state
+            self.dropped += 1
+        self._queue.append(text)
+        self._ready.set()
+
+    async def _write(self, send_timeout_s: float):
+        try:
+            # Checked on every pass: before Python 3.12, wait_for() can swallow the cancel
+            # from close() when the send completes at the same moment
+            while not self.closed:
+                if not self._queue:
+                    self._ready.clear()
+                    await self._ready.wait()
+                    continue
+                text = self._queue.popleft()
+                await asyncio.wait_for(self.websocket.send_text(text), send_timeout_s)
+                self.sent += 1
+        except asyncio.CancelledError:
+            raise
+        except asyncio.TimeoutError:
+            self.close_reason = "slow"
+            logger.warning(f"WS client too slow (send > {send_timeout_s}s), disconnecting")
+            await self._close_socket()
+        except Exception as e:
+            self.close_reason = "error"
+            logger.warning(f"WS send failed, dropping subscriber: {e}")
+        finally:
+            self.closed = True
+
+    async def _close_socket(self):
+        try:
+            await self.websocket.close(code=1008)
+        except Exception:
+            pass
+
+    def start(self, send_timeout_s: float):
+        self._task = asyncio.get_running_loop().create_task(self._write(send_timeout_s))
+
+    async def close(self):
+        self.closed = True
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._task = None
+
+
+class Broadcaster:
+    """
+    Fan-out hub for predict_ws clients.
+
+    publish() merges an update into this tick's entry for its session (latest
+    prediction, frames appended); send_to() queues a control message (e.g. "busy")
+    for a single client.
+    """
+
+    def __init__(self, tick_s: float = UI_TICK, max_frames: int = MAX_FRAMES_PER_MESSAGE,
+                 queue_size: int = SUBSCRIBER_QUEUE_SIZE, send_timeout_s: float = SEND_TIMEOUT):
+        self.tick_s = tick_s
+        self.queue_size = queue_size
+        self.send_timeout_s = send_timeout_s
+        self.active_connections: Dict[Any, Subscriber] = {}
+        self._updates = SessionCoalescer(max_frames)
+        self._wakeup: Optional[asyncio.Event] = None
+        self._ticker: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.messages_published = 0
+        self.dropped = 0            # totals carried over from departed subscribers
+        self.slow_disconnects = 0
+
+    @property
+    def max_frames(self) -> int:
+        return self._updates.max_frames
+
+    @property
+    def updates_coalesced(self) -> int:
+        return self._updates.updates_coalesced
+
+    def _ensure_ticker(self):
+        loop = asyncio.get_running_loop()
+        if self._ticker is None or self._ticker.done() or self._loop is not loop:
+            self._loop = loop
+            self._wakeup = asyncio.Event()
+            self._ticker = loop.create_task(self._tick())
+
+    async def connect(self, websocket, subprotocol: Optional[str] = None) -> Subscriber:
+        await websocket.accept(subprotocol=subprotocol)
+        return self.subscribe(websocket)
+
+    def subscribe(self, websocket) -> Subscriber:
+        self._ensure_ticker()
+        subscriber = Subscriber(websocket, self.queue_size)
+        subscriber.start(self.send_timeout_s)
+        self.active_connections[websocket] = subscriber
+        logger.info(f"WS client connected: {len(self.active_connections)} total")
+        return subscriber
+
+    def _forget(self, websocket) -> Optional[Subscriber]:
+        subscriber = self.active_connections.pop(websocket, None)
+        if subscriber is not None:
+            self.dropped += subscriber.dropped
+            if subscriber.close_reason == "slow":
+                self.slow_disconnects += 1
+        return subscriber
+
+    async def disconnect(self, websocket):
+        subscriber = self._forget(websocket)
+        if subscriber is not None:
+            await subscriber.close()
+            logger.info(f"WS client disconnected: {len(self.active_connections)} remaining")
+
+    def publish(self, session_id: str, prediction: str, frames: Sequence):
+        """
+        Merge a prediction update (and the frames it covers: lists or an (n, values)
+        array, serialized as is) into this tick's message.
+        """
+        self._updates.offer(session_id, prediction, frames)
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    def send_to(self, websocket, message: dict):
+        """Queue a message for one client only."""
+        subscriber = self.active_connections.get(websocket)
+        if subscriber is not None:
+            subscriber.put(serialize(message))
+
+    def flush(self):
+        """Serialize each pending session update once and enqueue it for every subscriber."""
+        updates = self._updates.drain()
+        for websocket, subscriber in list(self.active_connections.items()):
+            if subscriber.closed:
+                self._forget(websocket)  # writer hit a send error or timed out
+        for message in updates:
+            text = serialize(message)
+            self.messages_published += 1
+            for subscriber in self.active_connections.values():
+                subscriber.put(text)
+
+    async def _tick(self):
+        while True:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+            self.flush()
+            await asyncio.sleep(self.tick_s)  # everything published meanwhile is coalesced
+
+    async def close(self):
+        for websocket in list(self.active_connections):
+            await self.disconnect(websocket)
+        if self._ticker is not None and not self._ticker.done():
+            self._ticker.cancel()
+            try:
+                await self._ticker
+            except asyncio.CancelledError:
+                pass
+        self._ticker = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        subscribers = list(self.active_connections.values())
+        return {
+            "subscribers": len(subscribers),
+            "messages_published": self.messages_published,
+            "updates_coalesced": self.updates_coalesced,
+            "queued": sum(len(s._queue) for s in subscribers),
+            "dropped": self.dropped + sum(s.dropped for s in subscribers),
+            "slow_disconnects": self.slow_disconnects + sum(1 for s in subscribers if s.close_reason == "slow"),
+        }
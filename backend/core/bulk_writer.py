@@ -0,0 +1,292 @@
+"""
+Buffered bulk writes for sensor ingestion.
+
+- BulkWriter: producers hand documents to put() (returns once buffered) or write()
+  (returns once stored). One flusher task writes them with insert_many(ordered=False)
+  when batch_size documents are queued or the oldest has waited flush_interval_ms.
+  The buffer is bounded (put() waits for space), transient failures (network,
+  failover) are retried with exponential backoff, and close() flushes what is left.
+  Documents get their _id before buffering, so a retried batch never duplicates
+  rows: duplicate-key errors on a retry mean the earlier attempt got through.
+  Synchronous producers (the serial collection scripts) run a writer on its own
+  loop thread via start_background() and submit().
+- sensor_writer / bucket_writer: shared writers for sensor_data and sensor_buckets.
+"""
+import asyncio
+import logging
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Optional, Tuple
+
+from bson import ObjectId
+from pymongo.errors import BulkWriteError, ConnectionFailure, PyMongoError
+
+from core.batching import Histogram
+from core.database import sensor_bucket_collection, sensor_collection
+from core.settings import settings
+
+logger = logging.getLogger("signglove")
+
+DUPLICATE_KEY = 11000
+INGEST_BATCH_BUCKETS = (1, 10, 50, 100, 250, 500, 1000)
+FLUSH_MS_BUCKETS = (1, 5, 10, 25, 50, 100, 250, 1000)
+
+
+class IngestError(Exception):
+    """Raised to write() callers whose document could not be stored."""
+
+
+def _is_transient(e: PyMongoError) -> bool:
+    return isinstance(e, ConnectionFailure) or e.has_error_label("RetryableWriteError")
+
+
+class BulkWriter:
+    """
+    Buffer documents for one collection and write them in unordered bulk inserts.
+
+    At most one batch is in flight at a time, so documents are written in the order
+    they were queued. Documents that still fail after `retries` attempts (or fail
+    permanently, e.g. validation) are dropped and counted; write() callers get an
+    IngestError.
+    """
+
+    def __init__(self, collection, name: str = "", batch_size: Optional[int] = None,
+                 flush_interval_ms: Optional[float] = None, max_pending: Optional[int] = None,
+                 retries: Optional[int] = None, retry_backoff: float = 0.1):
+        self.collection = collection
+        self.name = name or getattr(collection, "name", "collection")
+        self.batch_size = max(1, int(settings.INGEST_BATCH_SIZE if batch_size is None else batch_size))
+        interval = settings.INGEST_FLUSH_INTERVAL_MS if flush_interval_ms is None else flush_interval_ms
+        self.flush_interval = max(0.0, float(interval)) / 1000.0
+        self.max_pending = max(self.batch_size, int(settings.INGEST_MAX_PENDING if max_pending is None else max_pending))
+        self.retries = max(0, int(settings.INGEST_RETRIES if retries is None else retries))
+        self.retry_backoff = retry_backoff
+        self.batch_size_hist = Histogram(INGEST_BATCH_BUCKETS)
+        self.flush_ms_hist = Histogram(FLUSH_MS_BUCKETS)
+        self.queued = 0
+        self.written = 0
+        self.failed = 0
+        self.batches = 0
+        self.retried = 0
+        self.backpressure_waits = 0
+        self._started = time.monotonic()
+        self._buffer: Deque[Tuple[Dict[str, Any], Optional[asyncio.Future]]] = deque()
+        self._in_flight = 0
+        self._first_at = 0.0          # loop time the oldest buffered document arrived
+        self._flush_requested = False
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._space: Optional[asyncio.Event] = None
+        self._idle: Optional[asyncio.Event] = None
+        self._thread: Optional[threading.Thread] = None
+        self._thread_loop: Optional[asyncio.AbstractEventLoop] = None
+
+    @property
+    def pending(self) -> int:
+        return len(self._buffer) + self._in_flight
+
+    def _ensure_worker(self):
+        loop = asyncio.get_running_loop()
+        if self._worker is None or self._worker.done() or self._loop is not loop:
+            self._loop = loop
+            self._wake, self._space, self._idle = asyncio.Event(), asyncio.Event(), asyncio.Event()
+            self._space.set()
+            if self._buffer:
+                self._wake.set()
+            else:
+                self._idle.set()
+            self._worker = loop.create_task(self._run())
+
+    # ---------------- producers ----------------
+    async def put(self, doc: Dict[str, Any]) -> ObjectId:
+        """Buffer a document; waits only while max_pending documents are already queued."""
+        self._ensure_worker()
+        await self._wait_for_space()
+        return self._append(doc, None)
+
+    async def write(self, doc: Dict[str, Any]) -> ObjectId:
+        """Buffer a document and wait until its batch is stored (group commit)."""
+        self._ensure_worker()
+        await self._wait_for_space()
+        future = self._loop.create_future()
+        self._append(doc, future)
+        return await future
+
+    async def _wait_for_space(self):
+        while len(self._buffer) >= self.max_pending:
+            self.backpressure_waits += 1
+            self._space.clear()
+            await self._space.wait()
+
+    def _append(self, doc: Dict[str, Any], future: Optional[asyncio.Future]) -> ObjectId:
+        doc_id = doc.setdefault("_id", ObjectId())
+        if not self._buffer:
+            self._first_at = self._loop.time()
+            self._wake.set()  # start the flush_interval clock
+        self._buffer.append((doc, future))
+        self.queued += 1
+        self._idle.clear()
+        if len(self._buffer) >= self.batch_size:
+            self._wake.set()
+        return doc_id
+
+    async def flush(self):
+        """Return once everything queued so far has been written (or given up on)."""
+        if not self.pending:
+            return
+        self._ensure_worker()
+        while self.pending:
+            self._idle.clear()
+            self._flush_requested = True
+            self._wake.set()
+            await self._idle.wait()
+
+    # ---------------- flusher ----------------
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            if not self._buffer:
+                self._flush_requested = False
+                self._idle.set()
+                await self._wake.wait()
+                self._wake.clear()
+                continue
+            age = loop.time() - self._first_at
+            if len(self._buffer) < self.batch_size and not self._flush_requested and age < self.flush_interval:
+                try:
+                    await asyncio.wait_for(self._wake.wait(), self.flush_interval - age)
+                except asyncio.TimeoutError:
+                    pass
+                self._wake.clear()
+                continue
+            await self._write_batch()
+
+    async def _write_batch(self):
+        batch = [self._buffer.popleft() for _ in range(min(self.batch_size, len(self._buffer)))]
+        self._in_flight = len(batch)
+        self._space.set()
+        t0 = time.perf_counter()
+        try:
+            failures = await self._insert([doc for doc, _ in batch])
+        finally:
+            self._in_flight = 0
+        self.batches += 1
+        self.batch_size_hist.observe(len(batch))
+        self.flush_ms_hist.observe((time.perf_counter() - t0) * 1000.0)
+        for i, (doc, future) in enumerate(batch):
+            if future is None or future.done():
+                continue
+            if i in failures:
+                future.set_exception(IngestError(failures[i]))
+            else:
+                future.set_result(doc["_id"])
+
+    async def _insert(self, docs) -> Dict[int, str]:
+        """insert_many with retries; returns {batch index: error} for documents not stored."""
+        attempt = 0
+        while True:
+            try:
+                await self.collection.insert_many(docs, ordered=False)
+                self.written += len(docs)
+                return {}
+            except BulkWriteError as e:
+                failures = {}
+                for err in e.details.get("writeErrors", []):
+                    if attempt and err.get("code") == DUPLICATE_KEY:
+                        continue  # stored by an earlier attempt whose reply was lost
+                    failures[err["index"]] = err.get("errmsg", "write error")
+                self.written += len(docs) - len(failures)
+                self.failed += len(failures)
+                if failures:
+                    logger.error(f"Bulk write to {self.name}: {len(failures)} of {len(docs)} documents rejected")
+                return failures
+            except PyMongoError as e:
+                if _is_transient(e) and attempt < self.retries:
+                    attempt += 1
+                    self.retried += 1
+                    delay = self.retry_backoff * 2 ** (attempt - 1)
+                    logger.warning(f"Bulk write to {self.name} failed ({e}); retry {attempt}/{self.retries} in {delay:.2f}s")
+                    await asyncio.sleep(delay)
+                    continue
+                error = e
+            except Exception as e:
+                error = e
+            self.failed += len(docs)
+            logger.error(f"Bulk write to {self.name} dropped {len(docs)} documents: {error}")
+            return {i: str(error) for i in range(len(docs))}
+
+    async def close(self):
+        """Flush everything still buffered, then stop the flusher."""
+        if self._worker is None:
+            return
+        await self.flush()
+        if not self._worker.done():
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+        self._worker = None
+
+    # ---------------- synchronous producers ----------------
+    def start_background(self):
+        """Run the writer on its own event loop thread, for code without an event loop."""
+        if self._thread is not None:
+            return
+        self._thread_loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._thread_loop.run_forever, name=f"bulk-writer-{self.name}", daemon=True)
+        self._thread.start()
+
+    def submit(self, doc: Dict[str, Any], timeout: Optional[float] = None) -> ObjectId:
+        """Thread-safe put() for start_background() writers; blocks only while the buffer is full."""
+        return asyncio.run_coroutine_threadsafe(self.put(doc), self._thread_loop).result(timeout)
+
+    def flush_sync(self, timeout: Optional[float] = None):
+        asyncio.run_coroutine_threadsafe(self.flush(), self._thread_loop).result(timeout)
+
+    def close_sync(self, timeout: Optional[float] = None):
+        """Flush and stop a start_background() writer."""
+        if self._thread is None:
+            return
+        try:
+            asyncio.run_coroutine_threadsafe(self.close(), self._thread_loop).result(timeout)
+        finally:
+            self._thread_loop.call_soon_threadsafe(self._thread_loop.stop)
+            self._thread.join(timeout)
+            self._thread = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        elapsed = max(time.monotonic() - self._started, 1e-9)
+        return {
+            "collection": self.name,
+            "batch_size": self.batch_size,
+            "flush_interval_ms": self.flush_interval * 1000.0,
+            "pending": self.pending,
+            "max_pending": self.max_pending,
+            "queued": self.queued,
+            "written": self.written,
+            "failed": self.failed,
+            "batches": self.batches,
+            "retries": self.retried,
+            "backpressure_waits": self.backpressure_waits,
+            "docs_per_s": round(self.written / elapsed, 2),
+            "batch_sizes": self.batch_size_hist.snapshot(),
+            "flush_ms": self.flush_ms_hist.snapshot(),
+        }
+
+
+# Shared writers; started lazily on first use, flushed by the app's lifespan on shutdown
+sensor_writer = BulkWriter(sensor_collection, "sensor_data")
+bucket_writer = BulkWriter(sensor_bucket_collection, "sensor_buckets")
+WRITERS = (sensor_writer, bucket_writer)
+
+
+async def close_writers():
+    for writer in WRITERS:
+        await writer.close()
+
+
+def get_ingest_stats() -> Dict[str, Any]:
+    return {writer.name: writer.get_stats() for writer in WRITERS}
@@ -1,7 +1,7 @@
 """
 Database connection and collection setup for the sign glove system.
 
-- Sets up MongoDB client and main collections (predictions, sensor_data, model_results, gestures, training_sessions).
+- Sets up MongoDB client and main collections (predictions, sensor_data, sensor_buckets, model_results, gestures, training_sessions).
 - Provides async test_connection function to verify MongoDB connectivity.
 """
 from motor.motor_asyncio import AsyncIOMotorClient
@@ -19,6 +19,8 @@ else:
 
 # Collections
 sensor_collection = db.sensor_data
+sensor_bucket_collection = db.sensor_buckets  # bucketed per-frame recordings (core.sensor_buckets)
+sensor_change_collection = db.sensor_changes  # relabels/deletes replayed by the training export
 prediction_collection = db.predictions
 model_collection = db.model_results
 gesture_collection = db.gestures
@@ -8,6 +8,7 @@ from datetime import datetime, timezone
 from typing import Dict, Any, Optional
 from fastapi import HTTPException, Request
 from fastapi.responses import JSONResponse
+from core.serialization import FastJSONResponse
 import sys
 
 # Configure structured logging
@@ -149,7 +150,7 @@ def create_error_response(
     if include_traceback:
         error_response["traceback"] = traceback.format_exc()
     
-    return JSONResponse(
+    return FastJSONResponse(
         status_code=status_code,
         content=error_response
     )
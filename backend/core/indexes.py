@@ -5,6 +5,7 @@ Indexes setup for MongoDB collections in the sign glove system.
 """
 from core.database import (
     sensor_collection,
+    sensor_bucket_collection,
     model_collection,
     gesture_collection,
     training_collection
@@ -19,6 +20,11 @@ async def create_indexes():
     await sensor_collection.create_index("gesture_label")
     await sensor_collection.create_index("timestamp")
 
+    # Bucketed sensor frames: per-session reads and time-ordered exports
+    await sensor_bucket_collection.create_index([("session_id", 1), ("start", 1)])
+    await sensor_bucket_collection.create_index("start")
+    await sensor_bucket_collection.create_index("label")
+
     # Model results
     await model_collection.create_index("model_name")
 
@@ -1,49 +1,144 @@
 # core/model.py
 import os
+import glob
+import asyncio
 import logging
 import numpy as np
-from tensorflow.keras.models import load_model
 from core.settings import settings
+from core.batching import MicroBatcher, InferenceBusyError
+from core.runtime import load_runtime, load_ensemble, tflite_path_for
+from core.model_registry import ModelBundle, ModelRegistry, file_fingerprint
+from core.model_artifacts import load_run
 import pickle
+from concurrent.futures import ThreadPoolExecutor
 
 logger = logging.getLogger("signglove")
 
 # ---------------- Load model safely ----------------
-model = None
+# The active artifacts live in a ModelBundle owned by model_registry and can be
+# hot-swapped after retraining. Nothing is loaded at import: the server loads the
+# bundle in the background at startup (start_model_registry), scripts on first use.
+# These module attributes mirror the active bundle.
+model = None    # Keras model, only when the Keras runtime is active
+runtime = None  # active inference runtime (TFLite or compiled Keras)
 scaler = None
 label_encoder = None
 
-try:
-    if os.path.exists(settings.MODEL_PATH):
-        model = load_model(settings.MODEL_PATH)
-        logger.info(f"Loaded Keras H5 model from {settings.MODEL_PATH}")
-    else:
-        logger.warning(f"[Warning] Model file not found at {settings.MODEL_PATH}. Model will not be loaded.")
-except Exception as e:
-    logger.error(f"Failed to load model: {e}")
-    model = None
-
-try:
-    if os.path.exists(settings.SCALER_PATH):
-        with open(settings.SCALER_PATH, "rb") as f:
-            scaler = pickle.load(f)
-        logger.info(f"Loaded scaler from {settings.SCALER_PATH}")
-    else:
-        logger.warning(f"[Warning] Scaler file not found at {settings.SCALER_PATH}.")
-except Exception as e:
-    logger.error(f"Failed to load scaler: {e}")
-    scaler = None
-
-try:
-    if os.path.exists(settings.ENCODER_PATH):
-        with open(settings.ENCODER_PATH, "rb") as f:
-            label_encoder = pickle.load(f)
-        logger.info(f"Loaded label encoder from {settings.ENCODER_PATH}")
-    else:
-        logger.warning(f"[Warning] Label encoder file not found at {settings.ENCODER_PATH}.")
-except Exception as e:
-    logger.error(f"Failed to load label encoder: {e}")
-    label_encoder = None
+def _watch_paths() -> list:
+    """The completion marker: a training run writes it after every other artifact."""
+    return [settings.METRICS_PATH]
+
+def _artifact_paths() -> list:
+    """Every file a bundle is loaded from."""
+    paths = [settings.SCALER_PATH, settings.ENCODER_PATH, settings.METRICS_PATH]
+    model_paths = glob.glob(settings.MODEL_PATH_TEMPLATE.format("*")) if settings.INFERENCE_ENSEMBLE else [settings.MODEL_PATH]
+    for path in model_paths:
+        paths += [path, tflite_path_for(path, settings.INFERENCE_TFLITE_INT8)]
+    return paths
+
+def _load_pickle(path: str, what: str):
+    try:
+        if os.path.exists(path):
+            with open(path, "rb") as f:
+                obj = pickle.load(f)
+            logger.info(f"Loaded {what} from {path}")
+            return obj
+        logger.warning(f"[Warning] {what.capitalize()} file not found at {path}.")
+    except Exception as e:
+        logger.error(f"Failed to load {what}: {e}")
+    return None
+
+def _load_bundle() -> ModelBundle:
+    """
+    Load runtime, scaler and label encoder of the published training run as one
+    bundle; raises if the files on disk do not match the run's completion marker.
+    """
+    fingerprint = file_fingerprint(_watch_paths())  # taken first so a later run triggers another reload
+    bundle, run_id = load_run(settings.METRICS_PATH, _artifact_paths(), _read_bundle)
+    bundle.fingerprint = fingerprint
+    bundle.run_id = run_id
+    return bundle
+
+def _read_bundle() -> ModelBundle:
+    bundle_scaler = _load_pickle(settings.SCALER_PATH, "scaler")
+    bundle_encoder = _load_pickle(settings.ENCODER_PATH, "label encoder")
+
+    bundle_runtime = None
+    try:
+        if settings.INFERENCE_ENSEMBLE:
+            bundle_runtime = load_ensemble(
+                settings.MODEL_PATH_TEMPLATE,
+                metrics_path=settings.METRICS_PATH,
+                prefer=settings.INFERENCE_RUNTIME,
+                quantized=settings.INFERENCE_TFLITE_INT8,
+                budget_ms=settings.INFERENCE_ENSEMBLE_BUDGET_MS,
+                reprobe_every=settings.INFERENCE_ENSEMBLE_REPROBE,
+                num_classes=len(bundle_encoder.classes_) if bundle_encoder is not None else None,
+            )
+        else:
+            bundle_runtime = load_runtime(
+                settings.MODEL_PATH,
+                prefer=settings.INFERENCE_RUNTIME,
+                quantized=settings.INFERENCE_TFLITE_INT8,
+            )
+    except Exception as e:
+        logger.error(f"Failed to load model: {e}")
+    return ModelBundle(bundle_runtime, bundle_scaler, bundle_encoder)
+
+def _publish(bundle: ModelBundle):
+    global model, runtime, scaler, label_encoder
+    runtime, scaler, label_encoder = bundle.runtime, bundle.scaler, bundle.label_encoder
+    model = getattr(runtime, "model", None)
+
+model_registry = ModelRegistry(
+    _load_bundle,
+    _watch_paths,
+    poll_interval_s=settings.MODEL_RELOAD_POLL_S,
+    on_swap=_publish,
+)
+
+# ---------------- Prediction helpers ----------------
+def _prepare_sequence(sequence: list):
+    """Validate a (frames, 11) sequence. Returns (array, None) or (None, error dict)."""
+    seq_array = np.asarray(sequence, dtype=np.float32)  # shape: (frames, 11)
+
+    if seq_array.ndim != 2 or seq_array.shape[1] != 11:
+        return None, {"status": "error", "message": f"Invalid input shape {seq_array.shape}, expected (frames, 11)"}
+    return seq_array, None
+
+def _format_predictions(outputs: np.ndarray, bundle: ModelBundle) -> list:
+    """Map rows of class probabilities to prediction responses (argmax over the whole batch)."""
+    indices = outputs.argmax(axis=1)
+    confidences = outputs[np.arange(len(outputs)), indices].tolist()
+    return [
+        {"status": "success", "prediction": bundle.decode(index), "confidence": confidence}
+        for index, confidence in zip(indices.tolist(), confidences)
+    ]
+
+def _forward_batch(batch: np.ndarray) -> list:
+    """
+    Scale, score and decode a raw (batch, frames, 11) array with the active bundle.
+    The bundle is read once, so a hot swap never mixes scaler/model/encoder versions
+    within a batch.
+    """
+    bundle = model_registry.active
+    if bundle is None or bundle.runtime is None:
+        raise RuntimeError("Model not loaded")
+    return _format_predictions(bundle.runtime(bundle.scale(batch)), bundle)
+
+def _model_loaded() -> bool:
+    bundle = model_registry.ensure_loaded()
+    return bundle is not None and bundle.runtime is not None
+
+async def _model_loaded_async() -> bool:
+    """_model_loaded() without loading TensorFlow on the event loop."""
+    bundle = await model_registry.ensure_loaded_async()
+    return bundle is not None and bundle.runtime is not None
+
+def _not_loaded_response() -> dict:
+    if model_registry.state == "warming":
+        return {"status": "warming", "message": "Model is loading, try again shortly"}
+    return {"status": "error", "message": "Model not loaded"}
 
 # ---------------- Prediction function ----------------
 def predict_gesture(sequence: list) -> dict:
@@ -55,36 +150,77 @@ def predict_gesture(sequence: list) -> dict:
         dict: {"status": "success"/"error", "prediction": str, "confidence": float}
     """
     try:
-        if model is None:
-            return {"status": "error", "message": "Model not loaded"}
+        if not _model_loaded():
+            return _not_loaded_response()
 
-        # Convert sequence to numpy array
-        seq_array = np.array(sequence, dtype=np.float32)  # shape: (frames, 11)
+        seq_array, error = _prepare_sequence(sequence)
+        if error:
+            return error
 
-        # Validate shape
-        if seq_array.ndim != 2 or seq_array.shape[1] != 11:
-            return {"status": "error", "message": f"Invalid input shape {seq_array.shape}, expected (frames, 11)"}
+        # Reshape to 3D for model (1, frames, 11)
+        return _forward_batch(seq_array[np.newaxis, :, :])[0]
 
-        # Apply scaler if available (2D)
-        if scaler:
-            seq_array = scaler.transform(seq_array)
+    except Exception as e:
+        logger.error(f"Prediction error: {e}")
+        return {"status": "error", "message": f"Prediction failed: {str(e)}"}
 
-        # Reshape to 3D for model (1, frames, 11)
-        seq_input = seq_array[np.newaxis, :, :]
+# ---------------- Async inference execution layer ----------------
+# Forward passes run on a dedicated thread pool so they never block the event loop.
+# The pool shares the active model bundle (TensorFlow releases the GIL inside ops).
+inference_executor = ThreadPoolExecutor(
+    max_workers=settings.INFERENCE_WORKERS,
+    thread_name_prefix="inference",
+)
 
-        # Predict
-        output = model.predict(seq_input)  # shape: (1, num_classes)
-        predicted_index = int(np.argmax(output))
-        confidence = float(np.max(output))
+batcher = MicroBatcher(
+    _forward_batch,
+    max_batch_size=settings.INFERENCE_MAX_BATCH_SIZE,
+    max_wait_ms=settings.INFERENCE_BATCH_WINDOW_MS,
+    executor=inference_executor,
+    max_concurrent_batches=settings.INFERENCE_WORKERS,
+    max_pending=settings.INFERENCE_MAX_QUEUE,
+)
 
-        # Map label
-        if label_encoder:
-            predicted_label = label_encoder.inverse_transform([predicted_index])[0]
-        else:
-            predicted_label = str(predicted_index)
+async def predict_async(sequence: list) -> dict:
+    """
+    Same contract as predict_gesture, but awaitable: concurrent callers share one
+    forward pass through the micro-batching scheduler, which runs on the inference
+    thread pool. Returns {"status": "busy", ...} when the inference queue is full
+    so callers can signal backpressure to their clients.
+    """
+    try:
+        if not await _model_loaded_async():
+            return _not_loaded_response()
 
-        return {"status": "success", "prediction": predicted_label, "confidence": confidence}
+        seq_array, error = _prepare_sequence(sequence)
+        if error:
+            return error
 
+        return await batcher.submit(seq_array)
+
+    except InferenceBusyError as e:
+        logger.warning(f"Inference backpressure: {e}")
+        return {"status": "busy", "message": str(e), "pending": e.pending}
     except Exception as e:
         logger.error(f"Prediction error: {e}")
         return {"status": "error", "message": f"Prediction failed: {str(e)}"}
+
+async def warmup_model() -> float:
+    """Trace the compiled runtime on the inference pool so the first request is fast."""
+    if not await _model_loaded_async():
+        return 0.0
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(inference_executor, model_registry.active.runtime.warmup)
+
+async def start_model_registry():
+    """
+    Load and warm the model in the background (the app serves, reporting "warming",
+    meanwhile), then keep watching the artifacts for hot reload.
+    """
+    model_registry.start(watch=settings.MODEL_RELOAD_POLL_S > 0)
+
+async def shutdown_inference():
+    """Stop the reload watcher and batching worker and release the inference thread pool."""
+    await model_registry.stop()
+    await batcher.close()
+    inference_executor.shutdown(wait=False)
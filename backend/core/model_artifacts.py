@@ -0,0 +1,107 @@
+"""
+One training run's model artifacts, published and loaded as a unit.
+
+AI/model.py writes the scaler, label encoder and fold models of a run into a staging
+directory and only then calls publish_run(), which moves them into place and writes
+the completion marker (training_metrics.json) last. The marker carries the run id
+and a SHA-256 digest of every artifact of the run.
+
+The server's watcher reacts to the marker alone, and load_run() checks the files on
+disk against it before and after loading, so a reload never pairs one run's scaler
+or encoder with another run's folds. Markers written before run ids existed (no
+"artifacts" entry) are loaded unchecked.
+"""
+import hashlib
+import json
+import os
+import time
+import uuid
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple, TypeVar
+
+from core.model_registry import file_fingerprint
+
+T = TypeVar("T")
+
+
+def new_run_id() -> str:
+    return f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}"
+
+
+def file_digest(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def read_marker(marker_path: str) -> Optional[Dict[str, Any]]:
+    if not os.path.exists(marker_path):
+        return None
+    with open(marker_path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _key(path: str, marker_path: str) -> str:
+    """Artifact paths are stored relative to the marker, so the tree can move."""
+    return os.path.relpath(path, os.path.dirname(marker_path))
+
+
+def publish_run(marker_path: str, marker: Dict[str, Any], files: Dict[str, str],
+                remove: Iterable[str] = (), keep_previous: bool = False) -> Dict[str, Any]:
+    """
+    Move staged artifacts into place (files: final path -> staged path), delete the
+    paths in `remove`, then write `marker` with the digest of every artifact as the
+    completion marker. keep_previous keeps the earlier marker's entries for files
+    not published here (re-exporting one artifact of an existing run).
+    """
+    previous = read_marker(marker_path) if keep_previous else None
+    artifacts = dict((previous or {}).get("artifacts", {}))
+    for final_path, staged_path in files.items():
+        os.makedirs(os.path.dirname(final_path), exist_ok=True)
+        os.replace(staged_path, final_path)
+        artifacts[_key(final_path, marker_path)] = file_digest(final_path)
+    for path in remove:
+        artifacts.pop(_key(path, marker_path), None)
+        if os.path.exists(path):
+            os.remove(path)
+
+    marker = dict(marker, artifacts=artifacts)
+    tmp_path = marker_path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(marker, f, indent=2)
+    os.replace(tmp_path, marker_path)
+    return marker
+
+
+def verify_run(marker_path: str) -> Optional[str]:
+    """
+    Run id of the artifacts on disk. Raises RuntimeError when one of them is missing
+    or differs from what the marker recorded (a run is still being published).
+    """
+    marker = read_marker(marker_path)
+    if marker is None:
+        return None
+    run_id = marker.get("run_id")
+    base = os.path.dirname(marker_path)
+    for key, digest in marker.get("artifacts", {}).items():
+        path = os.path.normpath(os.path.join(base, key))
+        if not os.path.exists(path):
+            raise RuntimeError(f"Model artifact {key} of run {run_id} is missing")
+        if file_digest(path) != digest:
+            raise RuntimeError(f"Model artifact {key} does not match run {run_id}")
+    return run_id
+
+
+def load_run(marker_path: str, paths: Iterable[str], load: Callable[[], T]) -> Tuple[T, Optional[str]]:
+    """
+    Verify the published run, call load(), and fail if any of `paths` changed in the
+    meantime. Returns load()'s result and the run id.
+    """
+    paths = list(paths)
+    before = file_fingerprint(paths)
+    run_id = verify_run(marker_path)
+    result = load()
+    if file_fingerprint(paths) != before:
+        raise RuntimeError("Model artifacts changed while loading")
+    return result, run_id
@@ -0,0 +1,270 @@
+"""
+Hot-swappable model registry for gesture inference.
+
+A ModelBundle is everything one prediction needs (runtime, scaler, label encoder),
+loaded and warmed up together (see core.model_artifacts for how one training run's
+files are published and checked). ModelRegistry keeps the active bundle and replaces it
+in one reference assignment, so a forward pass that already picked up a bundle
+finishes on it while later batches see the new one; no request is dropped or mixes
+artifacts from two training runs.
+
+Loading never happens at import: the server loads the first bundle in the
+background during startup (state "warming" until it is warmed up), and scripts load
+it on first use via ensure_loaded() (ensure_loaded_async() from a coroutine, which
+loads on a worker thread). Reloads happen in a background thread, either
+when the training job reports completion (request_reload) or when the watcher sees
+the watched paths (the run's completion marker) change and settle.
+"""
+import asyncio
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger("signglove")
+
+
+def scaler_params(scaler) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+    """
+    (offset, inverse scale) float32 arrays equivalent to a fitted StandardScaler's
+    transform, or None when the scaler is not a plain StandardScaler-like object.
+    """
+    if scaler is None or not hasattr(scaler, "scale_"):
+        return None
+    num_features = len(scaler.scale_) if scaler.scale_ is not None else len(scaler.mean_)
+    mean = scaler.mean_ if getattr(scaler, "with_mean", True) and scaler.mean_ is not None else np.zeros(num_features)
+    scale = scaler.scale_ if getattr(scaler, "with_std", True) and scaler.scale_ is not None else np.ones(num_features)
+    return np.asarray(mean, dtype=np.float32), (1.0 / np.asarray(scale, dtype=np.float64)).astype(np.float32)
+
+
+def apply_scaler(batch: np.ndarray, params: Tuple[np.ndarray, np.ndarray]) -> np.ndarray:
+    """(x - mean) * (1 / scale) broadcast over the last axis: one allocation, no validation."""
+    mean, inv_scale = params
+    out = np.subtract(batch, mean, dtype=np.float32)  # fresh array, never aliases the caller's window
+    out *= inv_scale
+    return out
+
+
+class ModelBundle:
+    """
+    One consistent set of inference artifacts.
+
+    The scaler's mean/scale and the encoder's classes are extracted once here, so the
+    hot path applies them with NumPy broadcasting and tuple indexing instead of
+    sklearn's per-call validation.
+    """
+
+    def __init__(self, runtime, scaler=None, label_encoder=None, fingerprint: Tuple = (),
+                 run_id: Optional[str] = None):
+        self.runtime = runtime
+        self.scaler = scaler
+        self.label_encoder = label_encoder
+        self.fingerprint = fingerprint
+        self.run_id = run_id  # training run the artifacts came from, when it is recorded
+        self.version = 0
+        self.loaded_at = time.time()
+        self._scaler_params = scaler_params(scaler)
+        self.classes: Optional[Tuple[str, ...]] = (
+            tuple(str(c) for c in label_encoder.classes_) if label_encoder is not None else None
+        )
+
+    def scale(self, batch: np.ndarray) -> np.ndarray:
+        """Apply the fitted scaler to a (batch, frames, features) array."""
+        if self._scaler_params is not None:
+            return apply_scaler(batch, self._scaler_params)
+        if self.scaler is None:
+            return batch
+        flat = batch.reshape(-1, batch.shape[-1])
+        return self.scaler.transform(flat).astype(np.float32).reshape(batch.shape)
+
+    def decode(self, index: int) -> str:
+        """Class index -> label (the index itself when no encoder is loaded)."""
+        return self.classes[index] if self.classes is not None else str(index)
+
+
+def file_fingerprint(paths: Iterable[str]) -> Tuple:
+    """(path, mtime, size) for every existing path; changes whenever an artifact is rewritten."""
+    fingerprint = []
+    for path in paths:
+        try:
+            st = os.stat(path)
+        except OSError:
+            continue
+        fingerprint.append((path, st.st_mtime_ns, st.st_size))
+    return tuple(fingerprint)
+
+
+class ModelRegistry:
+    """
+    Owns the active ModelBundle.
+
+    loader: builds a fresh ModelBundle from disk (runs in a worker thread).
+    watch_paths: returns the artifact paths whose changes should trigger a reload.
+    on_swap: called with each newly activated bundle.
+    """
+
+    def __init__(self, loader: Callable[[], ModelBundle], watch_paths: Callable[[], Iterable[str]],
+                 poll_interval_s: float = 5.0, on_swap: Optional[Callable[[ModelBundle], None]] = None):
+        self.loader = loader
+        self.watch_paths = watch_paths
+        self.on_swap = on_swap
+        self.poll_interval_s = poll_interval_s
+        self._active: Optional[ModelBundle] = None
+        self._lock: Optional[asyncio.Lock] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._watcher: Optional[asyncio.Task] = None
+        self._startup: Optional[asyncio.Task] = None
+        self._init_lock = threading.Lock()
+        self.state = "cold"   # cold -> warming -> ready | failed
+        self.reloads = 0
+        self.failed_reloads = 0
+        self.last_error: Optional[str] = None
+        self.last_reload_ms: Optional[float] = None
+
+    @property
+    def active(self) -> Optional[ModelBundle]:
+        return self._active
+
+    def _swap(self, bundle: ModelBundle):
+        bundle.version = (self._active.version + 1) if self._active else 1
+        self._active = bundle
+        if self.on_swap is not None:
+            self.on_swap(bundle)
+
+    def _set_ready_state(self):
+        bundle = self._active
+        self.state = "ready" if bundle is not None and bundle.runtime is not None else "failed"
+
+    def load_initial(self) -> Optional[ModelBundle]:
+        """Synchronous first load (no warmup); failures leave no usable runtime."""
+        with self._init_lock:
+            if self._active is not None:
+                return self._active
+            self.state = "warming"
+            try:
+                self._swap(self.loader())
+            except Exception as e:
+                self.last_error = str(e)
+                logger.error(f"Failed to load model: {e}")
+            self._set_ready_state()
+        return self._active
+
+    def ensure_loaded(self) -> Optional[ModelBundle]:
+        """Active bundle, loading it synchronously first if nothing has started a load yet."""
+        if self.state == "cold":
+            return self.load_initial()
+        return self._active
+
+    async def ensure_loaded_async(self) -> Optional[ModelBundle]:
+        """
+        ensure_loaded() for coroutines: the first load runs on a worker thread, and
+        callers arriving meanwhile see state "warming" and no bundle instead of waiting.
+        """
+        if self.state == "cold":
+            self.state = "warming"
+            return await asyncio.to_thread(self.load_initial)
+        return self._active
+
+    async def reload(self, reason: str = "manual") -> Dict[str, Any]:
+        """Load, warm up and swap in a new bundle. The current one keeps serving until then."""
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        if self._active is None:
+            self.state = "warming"
+        async with self._lock:
+            start = time.perf_counter()
+            try:
+                bundle = await asyncio.to_thread(self._load_and_warm)
+            except Exception as e:
+                self.failed_reloads += 1
+                self.last_error = str(e)
+                logger.error(f"Model reload ({reason}) failed, keeping version "
+                             f"{self._active.version if self._active else None}: {e}")
+                self._set_ready_state()
+                return {"status": "error", "message": f"Model reload failed: {e}"}
+
+            self._swap(bundle)
+            self.state = "ready"
+            self.reloads += 1
+            self.last_error = None
+            self.last_reload_ms = (time.perf_counter() - start) * 1000.0
+            logger.info(f"Model reloaded ({reason}): version {bundle.version}, "
+                        f"{bundle.runtime.name} runtime, {self.last_reload_ms:.0f} ms")
+            return {"status": "success", "version": bundle.version, "runtime": bundle.runtime.name}
+
+    def _load_and_warm(self) -> ModelBundle:
+        bundle = self.loader()
+        if bundle.runtime is None:
+            raise RuntimeError("no model artifact found")
+        bundle.runtime.warmup()
+        return bundle
+
+    def request_reload(self, reason: str = "notified"):
+        """Thread-safe trigger (e.g. from the training job's log thread)."""
+        if self._loop is None or self._loop.is_closed():
+            logger.warning(f"Model reload ({reason}) requested before the registry was started")
+            return
+        asyncio.run_coroutine_threadsafe(self.reload(reason), self._loop)
+
+    async def _watch(self):
+        seen = file_fingerprint(self.watch_paths())
+        candidate = None
+        while True:
+            await asyncio.sleep(self.poll_interval_s)
+            current = file_fingerprint(self.watch_paths())
+            if current == seen:
+                candidate = None
+                continue
+            if current != candidate:
+                candidate = current  # still being written; wait for it to settle for one poll
+                continue
+            seen, candidate = current, None
+            if self._active is None or current != self._active.fingerprint:
+                await self.reload("artifacts changed")
+
+    def start(self, watch: bool = True, load: bool = True):
+        """
+        Bind to the running loop, start the file watcher and, if nothing is loaded yet,
+        load + warm the first bundle in the background (state "warming" meanwhile).
+        """
+        self._loop = asyncio.get_running_loop()
+        if load and self.state == "cold":
+            self.state = "warming"
+            self._startup = self._loop.create_task(self.reload("startup"))
+        if watch and self.poll_interval_s > 0 and (self._watcher is None or self._watcher.done()):
+            self._watcher = self._loop.create_task(self._watch())
+
+    async def wait_ready(self) -> bool:
+        """Wait for the background startup load; True when a model is serving."""
+        if self._startup is not None:
+            await asyncio.shield(self._startup)
+        return self.state == "ready"
+
+    async def stop(self):
+        for task in (self._watcher, self._startup):
+            if task is not None and not task.done():
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        self._watcher = None
+        self._startup = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        bundle = self._active
+        return {
+            "state": self.state,
+            "version": bundle.version if bundle else None,
+            "run_id": bundle.run_id if bundle else None,
+            "runtime": bundle.runtime.name if bundle and bundle.runtime else None,
+            "loaded_at": bundle.loaded_at if bundle else None,
+            "reloads": self.reloads,
+            "failed_reloads": self.failed_reloads,
+            "last_reload_ms": self.last_reload_ms,
+            "last_error": self.last_error,
+            "watching": self._watcher is not None and not self._watcher.done(),
+        }
@@ -0,0 +1,56 @@
+"""
+Outbound coalescing for the gesture WebSockets.
+
+The receive loop never writes to a socket itself: it offers prediction updates to a
+SessionCoalescer and goes back to reading input. Once per UI tick everything that
+arrived in between is drained as one message per glove session, so ingestion
+throughput is bounded by inference rather than by the display rate.
+core.broadcaster drains it once per tick for all subscribers and sends the result
+through each subscriber's writer task.
+"""
+from typing import Any, Dict, List, Sequence
+
+UI_TICK = 0.05               # seconds between coalesced updates (~20 Hz UI)
+MAX_FRAMES_PER_MESSAGE = 50  # newest frames kept per session per tick
+
+
+class SessionCoalescer:
+    """
+    Pending prediction updates keyed by glove session: the latest prediction and the
+    frames since the last drain (the newest max_frames of them).
+    """
+
+    def __init__(self, max_frames: int = MAX_FRAMES_PER_MESSAGE):
+        self.max_frames = max_frames
+        self._pending: Dict[str, Dict[str, Any]] = {}
+        self.updates_coalesced = 0
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def offer(self, session_id: str, prediction: str, frames: Sequence):
+        entry = self._pending.get(session_id)
+        if entry is None:
+            entry = self._pending[session_id] = {"prediction": prediction, "frames": []}
+        else:
+            self.updates_coalesced += 1
+        entry["prediction"] = prediction
+        entry["frames"].extend(frames)
+        if len(entry["frames"]) > self.max_frames:
+            del entry["frames"][:-self.max_frames]
+
+    @staticmethod
+    def _format(session_id: str, entry: Dict[str, Any]) -> dict:
+        frames = entry["frames"]
+        return {
+            "prediction": entry["prediction"],
+            "values": frames[-1] if frames else [],  # latest frame, as before
+            "frames": frames,                        # every frame since the last tick
+            "session_id": session_id,
+        }
+
+    def drain(self) -> List[dict]:
+        """One message per session with pending updates; clears them."""
+        pending, self._pending = self._pending, {}
+        return [self._format(session_id, entry) for session_id, entry in pending.items()]
+
@@ -0,0 +1,371 @@
+"""
+Inference runtimes for the gesture model.
+
+- KerasRuntime: wraps a loaded Keras model (the CNN-BiGRU from AI/model.py) in
+  tf.function-compiled forward passes with a fixed input signature and
+  training=False, so each call skips the tf.data pipeline and callback setup
+  that model.predict builds on every invocation.
+- TFLiteRuntime: scores windows with a TFLite artifact exported by AI/export_model.py,
+  using the standalone LiteRT interpreter when installed (no TensorFlow import).
+- EnsembleRuntime: averages the class probabilities of the k-fold models, either in
+  one fused tf.function (all Keras) or by running the members concurrently, and falls
+  back to the best fold when a batch would exceed the latency budget.
+- score_windows: brings windows of any length to the trained TIMESTEPS the same way
+  for every runtime, so Keras and TFLite agree on short and long gestures.
+- load_runtime: picks the runtime for a model path ("auto" prefers TFLite when an
+  exported artifact sits next to the .h5); load_ensemble does the same for every fold.
+
+TensorFlow is imported lazily so a TFLite-only worker never pays for it.
+"""
+import glob
+import json
+import logging
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Sequence
+
+import numpy as np
+
+logger = logging.getLogger("signglove")
+
+
+def tflite_path_for(model_path: str, quantized: bool = False) -> str:
+    """gesture_model_fold1.h5 -> gesture_model_fold1.tflite (or .int8.tflite)."""
+    stem, _ = os.path.splitext(model_path)
+    return f"{stem}.int8.tflite" if quantized else f"{stem}.tflite"
+
+
+def score_windows(forward, batch: np.ndarray, timesteps: Optional[int]) -> np.ndarray:
+    """
+    Score a (batch, frames, features) array with forward(), which takes windows of
+    exactly `timesteps` frames (any length when timesteps is None).
+
+    Shorter windows are edge-padded at the end, as training augmentation pads them.
+    Longer ones are covered by TIMESTEPS-frame windows at a stride of TIMESTEPS // 2
+    (the last aligned to the final frame), scored in the same forward pass, and their
+    class probabilities averaged, so the whole gesture counts, not just its tail.
+    """
+    frames = batch.shape[1]
+    if timesteps is None or frames == timesteps:
+        return forward(batch)
+    if frames < timesteps:
+        return forward(np.pad(batch, ((0, 0), (0, timesteps - frames), (0, 0)), mode="edge"))
+    starts = list(range(0, frames - timesteps + 1, max(1, timesteps // 2)))
+    if starts[-1] != frames - timesteps:
+        starts.append(frames - timesteps)
+    windows = np.lib.stride_tricks.sliding_window_view(batch, timesteps, axis=1)[:, starts]
+    windows = np.ascontiguousarray(windows.transpose(0, 1, 3, 2)).reshape(-1, timesteps, batch.shape[2])
+    return forward(windows).reshape(len(batch), len(starts), -1).mean(axis=1)
+
+
+def _load_interpreter_class():
+    """Prefer the lightweight LiteRT / tflite_runtime interpreters over tf.lite."""
+    try:
+        from ai_edge_litert.interpreter import Interpreter
+        return Interpreter
+    except ImportError:
+        pass
+    try:
+        from tflite_runtime.interpreter import Interpreter
+        return Interpreter
+    except ImportError:
+        pass
+    import tensorflow as tf
+    return tf.lite.Interpreter
+
+
+class KerasRuntime:
+    """
+    Direct-call runtime for a Keras model. Call with a (batch, frames, features) array;
+    windows are fitted to the trained length by score_windows.
+    """
+
+    name = "keras-compiled"
+
+    def __init__(self, keras_model):
+        import tensorflow as tf
+
+        self.model = keras_model
+        _, self.timesteps, self.num_features = keras_model.input_shape
+        self.num_classes = int(keras_model.output_shape[-1])
+
+        # One trace for the window length the model was trained on (batch size left
+        # open, so every batch size reuses it).
+        self._fixed = tf.function(
+            self._call,
+            input_signature=[tf.TensorSpec([None, self.timesteps, self.num_features], tf.float32)],
+        )
+
+    def _call(self, x):
+        return self.model(x, training=False)
+
+    def _forward(self, windows: np.ndarray) -> np.ndarray:
+        return self._fixed(windows).numpy()
+
+    def __call__(self, batch: np.ndarray) -> np.ndarray:
+        return score_windows(self._forward, np.asarray(batch, dtype=np.float32), self.timesteps)
+
+    def warmup(self, batch_sizes: Sequence[int] = (1,)) -> float:
+        """Trace and run the compiled path once per batch size. Returns elapsed ms."""
+        start = time.perf_counter()
+        timesteps = self.timesteps or 50
+        for n in batch_sizes:
+            self(np.zeros((n, timesteps, self.num_features), dtype=np.float32))
+        elapsed_ms = (time.perf_counter() - start) * 1000.0
+        logger.info(f"{self.name} runtime warmed up in {elapsed_ms:.1f} ms")
+        return elapsed_ms
+
+
+class TFLiteRuntime:
+    """
+    Runtime for an exported TFLite gesture model (fixed (1, TIMESTEPS, 11) input).
+
+    Windows whose length differs from TIMESTEPS are fitted by score_windows, exactly
+    as KerasRuntime fits them.
+    """
+
+    name = "tflite"
+
+    def __init__(self, model_path: str, num_threads: Optional[int] = None):
+        Interpreter = _load_interpreter_class()
+        self.model_path = model_path
+        self.interpreter = Interpreter(model_path=model_path, num_threads=num_threads)
+        self.interpreter.allocate_tensors()
+        input_details = self.interpreter.get_input_details()[0]
+        output_details = self.interpreter.get_output_details()[0]
+        self._input_index = input_details["index"]
+        self._output_index = output_details["index"]
+        _, self.timesteps, self.num_features = (int(d) for d in input_details["shape"])
+        self.num_classes = int(output_details["shape"][-1])
+        self._lock = threading.Lock()  # interpreters are not thread-safe
+
+    def _forward(self, windows: np.ndarray) -> np.ndarray:
+        outputs = np.empty((windows.shape[0], self.num_classes), dtype=np.float32)
+        with self._lock:
+            for i, window in enumerate(windows):
+                self.interpreter.set_tensor(self._input_index, window[np.newaxis])
+                self.interpreter.invoke()
+                outputs[i] = self.interpreter.get_tensor(self._output_index)[0]
+        return outputs
+
+    def __call__(self, batch: np.ndarray) -> np.ndarray:
+        return score_windows(self._forward, np.asarray(batch, dtype=np.float32), self.timesteps)
+
+    def warmup(self, batch_sizes: Sequence[int] = (1,)) -> float:
+        start = time.perf_counter()
+        for n in batch_sizes:
+            self(np.zeros((n, self.timesteps, self.num_features), dtype=np.float32))
+        elapsed_ms = (time.perf_counter() - start) * 1000.0
+        logger.info(f"{self.name} runtime warmed up in {elapsed_ms:.1f} ms")
+        return elapsed_ms
+
+
+class EnsembleRuntime:
+    """
+    Fold ensemble: mean of the members' class probabilities for each window.
+
+    When every member is a KerasRuntime the members are fused into one tf.function,
+    so a batch costs a single graph call; otherwise (TFLite) members run concurrently
+    on a small pool. With budget_ms set, a batch whose estimated ensemble cost
+    (per-window latency x batch size) exceeds the budget is scored by the best fold only.
+    Every reprobe_every fallback batches the ensemble is re-timed on one window, so a
+    latency spike (cold cache, a busy host) does not pin the runtime to the best fold.
+    """
+
+    name = "ensemble"
+
+    def __init__(self, members: List, best_index: int = 0, budget_ms: float = 0.0,
+                 fold_numbers: Optional[List[int]] = None, reprobe_every: int = 64):
+        if not members:
+            raise ValueError("EnsembleRuntime needs at least one member")
+        self.members = members
+        self.best_index = best_index
+        self.best = members[best_index]
+        self.budget_ms = budget_ms
+        self.reprobe_every = reprobe_every
+        self.fold_numbers = fold_numbers or list(range(1, len(members) + 1))
+        self.timesteps = getattr(self.best, "timesteps", None)
+        self.num_features = self.best.num_features
+        self.num_classes = self.best.num_classes
+        self.model = None
+        self._ensemble_ms = None   # EWMA latency per window
+        self._single_ms = None
+        self.ensemble_batches = 0
+        self.fallback_batches = 0
+        self.probes = 0
+        self._since_probe = 0
+
+        self._executor = None
+        if all(isinstance(m, KerasRuntime) for m in members):
+            import tensorflow as tf
+
+            models = [m.model for m in members]
+
+            def fused(x):
+                return tf.add_n([m(x, training=False) for m in models]) / len(models)
+
+            self._fused = tf.function(
+                fused, input_signature=[tf.TensorSpec([None, self.timesteps, self.num_features], tf.float32)]
+            )
+            self.mode = "fused"
+        else:
+            self._fused = None
+            self._executor = ThreadPoolExecutor(max_workers=len(members), thread_name_prefix="ensemble")
+            self.mode = "concurrent"
+
+    def _run_ensemble(self, batch: np.ndarray) -> np.ndarray:
+        if self._fused is not None:
+            return self._fused(batch).numpy()
+        outputs = list(self._executor.map(lambda m: m(batch), self.members))
+        return np.mean(outputs, axis=0)
+
+    def _probe(self, window: np.ndarray) -> None:
+        """Re-time the ensemble on one window; the result replaces the estimate outright."""
+        start = time.perf_counter()
+        score_windows(self._run_ensemble, window, self.timesteps)
+        self._ensemble_ms = (time.perf_counter() - start) * 1000.0
+        self.probes += 1
+        self._since_probe = 0
+
+    @staticmethod
+    def _ewma(current: Optional[float], sample: float, alpha: float = 0.2) -> float:
+        return sample if current is None else (1 - alpha) * current + alpha * sample
+
+    def __call__(self, batch: np.ndarray) -> np.ndarray:
+        batch = np.asarray(batch, dtype=np.float32)
+        n = max(1, batch.shape[0])
+        use_ensemble = (
+            not self.budget_ms
+            or self._ensemble_ms is None
+            or self._ensemble_ms * n <= self.budget_ms
+        )
+        start = time.perf_counter()
+        if use_ensemble:
+            out = score_windows(self._run_ensemble, batch, self.timesteps)
+            self._ensemble_ms = self._ewma(self._ensemble_ms, (time.perf_counter() - start) * 1000.0 / n)
+            self.ensemble_batches += 1
+            self._since_probe = 0
+        else:
+            out = self.best(batch)
+            self._single_ms = self._ewma(self._single_ms, (time.perf_counter() - start) * 1000.0 / n)
+            self.fallback_batches += 1
+            self._since_probe += 1
+            if self.reprobe_every and self._since_probe >= self.reprobe_every:
+                self._probe(batch[:1])
+        return out
+
+    def warmup(self, batch_sizes: Sequence[int] = (1,)) -> float:
+        """Warm both paths and seed the per-window latency estimates. Returns elapsed ms."""
+        start = time.perf_counter()
+        timesteps = self.timesteps or 50
+        for n in batch_sizes:
+            x = np.zeros((n, timesteps, self.num_features), dtype=np.float32)
+            self.best(x)
+            self._run_ensemble(x)
+        x = np.zeros((1, timesteps, self.num_features), dtype=np.float32)
+        t0 = time.perf_counter()
+        self._run_ensemble(x)
+        self._ensemble_ms = (time.perf_counter() - t0) * 1000.0
+        t0 = time.perf_counter()
+        self.best(x)
+        self._single_ms = (time.perf_counter() - t0) * 1000.0
+        elapsed_ms = (time.perf_counter() - start) * 1000.0
+        logger.info(f"{self.name} runtime ({len(self.members)} folds, {self.mode}) warmed up in {elapsed_ms:.1f} ms")
+        return elapsed_ms
+
+    def get_stats(self) -> dict:
+        return {
+            "folds": self.fold_numbers,
+            "mode": self.mode,
+            "member_runtime": self.best.name,
+            "best_fold": self.fold_numbers[self.best_index],
+            "budget_ms": self.budget_ms,
+            "ensemble_ms_per_window": round(self._ensemble_ms, 3) if self._ensemble_ms is not None else None,
+            "single_ms_per_window": round(self._single_ms, 3) if self._single_ms is not None else None,
+            "ensemble_batches": self.ensemble_batches,
+            "fallback_batches": self.fallback_batches,
+            "reprobe_every": self.reprobe_every,
+            "probes": self.probes,
+        }
+
+
+def load_runtime(model_path: str, prefer: str = "auto", quantized: bool = False):
+    """
+    Load the inference runtime for model_path.
+
+    prefer: "auto" (TFLite if an exported artifact exists, else Keras), "tflite" or "keras".
+    A TFLite artifact older than its .h5 is a leftover from an earlier run and is ignored.
+    Returns None when no usable artifact is found.
+    """
+    prefer = (prefer or "auto").lower()
+    if prefer in ("auto", "tflite"):
+        tflite_path = tflite_path_for(model_path, quantized)
+        if os.path.exists(tflite_path) and os.path.exists(model_path) \
+                and os.path.getmtime(tflite_path) < os.path.getmtime(model_path):
+            logger.warning(f"Ignoring stale TFLite model {tflite_path}: older than {model_path}")
+        elif os.path.exists(tflite_path):
+            try:
+                runtime = TFLiteRuntime(tflite_path)
+                logger.info(f"Loaded TFLite model from {tflite_path}")
+                return runtime
+            except Exception as e:
+                logger.error(f"Failed to load TFLite model {tflite_path}: {e}")
+        elif prefer == "tflite":
+            logger.warning(f"TFLite model not found at {tflite_path}; falling back to Keras.")
+
+    if not os.path.exists(model_path):
+        logger.warning(f"[Warning] Model file not found at {model_path}. Model will not be loaded.")
+        return None
+    from tensorflow.keras.models import load_model
+    runtime = KerasRuntime(load_model(model_path))
+    logger.info(f"Loaded Keras H5 model from {model_path}")
+    return runtime
+
+
+def _fold_number(path: str) -> int:
+    match = re.search(r"fold(\d+)", os.path.basename(path))
+    return int(match.group(1)) if match else 0
+
+
+def best_fold_from_metrics(metrics_path: str) -> Optional[int]:
+    """Fold number (1-based) with the highest validation accuracy in training_metrics.json."""
+    try:
+        with open(metrics_path) as f:
+            accuracies = json.load(f).get("fold_accuracies") or []
+    except (OSError, ValueError):
+        return None
+    if not accuracies:
+        return None
+    return int(np.argmax(accuracies)) + 1
+
+
+def load_ensemble(model_path_template: str, metrics_path: Optional[str] = None, prefer: str = "auto",
+                  quantized: bool = False, budget_ms: float = 0.0, num_classes: Optional[int] = None,
+                  reprobe_every: int = 64):
+    """
+    Load every fold model matching model_path_template (e.g. .../gesture_model_fold{}.h5)
+    into an EnsembleRuntime. Folds whose output size differs from num_classes (e.g. left
+    over from a run with another label set) are skipped. Returns None when no fold loads.
+    """
+    paths = sorted(glob.glob(model_path_template.format("*")), key=_fold_number)
+    members, folds = [], []
+    for path in paths:
+        member = load_runtime(path, prefer=prefer, quantized=quantized)
+        if member is None:
+            continue
+        if num_classes is not None and member.num_classes != num_classes:
+            logger.warning(f"Skipping {os.path.basename(path)} in ensemble: {member.num_classes} classes, expected {num_classes}")
+            continue
+        members.append(member)
+        folds.append(_fold_number(path))
+    if not members:
+        return None
+
+    best_fold = best_fold_from_metrics(metrics_path) if metrics_path else None
+    best_index = folds.index(best_fold) if best_fold in folds else 0
+    logger.info(f"Loaded {len(members)}-fold ensemble (best fold {folds[best_index]})")
+    return EnsembleRuntime(members, best_index=best_index, budget_ms=budget_ms, fold_numbers=folds,
+                           reprobe_every=reprobe_every)
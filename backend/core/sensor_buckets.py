@@ -0,0 +1,271 @@
+"""
+Bucketed storage for per-frame sensor recordings.
+
+Collection scripts used to insert one sensor_data document per 11-value frame,
+repeating session_id/label/timestamp on every row. Frames now go to the
+sensor_buckets collection, one document per session x run of up to
+SENSOR_BUCKET_SIZE consecutive frames:
+
+    {"session_id": "noun1", "label": "Students", "source": "collector",
+     "field": "values",                # legacy row key the frames were stored under
+     "start": datetime, "end": datetime, "count": 200, "width": 11,
+     "dtype": "<i4",                   # "<i4" when every value is integral, else "<f4"
+     "frames": <count * width packed values>,
+     "offsets": <count int32 milliseconds since start>}
+
+Reads go through the compatibility layer below, which expands buckets back into
+the legacy row shape ({"session_id", "label", "values", "timestamp", ...}), so
+routes and exports written against per-frame documents keep working. Legacy
+per-frame documents still in sensor_data are read as well, before the buckets
+(they predate them); scripts/migrate_sensor_buckets.py moves them over.
+"""
+from datetime import datetime, timedelta, timezone
+from itertools import groupby
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from bson import Binary
+
+from core.database import sensor_bucket_collection, sensor_collection
+from core.settings import settings
+
+BUCKET_SIZE = settings.SENSOR_BUCKET_SIZE
+VALUE_FIELDS = ("values", "combined_values")  # legacy per-frame row keys holding the frame
+META_FIELDS = ("session_id", "label", "source")
+_DUAL_WIDTH = 22
+CURSOR_BATCH_SIZE = 1000  # legacy documents fetched per round trip by iter_rows
+
+
+def _naive_utc(ts: Optional[datetime]) -> Optional[datetime]:
+    """Stored timestamps come back from MongoDB as naive UTC; compare like with like."""
+    if ts is None or ts.tzinfo is None:
+        return ts
+    return ts.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def _dtype_for(frames: np.ndarray) -> str:
+    if frames.size and np.all(np.isfinite(frames)) and np.all(frames == np.round(frames)) \
+            and np.abs(frames).max() < 2 ** 31:
+        return "<i4"
+    return "<f4"
+
+
+def pack_bucket(session_id: str, label: Optional[str], frames, timestamps: List[datetime],
+                source: Optional[str] = None, field: str = "values") -> Dict[str, Any]:
+    """Build one bucket document from (n, width) frames and their n timestamps."""
+    frames = np.asarray(frames, dtype=np.float64)
+    if frames.ndim != 2 or len(frames) != len(timestamps) or not len(frames):
+        raise ValueError(f"Expected (n, width) frames with n timestamps, got {frames.shape} and {len(timestamps)}")
+    dtype = _dtype_for(frames)
+    start = timestamps[0]
+    offsets = np.fromiter(((t - start) / timedelta(milliseconds=1) for t in timestamps),
+                          dtype=np.float64, count=len(timestamps))
+    return {
+        "session_id": session_id,
+        "label": label,
+        "source": source,
+        "field": field,
+        "start": start,
+        "end": timestamps[-1],
+        "count": len(frames),
+        "width": frames.shape[1],
+        "dtype": dtype,
+        "frames": Binary(frames.astype(dtype).tobytes()),
+        "offsets": Binary(np.round(offsets).astype("<i4").tobytes()),
+    }
+
+
+def unpack_frames(bucket: Dict[str, Any]) -> np.ndarray:
+    """(count, width) array of a bucket's frames (int32 or float32, no copy)."""
+    return np.frombuffer(bucket["frames"], dtype=bucket["dtype"]).reshape(bucket["count"], bucket["width"])
+
+
+def unpack_timestamps(bucket: Dict[str, Any]) -> List[datetime]:
+    start = bucket["start"]
+    offsets = np.frombuffer(bucket["offsets"], dtype="<i4").tolist()
+    return [start + timedelta(milliseconds=ms) for ms in offsets]
+
+
+def expand_bucket(bucket: Dict[str, Any]) -> Iterable[Dict[str, Any]]:
+    """Legacy per-frame rows of one bucket, oldest first."""
+    field = bucket.get("field") or "values"
+    meta = {key: bucket.get(key) for key in META_FIELDS if bucket.get(key) is not None}
+    for values, ts in zip(unpack_frames(bucket).tolist(), unpack_timestamps(bucket)):
+        row = {**meta, field: values, "timestamp": ts}
+        if field == "combined_values" and len(values) == _DUAL_WIDTH:
+            row["left_hand"], row["right_hand"] = values[:11], values[11:]
+        yield row
+
+
+def _frame_of(row: Dict[str, Any]) -> Tuple[Optional[str], Optional[list]]:
+    for field in VALUE_FIELDS:
+        values = row.get(field)
+        if isinstance(values, list) and values:
+            return field, values
+    return None, None
+
+
+def make_buckets(rows: Iterable[Dict[str, Any]], bucket_size: int = BUCKET_SIZE) -> List[Dict[str, Any]]:
+    """
+    Pack legacy-shaped per-frame rows into bucket documents. Consecutive rows of the
+    same session / label / source / width share buckets; rows without a frame are skipped.
+    """
+    now = datetime.utcnow()
+    buckets = []
+
+    def key(row):
+        field, values = _frame_of(row)
+        return tuple(row.get(k) for k in META_FIELDS) + (field, len(values) if values else 0)
+
+    for (session_id, label, source, field, width), group in groupby(rows, key=key):
+        if field is None:
+            continue
+        group = list(group)
+        for i in range(0, len(group), bucket_size):
+            chunk = group[i:i + bucket_size]
+            frames = [row[field] for row in chunk]
+            timestamps = [row.get("timestamp") or now for row in chunk]
+            buckets.append(pack_bucket(session_id, label, frames, timestamps, source=source, field=field))
+    return buckets
+
+
+# ---------------- WRITES ----------------
+async def insert_rows(rows: Iterable[Dict[str, Any]], collection=None) -> List[Any]:
+    """Store per-frame rows as buckets; returns the inserted bucket ids."""
+    buckets = make_buckets(rows)
+    if not buckets:
+        return []
+    result = await (collection or sensor_bucket_collection).insert_many(buckets, ordered=False)
+    return result.inserted_ids
+
+
+class BucketWriter:
+    """
+    Buffers one recording's frames and hands a bucket to `sink` every bucket_size
+    frames. Synchronous, for the serial collection scripts; sink is typically
+    BulkWriter.submit, otherwise insert_one on `collection` (default: the pymongo
+    collection underneath the Motor one).
+    """
+
+    def __init__(self, session_id: str, label: str, source: Optional[str] = None, field: str = "values",
+                 bucket_size: int = BUCKET_SIZE, collection=None, sink: Optional[Callable[[dict], Any]] = None):
+        self.session_id = session_id
+        self.label = label
+        self.source = source
+        self.field = field
+        self.bucket_size = bucket_size
+        if sink is None:
+            sink = (collection if collection is not None else sensor_bucket_collection.delegate).insert_one
+        self.sink = sink
+        self.frames: List[list] = []
+        self.timestamps: List[datetime] = []
+        self.buckets_written = 0
+
+    def append(self, values, timestamp: Optional[datetime] = None):
+        self.frames.append(list(values))
+        self.timestamps.append(timestamp or datetime.utcnow())
+        if len(self.frames) >= self.bucket_size:
+            self.flush()
+
+    def flush(self):
+        if not self.frames:
+            return
+        bucket = pack_bucket(self.session_id, self.label, self.frames, self.timestamps,
+                             source=self.source, field=self.field)
+        self.frames, self.timestamps = [], []
+        self.sink(bucket)
+        self.buckets_written += 1
+
+    close = flush
+
+
+# ---------------- COMPATIBILITY READS ----------------
+async def iter_rows(query: Optional[Dict[str, Any]] = None, legacy: bool = True,
+                    start: Optional[datetime] = None, end: Optional[datetime] = None,
+                    projection: Optional[Dict[str, Any]] = None,
+                    batch_size: int = CURSOR_BATCH_SIZE) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Every stored frame as a legacy per-frame row: legacy sensor_data documents
+    (timestamp order) first, then buckets (start order). `query` may filter on
+    session_id / label / source, which both layouts share; start / end (exclusive)
+    bound the frame timestamps. `projection` applies to legacy documents (buckets
+    always carry their frames). Cursors are read batch_size documents at a time,
+    so memory stays flat however many frames match.
+    """
+    query = query or {}
+    start, end = _naive_utc(start), _naive_utc(end)
+    window = {}
+    if start is not None:
+        window["$gte"] = start
+    if end is not None:
+        window["$lt"] = end
+    if legacy:
+        legacy_query = {**query, "timestamp": window} if window else query
+        cursor = sensor_collection.find(legacy_query, projection).sort("timestamp", 1).batch_size(batch_size)
+        async for doc in cursor:
+            yield doc
+    bucket_query = dict(query)
+    if start is not None:
+        bucket_query["end"] = {"$gte": start}
+    if end is not None:
+        bucket_query["start"] = {"$lt": end}
+    # Frames are what matter here; buckets are ~SENSOR_BUCKET_SIZE rows each, so fetch fewer at a time
+    cursor = sensor_bucket_collection.find(bucket_query).sort("start", 1).batch_size(max(1, batch_size // 100))
+    async for bucket in cursor:
+        for row in expand_bucket(bucket):
+            ts = row["timestamp"]
+            if (start is not None and ts < start) or (end is not None and ts >= end):
+                continue  # buckets straddling the window edges
+            yield row
+
+
+async def read_session(session_id: str) -> Optional[Dict[str, Any]]:
+    """One session's bucketed frames in a single query, or None if it has none."""
+    buckets = await sensor_bucket_collection.find({"session_id": session_id}).sort("start", 1).to_list(None)
+    if not buckets:
+        return None
+    first = buckets[0]
+    return {
+        "session_id": session_id,
+        "label": first.get("label"),
+        "source": first.get("source"),
+        "start": first["start"],
+        "end": buckets[-1]["end"],
+        "count": sum(b["count"] for b in buckets),
+        first.get("field") or "values": np.concatenate([unpack_frames(b) for b in buckets]).tolist(),
+        "timestamps": [ts for b in buckets for ts in unpack_timestamps(b)],
+    }
+
+
+async def list_sessions() -> List[Dict[str, Any]]:
+    """One entry per bucketed session: session_id, label, frame count."""
+    pipeline = [
+        {"$group": {"_id": "$session_id", "label": {"$first": "$label"}, "count": {"$sum": "$count"},
+                    "start": {"$min": "$start"}}},
+        {"$sort": {"start": 1}},
+    ]
+    cursor = sensor_bucket_collection.aggregate(pipeline)
+    return [{"session_id": d["_id"], "label": d["label"], "count": d["count"]} async for d in cursor]
+
+
+async def count_sessions() -> int:
+    return len(await sensor_bucket_collection.distinct("session_id"))
+
+
+async def latest_timestamp() -> Optional[datetime]:
+    bucket = await sensor_bucket_collection.find_one({}, {"end": 1}, sort=[("end", -1)])
+    return bucket["end"] if bucket else None
+
+
+async def relabel_session(session_id: str, label: str) -> int:
+    result = await sensor_bucket_collection.update_many({"session_id": session_id}, {"$set": {"label": label}})
+    return result.matched_count
+
+
+async def delete_rows(query: Optional[Dict[str, Any]] = None) -> int:
+    """Delete bucketed frames matching `query` (all of them by default); returns frames deleted."""
+    query = query or {}
+    pipeline = [{"$match": query}, {"$group": {"_id": None, "frames": {"$sum": "$count"}}}]
+    counted = await sensor_bucket_collection.aggregate(pipeline).to_list(1)
+    await sensor_bucket_collection.delete_many(query)
+    return counted[0]["frames"] if counted else 0
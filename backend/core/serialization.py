@@ -0,0 +1,85 @@
+"""
+Fast JSON encoding shared by REST responses and WebSocket sends.
+
+orjson serializes dicts, lists, datetimes and NumPy arrays/scalars natively and
+returns bytes, so API payloads no longer go through jsonable_encoder's recursive
+copy plus stdlib json.dumps. Types orjson does not know (ObjectId, Decimal, sets,
+pydantic models) are handled by _default. If orjson is not installed the same
+API falls back to the stdlib json module.
+"""
+import datetime
+import decimal
+import json
+from typing import Any
+
+import numpy as np
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    orjson = None
+    HAS_ORJSON = False
+
+try:
+    from bson import ObjectId
+except ImportError:
+    ObjectId = None
+
+
+def _default(obj: Any) -> Any:
+    """Encode the types the fast path does not handle natively."""
+    if ObjectId is not None and isinstance(obj, ObjectId):
+        return str(obj)
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()  # non-contiguous or unsupported dtypes (orjson only takes C-contiguous)
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if isinstance(obj, datetime.datetime) and obj.utcoffset() == datetime.timedelta(0):
+        return obj.isoformat().replace("+00:00", "Z")  # same as pydantic / OPT_UTC_Z
+    if isinstance(obj, (datetime.datetime, datetime.date, datetime.time)):
+        return obj.isoformat()
+    if isinstance(obj, decimal.Decimal):
+        return float(obj)
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    if hasattr(obj, "model_dump"):
+        return obj.model_dump()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+if HAS_ORJSON:
+    _OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS | orjson.OPT_UTC_Z
+
+    def dumps(obj: Any) -> bytes:
+        """Serialize to compact UTF-8 JSON bytes."""
+        return orjson.dumps(obj, default=_default, option=_OPTIONS)
+
+    loads = orjson.loads
+else:
+    def dumps(obj: Any) -> bytes:
+        """Serialize to compact UTF-8 JSON bytes."""
+        return json.dumps(obj, default=_default, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+    loads = json.loads
+
+
+def dumps_str(obj: Any) -> str:
+    """Serialize to a str, for WebSocket text frames."""
+    return dumps(obj).decode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSONResponse rendered with dumps(). Set as the app's default_response_class;
+    routes on hot paths return it directly so FastAPI skips jsonable_encoder too.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+async def send_json(websocket, data: Any):
+    """Drop-in for WebSocket.send_json (text frame) using the fast encoder."""
+    await websocket.send_text(dumps_str(data))
@@ -48,6 +48,8 @@ class Settings(BaseSettings):
     RAW_DATA_PATH: ClassVar[str] = os.path.join(DATA_DIR, 'raw_data.csv')
     CLEAN_DATA_PATH: ClassVar[str] = os.path.join(DATA_DIR, 'clean_data.csv')
     GESTURE_DATA_PATH: ClassVar[str] = os.path.join(DATA_DIR, 'models', 'gesture_data.csv')
+    TRAINING_STORE_DIR: ClassVar[str] = os.path.join(DATA_DIR, 'training_store')  # incremental columnar export (core.training_store)
+    TRAINING_DATASET_DIR: ClassVar[str] = os.path.join(DATA_DIR, 'training_dataset')  # .npy shards AI/model.py trains on (core.training_dataset)
 
     # Model / Results
     MODEL_DIR: ClassVar[str] = os.path.join(AI_DIR, 'models')
@@ -104,12 +106,39 @@ class Settings(BaseSettings):
         'apply_outlier': True,
         'apply_median': False
     }
+    SENSOR_BUCKET_SIZE: int = Field(200, env="SENSOR_BUCKET_SIZE")  # frames per sensor_buckets document
+    INGEST_BATCH_SIZE: int = Field(500, env="INGEST_BATCH_SIZE")  # documents per insert_many
+    INGEST_FLUSH_INTERVAL_MS: float = Field(100.0, env="INGEST_FLUSH_INTERVAL_MS")  # max wait before a partial batch is written
+    INGEST_MAX_PENDING: int = Field(10000, env="INGEST_MAX_PENDING")  # buffered documents before producers wait
+    INGEST_RETRIES: int = Field(5, env="INGEST_RETRIES")  # attempts after a transient MongoDB failure
+    TRAINING_SEGMENT_ROWS: int = Field(262144, env="TRAINING_SEGMENT_ROWS")  # frames per training store segment file
+    TRAINING_EXPORT_SETTLE_S: float = Field(30.0, env="TRAINING_EXPORT_SETTLE_S")  # newer frames are re-read on every sync
+    TRAINING_EXPORT_LAG_S: float = Field(600.0, env="TRAINING_EXPORT_LAG_S")  # writer clock lag tolerated below the high-water mark
     
     # Performance and monitoring
     LOG_LEVEL: str = Field("INFO", env="LOG_LEVEL")
     LOG_FILE: str = Field("logs/app.log", env="LOG_FILE")
     MAX_REQUEST_SIZE: int = Field(10 * 1024 * 1024, env="MAX_REQUEST_SIZE")  # 10MB
     RATE_LIMIT_REQUESTS_PER_MINUTE: int = Field(60, env="RATE_LIMIT_REQUESTS_PER_MINUTE")
+
+    # Inference micro-batching / execution pool
+    INFERENCE_BATCH_WINDOW_MS: float = Field(3.0, env="INFERENCE_BATCH_WINDOW_MS")
+    INFERENCE_MAX_BATCH_SIZE: int = Field(32, env="INFERENCE_MAX_BATCH_SIZE")
+    INFERENCE_WORKERS: int = Field(1, env="INFERENCE_WORKERS")
+    INFERENCE_MAX_QUEUE: int = Field(256, env="INFERENCE_MAX_QUEUE")  # pending requests before "busy"
+    INFERENCE_RUNTIME: str = Field("auto", env="INFERENCE_RUNTIME")  # auto | tflite | keras
+    INFERENCE_TFLITE_INT8: bool = Field(False, env="INFERENCE_TFLITE_INT8")  # use the .int8.tflite artifact
+    INFERENCE_ENSEMBLE: bool = Field(False, env="INFERENCE_ENSEMBLE")  # average all k-fold models
+    INFERENCE_ENSEMBLE_BUDGET_MS: float = Field(0.0, env="INFERENCE_ENSEMBLE_BUDGET_MS")  # 0 = never fall back
+    INFERENCE_ENSEMBLE_REPROBE: int = Field(64, env="INFERENCE_ENSEMBLE_REPROBE")  # fallback batches between ensemble re-timings; 0 = never
+    MODEL_RELOAD_POLL_S: float = Field(5.0, env="MODEL_RELOAD_POLL_S")  # artifact watcher interval, 0 = off
+    INFERENCE_STRIDE: int = Field(1, env="INFERENCE_STRIDE")  # new frames per stream between predictions
+    INFERENCE_MOTION_GATE: bool = Field(False, env="INFERENCE_MOTION_GATE")  # only predict while the glove moves
+    INFERENCE_MOTION_THRESHOLD: float = Field(0.05, env="INFERENCE_MOTION_THRESHOLD")  # MovementDetector variance
+    STREAM_SEND_CREDITS: int = Field(8, env="STREAM_SEND_CREDITS")  # unacknowledged windows a collector may have in flight
+    STREAM_SEGMENT_THRESHOLD: float = Field(0.01, env="STREAM_SEGMENT_THRESHOLD")  # raw-stream mode: collector's movement variance
+    STREAM_SEGMENT_MIN_FRAMES: int = Field(10, env="STREAM_SEGMENT_MIN_FRAMES")  # shorter movements are ignored
+    STREAM_SEGMENT_MAX_FRAMES: int = Field(200, env="STREAM_SEGMENT_MAX_FRAMES")  # longest movement kept per session
     
     # API configuration
     API_V1_STR: str = "/api/v1"
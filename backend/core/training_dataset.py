@@ -0,0 +1,145 @@
+"""
+Columnar training dataset: what AI/model.py trains on.
+
+A dataset directory holds an index.json and one build directory of
+memory-mappable .npy shards:
+
+    index.json              {"build": 3, "width", "rows", "labels", "sessions",
+                             "label_counts", "source"}
+    build-000003/values.npy     (rows, width) float32 frames, in recording order
+    build-000003/labels.npy     (rows,) int32 codes into index["labels"]
+    build-000003/sessions.npy   (rows,) int32 codes into index["sessions"]
+
+write_dataset() streams column chunks (TrainingStore segments, or the merged
+per-gesture CSVs) into a new build and then swaps index.json, so a reader
+never sees half of one build and half of another. load_dataset() maps the
+shards back without parsing anything. `source` records what the dataset was
+built from; callers compare it to skip rebuilding an unchanged dataset.
+"""
+import json
+import os
+import shutil
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional
+
+import numpy as np
+
+from core.settings import settings
+
+INDEX = "index.json"
+
+
+class Dataset(NamedTuple):
+    values: np.ndarray      # (rows, width) float32
+    labels: np.ndarray      # (rows,) int32 codes into index["labels"]
+    sessions: np.ndarray    # (rows,) int32 codes into index["sessions"]
+    index: Dict[str, Any]
+
+    def label_names(self) -> np.ndarray:
+        return np.asarray(self.index["labels"])[self.labels]
+
+
+def dataset_dir(width: int) -> str:
+    """Where the trigger export writes the dataset for `width`-value frames."""
+    return os.path.join(settings.TRAINING_DATASET_DIR, "dual_hand" if width == 22 else "single_hand")
+
+
+def _build_path(directory: str, build: int) -> str:
+    return os.path.join(directory, f"build-{build:06d}")
+
+
+def read_index(directory: str) -> Optional[Dict[str, Any]]:
+    path = os.path.join(directory, INDEX)
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _encode(column: np.ndarray, codes: Dict[str, int]) -> np.ndarray:
+    """int32 codes of a string column, growing `codes` with values not seen before."""
+    uniques, inverse = np.unique(column, return_inverse=True)
+    mapping = np.array([codes.setdefault(value, len(codes)) for value in uniques.tolist()], dtype=np.int32)
+    return mapping[inverse].astype(np.int32, copy=False)
+
+
+def write_dataset(directory: str, chunks: Iterable[Dict[str, np.ndarray]], rows: int, width: int,
+                  source: Any = None) -> Dict[str, Any]:
+    """
+    Build a dataset from chunks with the columns "values" (n, width), "label" and
+    "session_id" (n,), and optionally "position" (n,): the dataset row of each frame
+    (default: after the previous chunk). `rows` is their total length; the shards are
+    preallocated and filled one chunk at a time, so memory stays at one chunk.
+    Returns the index.
+    """
+    previous = read_index(directory)
+    build = (previous or {}).get("build", 0) + 1
+    build_path = _build_path(directory, build)
+    os.makedirs(build_path, exist_ok=True)
+    values = np.lib.format.open_memmap(os.path.join(build_path, "values.npy"), mode="w+",
+                                       dtype=np.float32, shape=(rows, width))
+    labels = np.lib.format.open_memmap(os.path.join(build_path, "labels.npy"), mode="w+",
+                                       dtype=np.int32, shape=(rows,))
+    sessions = np.lib.format.open_memmap(os.path.join(build_path, "sessions.npy"), mode="w+",
+                                         dtype=np.int32, shape=(rows,))
+    label_codes: Dict[str, int] = {}
+    session_codes: Dict[str, int] = {}
+    offset = 0
+    for chunk in chunks:
+        n = len(chunk["values"])
+        if offset + n > rows or (n and chunk["values"].shape[1] != width):
+            raise ValueError(f"Chunk of shape {chunk['values'].shape} does not fit a ({rows}, {width}) dataset")
+        rows_at = chunk.get("position")
+        if rows_at is None:
+            rows_at = slice(offset, offset + n)
+        values[rows_at] = chunk["values"]
+        labels[rows_at] = _encode(chunk["label"], label_codes)
+        sessions[rows_at] = _encode(chunk["session_id"], session_codes)
+        offset += n
+    if offset != rows:
+        raise ValueError(f"Expected {rows} rows, got {offset}")
+    for shard in (values, labels, sessions):
+        shard.flush()
+    del values, sessions
+
+    label_names = list(label_codes)
+    counts = np.bincount(labels, minlength=len(label_names)).tolist() if rows else [0] * len(label_names)
+    del labels
+    index = {
+        "build": build,
+        "width": width,
+        "rows": rows,
+        "labels": label_names,
+        "sessions": list(session_codes),
+        "label_counts": dict(zip(label_names, counts)),
+        "source": source,
+    }
+    path = os.path.join(directory, INDEX)
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(index, f)
+    os.replace(path + ".tmp", path)
+    if previous:
+        shutil.rmtree(_build_path(directory, previous["build"]), ignore_errors=True)
+    return index
+
+
+def remove_dataset(directory: str):
+    """Delete the current build and its index (index first, so no reader maps a half-deleted build)."""
+    index = read_index(directory)
+    if index is None:
+        return
+    os.remove(os.path.join(directory, INDEX))
+    shutil.rmtree(_build_path(directory, index["build"]), ignore_errors=True)
+
+
+def load_dataset(directory: str, mmap: bool = True) -> Dataset:
+    """Map (or, with mmap=False, read) the current build of a dataset."""
+    index = read_index(directory)
+    if index is None:
+        raise FileNotFoundError(f"No training dataset in {directory}")
+    build_path = _build_path(directory, index["build"])
+    mode = "r" if mmap else None
+    shards: List[np.ndarray] = [np.load(os.path.join(build_path, f"{name}.npy"), mmap_mode=mode)
+                                for name in ("values", "labels", "sessions")]
+    if any(len(shard) != index["rows"] for shard in shards):
+        raise ValueError(f"Training dataset in {directory} does not match its index")
+    return Dataset(*shards, index=index)
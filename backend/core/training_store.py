@@ -0,0 +1,523 @@
+"""
+Incremental export of stored sensor frames for training.
+
+POST /training/trigger used to re-read every stored frame and rewrite the
+training CSV from scratch. TrainingStore keeps a columnar copy of the frames
+under TRAINING_STORE_DIR instead and brings it up to date in sync():
+
+- New frames: sensor_data / sensor_buckets documents whose _id is above the
+  collection's high-water mark are read in _id order and appended as new
+  segment files. Ids are assigned when a document is buffered
+  (core.bulk_writer), not when it is committed, so the mark only advances to
+  ids older than TRAINING_EXPORT_SETTLE_S; newer frames go to a tail segment
+  that is re-read on every sync. Ids also come from the writer's clock, so a
+  writer running behind commits documents below the mark: each sync re-reads
+  the last TRAINING_EXPORT_LAG_S below it and skips the ids it already read
+  there (manifest "recent").
+- Changes: code that relabels or deletes stored frames calls record_change(),
+  which appends to the sensor_changes collection. sync() drops the sessions
+  named there from the store and re-reads them from MongoDB; a change without
+  a session_id (clearing every frame, migrating the layout) rebuilds the store.
+
+Segments are .npz files with the columns values (n, width) float64,
+session_id, label and timestamp (datetime64[ms]). manifest.json records the
+segments, the high-water marks and what each exported CSV already holds, so
+export_csv() only appends segments the CSV does not have yet. export_dataset()
+writes the .npy dataset (core.training_dataset) that AI/model.py trains on, with
+each session's frames together and in timestamp order whichever segments hold them.
+"""
+import asyncio
+import csv
+import json
+import logging
+import os
+import time
+from collections import deque
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional, Sequence
+
+import numpy as np
+from bson import ObjectId
+
+from core.database import sensor_bucket_collection, sensor_change_collection, sensor_collection
+from core.sensor_buckets import unpack_frames
+from core.training_dataset import dataset_dir, read_index, remove_dataset, write_dataset
+from core.settings import settings
+
+logger = logging.getLogger("signglove")
+
+WIDTHS = (11, 22)  # single- and dual-hand frames; anything else is not training data
+HAND_COLUMNS = ["flex1", "flex2", "flex3", "flex4", "flex5",
+                "accel_x", "accel_y", "accel_z", "gyro_x", "gyro_y", "gyro_z"]
+CSV_HEADERS = {
+    11: ["session_id", "label", *HAND_COLUMNS],
+    22: ["session_id", "label", *(f"left_{c}" for c in HAND_COLUMNS), *(f"right_{c}" for c in HAND_COLUMNS)],
+}
+SEGMENT_ROWS = settings.TRAINING_SEGMENT_ROWS
+SETTLE_S = settings.TRAINING_EXPORT_SETTLE_S
+LAG_S = settings.TRAINING_EXPORT_LAG_S
+CURSOR_BATCH_SIZE = 1000
+MANIFEST = "manifest.json"
+LEGACY_FILTER = {"$or": [{"values": {"$size": width}} for width in WIDTHS]}
+LEGACY_PROJECTION = {"session_id": 1, "label": 1, "values": 1, "timestamp": 1}
+BUCKET_FILTER = {"field": "values", "width": {"$in": list(WIDTHS)}}
+
+
+async def record_change(op: str, session_id: Optional[str] = None):
+    """
+    Log a relabel / delete of stored frames so the next TrainingStore.sync() re-reads
+    that session (session_id=None: every session). Failures are logged, not raised;
+    POST /training/trigger?full=true recovers from a lost entry.
+    """
+    try:
+        await sensor_change_collection.insert_one({"op": op, "session_id": session_id,
+                                                   "timestamp": datetime.utcnow()})
+    except Exception as e:
+        logger.error(f"Failed to record sensor data change {op} {session_id}: {e}")
+
+
+def _empty_manifest() -> Dict[str, Any]:
+    return {
+        "version": 1,
+        "hwm": {"sensor_data": None, "sensor_buckets": None, "sensor_changes": None},
+        "recent": {"sensor_data": [], "sensor_buckets": []},  # ids read within LAG_S below each mark
+        "rebuilt_at": None,    # newest store-wide change already applied
+        "next_segment": 1,
+        "segments": [],
+        "tail": [],
+        "exports": {},
+    }
+
+
+def _columns(values, session_ids, labels, timestamps) -> Dict[str, np.ndarray]:
+    values = np.asarray(values, dtype=np.float64)
+    return {
+        "values": values.reshape(len(values), -1),
+        "session_id": np.asarray(session_ids, dtype=str),
+        "label": np.asarray(labels, dtype=str),
+        "timestamp": np.asarray(timestamps, dtype="datetime64[ms]"),
+    }
+
+
+def _legacy_columns(docs: List[Dict[str, Any]]) -> Dict[int, Dict[str, np.ndarray]]:
+    """Per-width columns of legacy per-frame documents."""
+    by_width: Dict[int, List[Dict[str, Any]]] = {}
+    for doc in docs:
+        by_width.setdefault(len(doc["values"]), []).append(doc)
+    columns = {}
+    for width, rows in by_width.items():
+        timestamps = [ts.astimezone(timezone.utc).replace(tzinfo=None)
+                      if isinstance(ts, datetime) and ts.tzinfo else ts
+                      for ts in (row.get("timestamp") for row in rows)]
+        columns[width] = _columns([row["values"] for row in rows],
+                                  [row.get("session_id") or "auto" for row in rows],
+                                  [row.get("label") or "unknown" for row in rows], timestamps)
+    return columns
+
+
+def _bucket_columns(bucket: Dict[str, Any]) -> Dict[str, np.ndarray]:
+    count = bucket["count"]
+    offsets = np.frombuffer(bucket["offsets"], dtype="<i4").astype("timedelta64[ms]")
+    return {
+        "values": unpack_frames(bucket).astype(np.float64),
+        "session_id": np.full(count, bucket.get("session_id") or "auto"),
+        "label": np.full(count, bucket.get("label") or "unknown"),
+        "timestamp": np.datetime64(bucket["start"], "ms") + offsets,
+    }
+
+
+def _concat(parts: List[Dict[str, np.ndarray]]) -> Dict[str, np.ndarray]:
+    return {key: np.concatenate([part[key] for part in parts]) for key in parts[0]}
+
+
+def _take(columns: Dict[str, np.ndarray], mask: np.ndarray) -> Dict[str, np.ndarray]:
+    return {key: column[mask] for key, column in columns.items()}
+
+
+def _recording_positions(session_ids: np.ndarray, timestamps: np.ndarray) -> np.ndarray:
+    """
+    Dataset row of every stored frame: sessions one after another by their first
+    frame, each in timestamp order (ties keep store order).
+    """
+    sessions, codes = np.unique(session_ids, return_inverse=True)
+    times = timestamps.astype("datetime64[ms]").view(np.int64)
+    times = np.where(np.isnat(timestamps), np.iinfo(np.int64).max, times)
+    starts = np.full(len(sessions), np.iinfo(np.int64).max)
+    np.minimum.at(starts, codes, times)
+    session_rank = np.argsort(np.argsort(starts, kind="stable"), kind="stable")
+    order = np.lexsort((times, session_rank[codes]))
+    positions = np.empty(len(order), dtype=np.int64)
+    positions[order] = np.arange(len(order))
+    return positions
+
+
+class _SegmentBuilder:
+    """Collects columns per width and writes a segment every `rows` frames."""
+
+    def __init__(self, store: "TrainingStore", rows: int):
+        self.store = store
+        self.rows = rows
+        self.parts: Dict[int, List[Dict[str, np.ndarray]]] = {}
+        self.counts: Dict[int, int] = {}
+        self.written: List[Dict[str, Any]] = []
+
+    async def add(self, width: int, columns: Dict[str, np.ndarray]):
+        if not len(columns["values"]):
+            return
+        self.parts.setdefault(width, []).append(columns)
+        self.counts[width] = self.counts.get(width, 0) + len(columns["values"])
+        if self.counts[width] >= self.rows:
+            await self._write(width)
+
+    async def _write(self, width: int):
+        parts = self.parts.pop(width, None)
+        self.counts.pop(width, None)
+        if parts:
+            self.written.append(await asyncio.to_thread(self.store._write_segment, _concat(parts)))
+
+    async def finish(self) -> List[Dict[str, Any]]:
+        for width in list(self.parts):
+            await self._write(width)
+        return self.written
+
+    @property
+    def frames(self) -> int:
+        return sum(entry["rows"] for entry in self.written) + sum(self.counts.values())
+
+
+class TrainingStore:
+    """
+    Columnar, incrementally maintained copy of the stored frames (see module docstring).
+    sync() and export_csv() are serialized; segment and CSV I/O runs on a worker thread.
+    """
+
+    def __init__(self, directory: str = settings.TRAINING_STORE_DIR, segment_rows: int = SEGMENT_ROWS,
+                 settle_s: float = SETTLE_S, lag_s: float = LAG_S):
+        self.directory = directory
+        self.segment_rows = max(1, int(segment_rows))
+        self.settle_s = max(0.0, float(settle_s))
+        self.lag_s = max(0.0, float(lag_s))
+        self.syncs = 0
+        self.last_sync: Dict[str, Any] = {}
+        self._manifest: Optional[Dict[str, Any]] = None
+        self._lock = asyncio.Lock()
+
+    # ---------------- files ----------------
+    @property
+    def manifest(self) -> Dict[str, Any]:
+        if self._manifest is None:
+            path = os.path.join(self.directory, MANIFEST)
+            if os.path.exists(path):
+                with open(path, "r", encoding="utf-8") as f:
+                    self._manifest = json.load(f)
+            else:
+                self._manifest = _empty_manifest()
+        return self._manifest
+
+    def _save_manifest(self):
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, MANIFEST)
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(self.manifest, f, indent=1)
+        os.replace(path + ".tmp", path)
+
+    def _write_segment(self, columns: Dict[str, np.ndarray]) -> Dict[str, Any]:
+        manifest = self.manifest
+        name = f"segment-{manifest['next_segment']:06d}.npz"
+        manifest["next_segment"] += 1
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, name)
+        with open(path + ".tmp", "wb") as f:
+            np.savez(f, **columns)
+        os.replace(path + ".tmp", path)
+        return {"file": name, "rows": len(columns["values"]), "width": columns["values"].shape[1],
+                "sessions": sorted(set(columns["session_id"].tolist()))}
+
+    def load_segment(self, entry: Dict[str, Any], keys: Optional[Sequence[str]] = None) -> Dict[str, np.ndarray]:
+        with np.load(os.path.join(self.directory, entry["file"])) as data:
+            return {key: data[key] for key in (keys or data.files)}
+
+    def _remove_files(self, entries: List[Dict[str, Any]]):
+        for entry in entries:
+            try:
+                os.remove(os.path.join(self.directory, entry["file"]))
+            except FileNotFoundError:
+                pass
+
+    def iter_segments(self, width: Optional[int] = None, tail: bool = True) -> Iterator[Dict[str, np.ndarray]]:
+        """Columns of every segment (optionally of one frame width), oldest first."""
+        entries = self.manifest["segments"] + (self.manifest["tail"] if tail else [])
+        for entry in entries:
+            if width is None or entry["width"] == width:
+                yield self.load_segment(entry)
+
+    # ---------------- sync ----------------
+    async def sync(self, full: bool = False) -> Dict[str, Any]:
+        """
+        Bring the store up to date with MongoDB; full=True discards it and reads
+        everything again. Returns what this sync did.
+        """
+        async with self._lock:
+            try:
+                return await self._sync(full)
+            except Exception:
+                self._manifest = None  # drop partial updates; the next sync starts from the saved manifest
+                raise
+
+    async def _sync(self, full: bool) -> Dict[str, Any]:
+        t0 = time.perf_counter()
+        manifest = self.manifest
+        hwm = manifest["hwm"]
+        settled = ObjectId.from_datetime(datetime.now(timezone.utc) - timedelta(seconds=self.settle_s))
+        obsolete: List[Dict[str, Any]] = list(manifest["tail"])
+        manifest["tail"] = []
+        result = {"rebuilt": full, "refreshed_sessions": 0, "new_frames": 0, "tail_frames": 0}
+
+        sessions, rebuild_id = await self._read_changes(settled)
+        if full or rebuild_id is not None:
+            obsolete += manifest["segments"]
+            manifest["segments"] = []
+            hwm["sensor_data"] = hwm["sensor_buckets"] = None
+            manifest["recent"] = {"sensor_data": [], "sensor_buckets": []}
+            if rebuild_id is not None:
+                manifest["rebuilt_at"] = str(rebuild_id)
+            result["rebuilt"] = True
+        elif sessions:
+            obsolete += await self._refresh(sessions)
+            result["refreshed_sessions"] = len(sessions)
+
+        new = _SegmentBuilder(self, self.segment_rows)
+        tail = _SegmentBuilder(self, self.segment_rows)
+        await self._read_new("sensor_data", sensor_collection, settled, new, tail)
+        await self._read_new("sensor_buckets", sensor_bucket_collection, settled, new, tail)
+        manifest["segments"] += await new.finish()
+        manifest["tail"] = await tail.finish()
+
+        await asyncio.to_thread(self._save_manifest)
+        await asyncio.to_thread(self._remove_files, obsolete)
+        result.update(new_frames=new.frames, tail_frames=tail.frames,
+                      duration_ms=round((time.perf_counter() - t0) * 1000.0, 1))
+        self.syncs += 1
+        self.last_sync = result
+        logger.info(f"Training store sync: {result}")
+        return result
+
+    async def _read_changes(self, settled: ObjectId):
+        """
+        Sessions named by change-log entries since the last sync, and the id of the
+        newest store-wide change not yet applied. Entries newer than `settled` are
+        read again next time (refreshing a session twice is harmless).
+        """
+        hwm = self.manifest["hwm"]
+        query = {"_id": {"$gt": ObjectId(hwm["sensor_changes"])}} if hwm["sensor_changes"] else {}
+        rebuilt_at = self.manifest["rebuilt_at"]
+        sessions, rebuild_id = set(), None
+        async for change in sensor_change_collection.find(query).sort("_id", 1):
+            if change.get("session_id") is not None:
+                sessions.add(change["session_id"])
+            elif rebuilt_at is None or change["_id"] > ObjectId(rebuilt_at):
+                rebuild_id = change["_id"]
+            if change["_id"] <= settled:
+                hwm["sensor_changes"] = str(change["_id"])
+        return sessions, rebuild_id
+
+    async def _refresh(self, sessions: set) -> List[Dict[str, Any]]:
+        """Replace the stored rows of `sessions` with what MongoDB has now; returns replaced segments."""
+        manifest = self.manifest
+        replaced, kept = [], []
+        for entry in manifest["segments"]:
+            if sessions.isdisjoint(entry["sessions"]):
+                kept.append(entry)
+                continue
+            columns = await asyncio.to_thread(self.load_segment, entry)
+            keep = ~np.isin(columns["session_id"], list(sessions))
+            if keep.any():
+                kept.append(await asyncio.to_thread(self._write_segment, _take(columns, keep)))
+            replaced.append(entry)
+        manifest["segments"] = kept
+
+        # Re-read up to the high-water marks; later frames of these sessions arrive as new
+        # ones, and so do late ones within the lag window that no sync has read yet
+        rows = _SegmentBuilder(self, self.segment_rows)
+        for name, collection in (("sensor_data", sensor_collection), ("sensor_buckets", sensor_bucket_collection)):
+            mark = manifest["hwm"][name]
+            if mark is not None:
+                floor, recent = self._lag_floor(ObjectId(mark)), self._recent(name)
+                query = {"session_id": {"$in": sorted(sessions)}, "_id": {"$lte": ObjectId(mark)}}
+                await self._read(name, collection, query, rows,
+                                 skip=lambda doc_id: doc_id > floor and str(doc_id) not in recent)
+        manifest["segments"] += await rows.finish()
+        return replaced
+
+    def _lag_floor(self, mark: ObjectId) -> ObjectId:
+        return ObjectId.from_datetime(mark.generation_time - timedelta(seconds=self.lag_s))
+
+    def _recent(self, name: str) -> set:
+        return set(self.manifest.setdefault("recent", {}).get(name, []))
+
+    async def _read_new(self, name: str, collection, settled: ObjectId,
+                        new: _SegmentBuilder, tail: _SegmentBuilder):
+        """Read documents above the lag floor that no sync has read yet, and move the mark."""
+        mark = ObjectId(self.manifest["hwm"][name]) if self.manifest["hwm"][name] else None
+        recent = self._recent(name)
+        query = {"_id": {"$gt": self._lag_floor(mark)}} if mark else {}
+        read: Deque[ObjectId] = deque()
+        last = await self._read(name, collection, query, new, tail=tail, settled=settled,
+                                skip=lambda doc_id: str(doc_id) in recent, read=read)
+        if last is not None and (mark is None or last > mark):
+            mark = last
+            self.manifest["hwm"][name] = str(mark)
+        if mark is not None:
+            floor = self._lag_floor(mark)
+            self.manifest["recent"][name] = sorted(
+                doc_id for doc_id in recent.union(map(str, read)) if ObjectId(doc_id) > floor)
+
+    async def _read(self, name: str, collection, query: Dict[str, Any], out: _SegmentBuilder,
+                    tail: Optional[_SegmentBuilder] = None, settled: Optional[ObjectId] = None,
+                    skip: Optional[Callable[[ObjectId], bool]] = None,
+                    read: Optional[Deque[ObjectId]] = None) -> Optional[ObjectId]:
+        """
+        Append the training frames of `collection` matching `query` to `out` (_id order),
+        passing over documents for which skip(_id) is true; with `tail`, documents newer
+        than `settled` go there instead. Returns the last _id that went to `out`; `read`
+        collects the ids that went to `out` within the lag window below it.
+        """
+        legacy = name == "sensor_data"
+        query = {**query, **(LEGACY_FILTER if legacy else BUCKET_FILTER)}
+        projection = LEGACY_PROJECTION if legacy else None
+        batch = CURSOR_BATCH_SIZE if legacy else max(1, CURSOR_BATCH_SIZE // 100)
+        cursor = collection.find(query, projection).sort("_id", 1).batch_size(batch)
+        last = None
+        docs: List[Dict[str, Any]] = []
+        target = out
+
+        async def flush_docs():
+            for width, columns in _legacy_columns(docs).items():
+                await target.add(width, columns)
+            docs.clear()
+
+        async for doc in cursor:
+            if skip is not None and skip(doc["_id"]):
+                continue
+            if tail is not None and target is out and doc["_id"] > settled:
+                await flush_docs()
+                target = tail
+            if target is out:
+                last = doc["_id"]
+                if read is not None:
+                    floor = self._lag_floor(last)
+                    while read and read[0] <= floor:
+                        read.popleft()
+                    read.append(last)
+            if legacy:
+                docs.append(doc)
+                if len(docs) >= CURSOR_BATCH_SIZE:
+                    await flush_docs()
+            else:
+                await target.add(doc["width"], _bucket_columns(doc))
+        await flush_docs()
+        return last
+
+    # ---------------- CSV ----------------
+    async def export_csv(self, path: str, width: int) -> Dict[str, Any]:
+        """
+        Bring the training CSV at `path` up to date with the store's `width`-value frames,
+        appending when it already holds a prefix of them and rewriting it otherwise. A
+        store without such frames leaves the file as it is.
+        """
+        if width not in CSV_HEADERS:
+            raise ValueError(f"Unsupported frame width {width}; expected one of {WIDTHS}")
+        async with self._lock:
+            return await asyncio.to_thread(self._export_csv, path, width)
+
+    def _export_csv(self, path: str, width: int) -> Dict[str, Any]:
+        manifest = self.manifest
+        segments = [entry for entry in manifest["segments"] if entry["width"] == width]
+        tail = [entry for entry in manifest["tail"] if entry["width"] == width]
+        total = sum(entry["rows"] for entry in segments + tail)
+        if not total:
+            return {"path": path, "rows": 0, "appended": 0, "rewritten": False}
+
+        files = [entry["file"] for entry in segments]
+        state = manifest["exports"].get(path)
+        stat = os.stat(path) if os.path.exists(path) else None
+        append = (state is not None and stat is not None and state["width"] == width
+                  and stat.st_mtime_ns == state["mtime_ns"] and stat.st_size >= state["size"]
+                  and files[:len(state["files"])] == state["files"])
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "r+" if append else "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            if append:
+                f.seek(state["size"])  # drop the previous tail
+                f.truncate()
+                new = segments[len(state["files"]):]
+            else:
+                writer.writerow(CSV_HEADERS[width])
+                new = segments
+            written = sum(self._write_rows(writer, entry) for entry in new)
+            f.flush()
+            settled_size = f.tell()
+            written += sum(self._write_rows(writer, entry) for entry in tail)
+        manifest["exports"][path] = {"width": width, "files": files, "size": settled_size,
+                                     "mtime_ns": os.stat(path).st_mtime_ns}
+        self._save_manifest()
+        return {"path": path, "rows": total, "appended": written, "rewritten": not append}
+
+    def _write_rows(self, writer, entry: Dict[str, Any]) -> int:
+        columns = self.load_segment(entry)
+        values = columns["values"]
+        if np.all(values == np.round(values)):  # raw ADC readings: keep "512", not "512.0"
+            values = values.astype(np.int64)
+        writer.writerows([session_id, label, *row] for session_id, label, row in
+                         zip(columns["session_id"].tolist(), columns["label"].tolist(), values.tolist()))
+        return len(values)
+
+    # ---------------- dataset ----------------
+    async def export_dataset(self, width: int, directory: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Write the store's `width`-value frames as a training dataset (default:
+        dataset_dir(width)); skipped when the dataset was built from the same segments.
+        A store without such frames removes the dataset and reports rows=0, so nothing
+        trains on frames that were deleted since.
+        """
+        directory = directory or dataset_dir(width)
+        async with self._lock:
+            return await asyncio.to_thread(self._export_dataset, directory, width)
+
+    def _export_dataset(self, directory: str, width: int) -> Dict[str, Any]:
+        manifest = self.manifest
+        entries = [entry for entry in manifest["segments"] + manifest["tail"] if entry["width"] == width]
+        rows = sum(entry["rows"] for entry in entries)
+        source = [entry["file"] for entry in entries]
+        index = read_index(directory)
+        if not rows:
+            remove_dataset(directory)
+            return {"path": directory, "rows": 0, "rewritten": index is not None}
+        if index is not None and index["source"] == source:
+            return {"path": directory, "rows": index["rows"], "rewritten": False}
+        # Refreshed sessions move to the end of the store and one session can span
+        # collections and syncs; order by the narrow columns first, then place each segment
+        keys = [self.load_segment(entry, ("session_id", "timestamp")) for entry in entries]
+        positions = _recording_positions(np.concatenate([k["session_id"] for k in keys]),
+                                         np.concatenate([k["timestamp"] for k in keys]))
+        offsets = np.cumsum([0] + [entry["rows"] for entry in entries])
+        chunks = (dict(self.load_segment(entry), position=positions[start:end])
+                  for entry, start, end in zip(entries, offsets, offsets[1:]))
+        index = write_dataset(directory, chunks, rows=rows, width=width, source=source)
+        return {"path": directory, "rows": index["rows"], "rewritten": True}
+
+    def get_stats(self) -> Dict[str, Any]:
+        manifest = self.manifest
+        return {
+            "directory": self.directory,
+            "segments": len(manifest["segments"]),
+            "frames": sum(entry["rows"] for entry in manifest["segments"]),
+            "tail_frames": sum(entry["rows"] for entry in manifest["tail"]),
+            "high_water_marks": dict(manifest["hwm"]),
+            "syncs": self.syncs,
+            "last_sync": self.last_sync,
+        }
+
+
+training_store = TrainingStore()
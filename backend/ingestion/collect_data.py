@@ -24,7 +24,8 @@ if backend_path not in sys.path:
 if '.' not in sys.path:
     sys.path.append('.')
 
-from core.database import sensor_collection  # MongoDB collection
+from core.sensor_buckets import BucketWriter  # MongoDB, one document per SENSOR_BUCKET_SIZE frames
+from core.bulk_writer import bucket_writer as mongo_writer  # batched, retried, off the serial loop
 from core.settings import settings as app_settings
 
 # ========= CONFIG =========
@@ -125,6 +126,8 @@ def main():
         return
 
     data_queue = []
+    mongo_writer.start_background()
+    bucket_writer = BucketWriter(SESSION_ID, LABEL, source="collect_data", sink=mongo_writer.submit)
     loop = asyncio.get_event_loop()
     threading.Thread(target=loop.run_until_complete, args=(send_to_backend(data_queue),), daemon=True).start()
 
@@ -143,14 +146,8 @@ def main():
                     writer.writerow(row)
                     csvfile.flush()
 
-                    # Save to MongoDB
-                    mongo_doc = {
-                        "session_id": SESSION_ID,
-                        "label": LABEL,
-                        "timestamp": datetime.utcnow(),
-                        "values": data
-                    }
-                    sensor_collection.insert_one(mongo_doc)
+                    # Save to MongoDB (buffered; written a bucket at a time)
+                    bucket_writer.append(data, datetime.utcnow())
 
                     # Send to WebSocket
                     ws_payload = {
@@ -177,6 +174,8 @@ def main():
     except KeyboardInterrupt:
         logger.info("Stopped by user.")
         try:
+            bucket_writer.flush()  # training exports what is in MongoDB
+            mongo_writer.flush_sync()
             logger.info("Triggering model training...")
             # Include internal API key to bypass auth
             response = requests.post(
@@ -190,6 +189,12 @@ def main():
         except Exception as e:
             logger.error(f"Error triggering training: {e}")
     finally:
+        try:
+            bucket_writer.close()
+            mongo_writer.close_sync(timeout=30)
+            logger.info(f"Saved {bucket_writer.buckets_written} sensor buckets to MongoDB ({mongo_writer.get_stats()['failed']} failed).")
+        except Exception as e:
+            logger.error(f"Error saving sensor buckets: {e}")
         if ser and ser.is_open:
             ser.close()
             logger.info("Serial connection closed.")
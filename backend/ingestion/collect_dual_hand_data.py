@@ -23,7 +23,8 @@ backend_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
 if backend_path not in sys.path:
     sys.path.insert(0, backend_path)
 
-from core.database import sensor_collection
+from core.sensor_buckets import BucketWriter
+from core.bulk_writer import bucket_writer as mongo_writer
 from core.settings import settings as app_settings
 
 # ========= DUAL HAND CONFIG =========
@@ -60,6 +61,10 @@ class DualHandDataCollector:
         self.left_serial = None
         self.right_serial = None
         self.data_queue = []
+        # MongoDB: frames are buffered and written a bucket (SENSOR_BUCKET_SIZE frames) at a time
+        mongo_writer.start_background()  # batched, retried inserts off the serial loop
+        self.bucket_writer = BucketWriter(SESSION_ID, LABEL, source="dual_hand_collection", field="combined_values",
+                                          sink=mongo_writer.submit)
         
     def connect_arduinos(self) -> bool:
         """Connect to both Arduino devices"""
@@ -156,17 +161,8 @@ class DualHandDataCollector:
     def save_to_mongodb(self, data: Dict):
         """Save dual-hand data to MongoDB"""
         try:
-            mongo_doc = {
-                "session_id": data['session_id'],
-                "label": data['label'],
-                "timestamp": datetime.utcnow(),
-                "left_hand": data['left'],
-                "right_hand": data['right'],
-                "combined_values": data['left'] + data['right'],  # 22 total values
-                "source": "dual_hand_collection"
-            }
-            sensor_collection.insert_one(mongo_doc)
-            logger.debug("Data saved to MongoDB")
+            self.bucket_writer.append(data['left'] + data['right'], datetime.utcnow())  # 22 total values
+            logger.debug("Data buffered for MongoDB")
             
         except Exception as e:
             logger.error(f"Error saving to MongoDB: {e}")
@@ -230,6 +226,7 @@ class DualHandDataCollector:
                 
         except KeyboardInterrupt:
             print("\nStopped by user.")
+            self.flush_mongodb()  # training exports what is in MongoDB
             self.trigger_training()
         finally:
             self.cleanup()
@@ -249,8 +246,21 @@ class DualHandDataCollector:
         except Exception as e:
             logger.error(f"Error triggering training: {e}")
     
+    def flush_mongodb(self):
+        """Write the buffered frames that do not fill a whole bucket yet"""
+        try:
+            self.bucket_writer.flush()
+            mongo_writer.flush_sync()
+        except Exception as e:
+            logger.error(f"Error saving to MongoDB: {e}")
+
     def cleanup(self):
         """Clean up resources"""
+        self.flush_mongodb()
+        try:
+            mongo_writer.close_sync(timeout=30)
+        except Exception as e:
+            logger.error(f"Error closing MongoDB writer: {e}")
         if self.left_serial and self.left_serial.is_open:
             self.left_serial.close()
             logger.info("Left hand serial connection closed.")
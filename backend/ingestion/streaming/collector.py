@@ -2,10 +2,13 @@
 import asyncio
 import logging
 import json
-from serial_reader import SerialReader
-from preprocessing import normalize_sensor_data
+import numpy as np
+from serial_reader import AsyncSerialReader
+from preprocessing import normalize_block
 from config_loader import load_config
 from movement_detection import MovementDetector
+from frame_codec import FRAME_SUBPROTOCOL, encode_frames
+from flow_control import CreditWindow
 import websockets
 
 # Logger
@@ -14,81 +17,116 @@ logger = logging.getLogger("collector")
 
 # WebSocket sender config
 USE_WS = True
-BATCH_SIZE = 5
-BATCH_DELAY = 0.05  # seconds
+USE_BINARY = True      # packed frames (frame_codec) when the backend accepts them
+QUEUE_WINDOWS = 100    # gesture windows waiting to be sent before the oldest is dropped
+STATS_INTERVAL = 10.0  # seconds between sender metrics log lines
 EXPECTED_VALUES = 11  # must match model input
 
-async def ws_sender(ws_url, sequence_queue, session_id="demo", batch_size=BATCH_SIZE):
-    """Send frames individually via WebSocket with slight delay."""
+def enqueue_window(sequence_queue, window, t_read):
+    """Queue a gesture window without blocking the serial loop; returns True if an old one was dropped."""
+    dropped = False
+    if sequence_queue.full():
+        sequence_queue.get_nowait()  # the oldest gesture is the least useful one
+        dropped = True
+    sequence_queue.put_nowait((t_read, window))
+    return dropped
+
+async def receive_acks(ws, flow):
+    """Apply the backend's per-message acks (and busy replies) to the credit window."""
+    async for message in ws:
+        if isinstance(message, bytes):
+            continue
+        try:
+            data = json.loads(message)
+        except ValueError:
+            continue
+        if data.get("type") == "ack":
+            flow.ack(data)
+            if data.get("prediction"):
+                logger.info(f"Prediction for seq {data['seq']}: {data['prediction']}")
+
+async def ws_sender(ws_url, sequence_queue, session_id="demo", flow=None, binary=USE_BINARY):
+    """
+    Send each gesture window as one message, pipelined up to the number of
+    unacknowledged messages the backend's acks allow (see flow_control.py).
+    """
+    flow = flow or CreditWindow()
+    headers = {"Origin": "http://localhost:5173"}  # prevent 403
+    subprotocols = [FRAME_SUBPROTOCOL] if binary else None
     while True:
         try:
-            async with websockets.connect(ws_url) as ws:
-                logger.info("Connected to WS backend")
-
-                while True:
-                    try:
-                        # Wait for next batch from queue
-                        seq = await asyncio.wait_for(sequence_queue.get(), timeout=BATCH_DELAY)
-                        # seq is a list of frames
-                        for frame in seq:
-                            payload = {"sensor_values": [frame], "session_id": session_id}
-                            await ws.send(json.dumps(payload))
-                            logger.info(f"Sent 1 frame: {frame}")
-                            await asyncio.sleep(0.5)  # ~30ms delay between frames
-
-                    except asyncio.TimeoutError:
-                        pass  # nothing to send yet
+            async with websockets.connect(ws_url, additional_headers=headers, subprotocols=subprotocols) as ws:
+                use_binary = ws.subprotocol == FRAME_SUBPROTOCOL
+                logger.info(f"Connected to WS backend ({'binary' if use_binary else 'JSON'} frames)")
+                flow.reset()
+                receiver = asyncio.create_task(receive_acks(ws, flow))
+                try:
+                    while True:
+                        t_read, window = await sequence_queue.get()
+                        await flow.acquire()
+                        seq = flow.register(t_read)
+                        if use_binary:
+                            message = encode_frames(window, session_id, seq=seq)
+                        else:
+                            message = json.dumps({"sensor_values": window, "session_id": session_id, "seq": seq})
+                        await ws.send(message)
+                finally:
+                    receiver.cancel()
 
         except Exception as e:
             logger.warning(f"WebSocket error: {e}, reconnecting in 2s")
             await asyncio.sleep(2)
 
-async def read_serial_loop(reader, detector, sequence_queue):
-    """Read real sensor data, normalize, detect gestures, and queue for sending."""
-
+async def log_stats(reader, sequence_queue, flow, state, interval=STATS_INTERVAL):
+    """Periodic sender metrics: queue depth, credits, acks and latency from serial read to prediction."""
+    while True:
+        await asyncio.sleep(interval)
+        stats = flow.get_stats()
+        logger.info(
+            f"queue {sequence_queue.qsize()}/{sequence_queue.maxsize} windows "
+            f"(dropped {state['windows_dropped']}), in flight {stats['in_flight']}/{stats['credits']}, "
+            f"sent {stats['sent']}, acked {stats['acked']}, busy {stats['busy']}, ack timeouts {stats['ack_timeouts']}, "
+            f"end-to-end p50/p95 {stats['end_to_end']['p50_ms']}/{stats['end_to_end']['p95_ms']} ms, "
+            f"serial dropped {reader.dropped_frames} frames"
+        )
+
+async def read_serial_loop(reader, detector, sequence_queue, state=None):
+    """Consume parsed frame blocks from the serial thread, normalize, detect gestures, and queue for sending."""
+    state = state if state is not None else {"windows_dropped": 0}
+    dropped = 0
     while True:
-        raw_values = reader.read()  # must return 11 float values per frame
-        if raw_values:
-            try:
-                frame = [float(v) for v in raw_values]
-            except Exception as e:
-                logger.warning(f"Invalid frame skipped: {raw_values} ({e})")
-                await asyncio.sleep(0.01)
-                continue
-
-            # Pad or truncate to exactly 11 values
-            if len(frame) < EXPECTED_VALUES:
-                frame += [0.0] * (EXPECTED_VALUES - len(frame))
-            elif len(frame) > EXPECTED_VALUES:
-                frame = frame[:EXPECTED_VALUES]
-
-            normalized = normalize_sensor_data(frame)
-            gesture_window = detector.update(normalized)
-
-            if gesture_window:
-                # Ensure every frame has exactly 11 values
-                clean_window = [
-                    (f + [0.0]*(EXPECTED_VALUES - len(f)))[:EXPECTED_VALUES]
-                    for f in gesture_window
-                ]
-                if USE_WS:
-                    await sequence_queue.put(clean_window)
-                    logger.info(f"Queued batch of {len(clean_window)} frames")
-
-        await asyncio.sleep(0.01)
+        block, t_read = await reader.get_timed()  # (n, total_sensors) float32, parsed off the event loop
+
+        # Pad or truncate to exactly 11 values, once per block
+        if block.shape[1] < EXPECTED_VALUES:
+            block = np.pad(block, ((0, 0), (0, EXPECTED_VALUES - block.shape[1])))
+        elif block.shape[1] > EXPECTED_VALUES:
+            block = block[:, :EXPECTED_VALUES]
+
+        # One broadcast multiply for the whole block, one vectorized variance pass
+        for gesture_window in detector.update_block(normalize_block(block)):
+            if USE_WS:
+                # t_read: when the frame that completed the gesture came off the port
+                if enqueue_window(sequence_queue, gesture_window, t_read):
+                    state["windows_dropped"] += 1
+                logger.info(f"Queued gesture window of {len(gesture_window)} frames")
+
+        if reader.dropped_frames != dropped:
+            dropped = reader.dropped_frames
+            logger.warning(f"Serial queue overflow: {dropped} frames dropped so far ({reader.get_stats()})")
 
 async def main():
     cfg = load_config()
     serial_cfg = cfg["serial"]
     backend_cfg = cfg["backend"]
 
-    reader = SerialReader(
+    reader = AsyncSerialReader(
         port=serial_cfg["port"],
         baud_rate=serial_cfg["baud_rate"],
         total_sensors=serial_cfg["total_sensors"],
         reconnect_delay=serial_cfg["reconnect_delay"]
     )
-    reader.connect()
+    reader.start()  # connects (and reconnects) on its own thread
 
     detector = MovementDetector(
         threshold=0.01,
@@ -96,18 +134,21 @@ async def main():
         min_length=10
     )
 
-    sequence_queue = asyncio.Queue(maxsize=100)
+    sequence_queue = asyncio.Queue(maxsize=QUEUE_WINDOWS)
+    flow = CreditWindow()
+    state = {"windows_dropped": 0}
 
     if USE_WS:
-        asyncio.create_task(ws_sender(backend_cfg["ws_url"], sequence_queue, backend_cfg["session_id"]))
+        asyncio.create_task(ws_sender(backend_cfg["ws_url"], sequence_queue, backend_cfg["session_id"], flow))
+        asyncio.create_task(log_stats(reader, sequence_queue, flow, state))
 
     try:
-        await read_serial_loop(reader, detector, sequence_queue)
+        await read_serial_loop(reader, detector, sequence_queue, state)
     except KeyboardInterrupt:
         logger.info("Stopped by user")
     finally:
-        reader.close()
-        logger.info("Collector closed")
+        reader.stop()
+        logger.info(f"Collector closed ({reader.get_stats()}, sender {flow.get_stats()})")
 
 if __name__ == "__main__":
     asyncio.run(main())
@@ -0,0 +1,134 @@
+# backend/ingestion/streaming/flow_control.py
+"""
+Credit-based flow control and latency accounting for collector -> backend sends.
+
+Every gesture window goes out as one message tagged with a sequence number
+(the frame header's seq field, or "seq" in JSON). /gesture/predict_ws answers
+each tagged message with an ack to that sender only:
+
+    {"type": "ack", "session_id": ..., "seq": 17, "status": "success",
+     "prediction": "Hello", "credits": 8}
+
+"credits" is how many unacknowledged messages the backend is willing to have in
+flight; it drops to 1 while inference is saturated ("busy"). The sender waits
+for a free credit before each send, so a slow backend slows the collector
+instead of growing socket buffers. An ack that never arrives (e.g. dropped by
+the backend's per-client queue) frees its credit after ack_timeout.
+"""
+import asyncio
+import time
+from collections import deque
+
+INITIAL_CREDITS = 4    # in flight before the first ack announces the backend's limit
+ACK_TIMEOUT = 2.0      # seconds before an unacknowledged message stops holding a credit
+LATENCY_SAMPLES = 512  # recent samples kept per latency series
+
+
+class LatencyStats:
+    """Rolling latency samples (seconds) summarized in milliseconds."""
+
+    def __init__(self, maxlen: int = LATENCY_SAMPLES):
+        self.samples = deque(maxlen=maxlen)
+        self.count = 0
+
+    def add(self, seconds: float):
+        self.samples.append(seconds)
+        self.count += 1
+
+    def summary(self):
+        if not self.samples:
+            return {"count": self.count, "p50_ms": None, "p95_ms": None, "max_ms": None}
+        ordered = sorted(self.samples)
+        pick = lambda q: round(ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000, 1)
+        return {"count": self.count, "p50_ms": pick(0.5), "p95_ms": pick(0.95), "max_ms": round(ordered[-1] * 1000, 1)}
+
+
+class CreditWindow:
+    """
+    Sequence numbers, in-flight bookkeeping and the backend-granted credit limit
+    for one WebSocket.
+
+    acquire() waits for a free credit, register() assigns the seq to put in the
+    message about to be sent, ack() applies each backend ack.
+    Latencies: "end_to_end" is serial read -> ack received, "round_trip" is
+    send -> ack, "queue_wait" is serial read -> send.
+    """
+
+    def __init__(self, credits: int = INITIAL_CREDITS, ack_timeout: float = ACK_TIMEOUT):
+        self.initial_credits = credits
+        self.credits = credits
+        self.ack_timeout = ack_timeout
+        self.in_flight = {}          # seq -> (t_read, t_sent)
+        self.next_seq = 1
+        self._changed = asyncio.Event()
+        self.sent_count = 0
+        self.acked = 0
+        self.busy = 0
+        self.ack_timeouts = 0
+        self.end_to_end = LatencyStats()
+        self.round_trip = LatencyStats()
+        self.queue_wait = LatencyStats()
+
+    def reset(self):
+        """Forget in-flight messages (the connection they were sent on is gone)."""
+        self.in_flight.clear()
+        self.credits = self.initial_credits
+        self._changed.set()
+
+    def _expire(self, now: float):
+        stale = [seq for seq, (_, t_sent) in self.in_flight.items() if now - t_sent > self.ack_timeout]
+        for seq in stale:
+            del self.in_flight[seq]
+        self.ack_timeouts += len(stale)
+
+    async def acquire(self):
+        """Wait until another message may be sent."""
+        while True:
+            self._expire(time.monotonic())
+            if len(self.in_flight) < max(1, self.credits):
+                return
+            self._changed.clear()
+            try:
+                await asyncio.wait_for(self._changed.wait(), self.ack_timeout / 4)
+            except asyncio.TimeoutError:
+                pass
+
+    def register(self, t_read: float) -> int:
+        """Record a message about to be sent; returns its seq (1..2**32-1, wrapping)."""
+        seq = self.next_seq
+        self.next_seq = seq % 0xFFFFFFFF + 1
+        now = time.monotonic()
+        self.in_flight[seq] = (t_read, now)
+        self.sent_count += 1
+        self.queue_wait.add(now - t_read)
+        return seq
+
+    def ack(self, message: dict) -> bool:
+        """Apply an ack (or a busy reply carrying a seq). Returns False if it was not ours."""
+        if "credits" in message:
+            self.credits = int(message["credits"])
+        if message.get("status") == "busy":
+            self.busy += 1
+        entry = self.in_flight.pop(message.get("seq"), None)
+        self._changed.set()
+        if entry is None:
+            return False
+        now = time.monotonic()
+        t_read, t_sent = entry
+        self.acked += 1
+        self.end_to_end.add(now - t_read)
+        self.round_trip.add(now - t_sent)
+        return True
+
+    def get_stats(self):
+        return {
+            "credits": self.credits,
+            "in_flight": len(self.in_flight),
+            "sent": self.sent_count,
+            "acked": self.acked,
+            "busy": self.busy,
+            "ack_timeouts": self.ack_timeouts,
+            "end_to_end": self.end_to_end.summary(),
+            "round_trip": self.round_trip.summary(),
+            "queue_wait": self.queue_wait.summary(),
+        }
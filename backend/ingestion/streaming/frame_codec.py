@@ -0,0 +1,96 @@
+# backend/ingestion/streaming/frame_codec.py
+"""
+Binary frame protocol shared by the collector (WSClient) and /gesture/predict_ws.
+
+One WebSocket binary message carries a block of sensor frames:
+
+    offset  size  field
+    0       2     magic b"SG"
+    2       1     version (1)
+    3       1     dtype: 0 = float32, 1 = int16 (value = raw * scale)
+    4       4     seq (uint32, sender-defined, 0 if unused)
+    8       2     frames (uint16)
+    10      2     values per frame (uint16)
+    12      4     scale (float32, 1.0 for float32 payloads)
+    16      1     session id length in bytes
+    17      n     session id (utf-8)
+    17+n    ...   frames x values samples, little-endian, row-major
+
+All fields are little-endian. Decoding is a single np.frombuffer over the payload:
+no per-value Python objects. Clients opt in per connection by offering the
+FRAME_SUBPROTOCOL WebSocket subprotocol; JSON text messages keep working.
+"""
+import struct
+from typing import NamedTuple
+
+import numpy as np
+
+FRAME_SUBPROTOCOL = "signglove.frames.v1"
+MAGIC = b"SG"
+VERSION = 1
+
+DTYPE_FLOAT32 = 0
+DTYPE_INT16 = 1
+_DTYPES = {DTYPE_FLOAT32: np.dtype("<f4"), DTYPE_INT16: np.dtype("<i2")}
+_DTYPE_CODES = {"float32": DTYPE_FLOAT32, "int16": DTYPE_INT16}
+
+_HEADER = struct.Struct("<2sBBIHHfB")
+HEADER_SIZE = _HEADER.size  # 17
+
+
+class FrameCodecError(ValueError):
+    """Raised for malformed binary frame messages."""
+
+
+class FrameBlock(NamedTuple):
+    session_id: str
+    frames: np.ndarray  # (frames, values) float32
+    seq: int
+
+
+def encode_frames(frames, session_id: str = "", dtype: str = "float32", scale: float = 1.0, seq: int = 0) -> bytes:
+    """
+    Pack a (frames, values) block. With dtype="int16", samples are stored as
+    round(value / scale), so choose scale to fit the sensor range.
+    """
+    arr = np.asarray(frames, dtype=np.float32)
+    if arr.ndim == 1:
+        arr = arr[np.newaxis]
+    arr = arr.reshape(-1, arr.shape[-1])
+    code = _DTYPE_CODES.get(dtype)
+    if code is None:
+        raise FrameCodecError(f"Unsupported dtype {dtype!r}")
+    if code == DTYPE_INT16:
+        payload = np.clip(np.rint(arr / scale), -32768, 32767).astype("<i2")
+    else:
+        payload, scale = arr.astype("<f4", copy=False), 1.0
+    sid = session_id.encode("utf-8")
+    if len(sid) > 255:
+        raise FrameCodecError("session_id longer than 255 bytes")
+    header = _HEADER.pack(MAGIC, VERSION, code, seq & 0xFFFFFFFF, arr.shape[0], arr.shape[1], scale, len(sid))
+    return header + sid + payload.tobytes()
+
+
+def decode_frames(data: bytes) -> FrameBlock:
+    """Unpack a binary message into (session_id, float32 (frames, values) array, seq)."""
+    if len(data) < HEADER_SIZE:
+        raise FrameCodecError(f"Message too short ({len(data)} bytes)")
+    magic, version, code, seq, n_frames, n_values, scale, sid_len = _HEADER.unpack_from(data)
+    if magic != MAGIC or version != VERSION:
+        raise FrameCodecError(f"Unknown frame format (magic={magic!r}, version={version})")
+    dtype = _DTYPES.get(code)
+    if dtype is None:
+        raise FrameCodecError(f"Unknown dtype code {code}")
+    offset = HEADER_SIZE + sid_len
+    expected = offset + n_frames * n_values * dtype.itemsize
+    if len(data) != expected:
+        raise FrameCodecError(f"Payload size mismatch: got {len(data)} bytes, expected {expected}")
+
+    session_id = bytes(data[HEADER_SIZE:offset]).decode("utf-8", errors="replace")
+    samples = np.frombuffer(data, dtype=dtype, count=n_frames * n_values, offset=offset).reshape(n_frames, n_values)
+    if code == DTYPE_INT16:
+        frames = samples.astype(np.float32)
+        frames *= np.float32(scale)
+    else:
+        frames = samples.astype(np.float32)  # native-endian, writable copy
+    return FrameBlock(session_id, frames, seq)
@@ -1,14 +1,177 @@
 # live_data.py
-from threading import Lock
+"""
+Per-device latest-sample store behind /gesture/latest.
 
-latest_data = None
-lock = Lock()
+Each glove (device / session id) owns a slot: a preallocated array plus a
+seqlock. A writer bumps the slot's sequence to odd, copies the frame in and
+bumps it back to even; readers copy without taking any lock and retry if the
+sequence moved underneath them. Writers for different gloves never touch the
+same slot, and there is no global lock on either path.
 
-def update_data(values):
-    global latest_data
-    with lock:
-        latest_data = values.copy()
+Every update also takes a store-wide sequence number, so a dashboard can ask
+for "everything since seq N" and, with wait(), long-poll until something newer
+arrives instead of polling blindly. Writers may run on the event loop or in
+other threads (e.g. a serial reader); waiters are woken on their loop.
+"""
+import asyncio
+import itertools
+import threading
+import time
+from typing import Dict, List, NamedTuple, Optional
 
-def get_latest_data():
-    with lock:
-        return latest_data
+import numpy as np
+
+DEFAULT_DEVICE = "default"
+
+
+class Sample(NamedTuple):
+    device: str
+    values: List[float]
+    seq: int          # store-wide sequence of this update
+    timestamp: float  # time.time() of the update
+
+
+class _Slot:
+    """One device's latest frame, guarded by a seqlock (single writer per device)."""
+
+    __slots__ = ("values", "version", "seq", "timestamp", "write_lock")
+
+    def __init__(self, width: int):
+        self.values = np.zeros(width, dtype=np.float64)
+        self.version = 0          # odd while a write is in progress
+        self.seq = 0
+        self.timestamp = 0.0
+        self.write_lock = threading.Lock()  # only serializes writers of this one device
+
+    def write(self, values, seq: int, timestamp: float):
+        with self.write_lock:
+            self.version += 1
+            self.values[:] = values
+            self.seq = seq
+            self.timestamp = timestamp
+            self.version += 1
+
+    def read(self, device: str) -> Optional[Sample]:
+        while True:
+            before = self.version
+            if before & 1:
+                continue  # writer mid-update
+            values = self.values.tolist()
+            seq, timestamp = self.seq, self.timestamp
+            if self.version == before:
+                return Sample(device, values, seq, timestamp) if seq else None
+
+
+class LatestSampleStore:
+    """Latest frame per device with store-wide sequence numbers and long-poll waits."""
+
+    def __init__(self):
+        self._slots: Dict[str, _Slot] = {}
+        self._counter = itertools.count(1)
+        self.seq = 0                   # highest sequence handed out
+        self.last_device: Optional[str] = None
+        self.updates = 0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._event: Optional[asyncio.Event] = None
+        self._waiters = 0
+        self._wake_pending = False
+
+    def update(self, device: str, values) -> int:
+        """Store a device's newest frame; returns its sequence number."""
+        device = device or DEFAULT_DEVICE
+        values = np.asarray(values, dtype=np.float64).ravel()
+        slot = self._slots.get(device)
+        if slot is None or slot.values.shape[0] != values.shape[0]:
+            slot = _Slot(values.shape[0])
+            self._slots[device] = slot  # a dict store is atomic; a racing writer just reallocates
+        seq = next(self._counter)      # itertools.count is atomic under the GIL
+        slot.write(values, seq, time.time())
+        if seq > self.seq:
+            self.seq = seq
+        self.last_device = device
+        self.updates += 1
+        if self._waiters:
+            self._schedule_wake()
+        return seq
+
+    def get(self, device: Optional[str] = None) -> Optional[Sample]:
+        """Latest sample of one device, or of the most recently updated one."""
+        device = device or self.last_device
+        slot = self._slots.get(device) if device else None
+        return slot.read(device) if slot is not None else None
+
+    def since(self, seq: int = 0) -> List[Sample]:
+        """Latest sample of every device updated after `seq`, oldest first."""
+        samples = [s for d, slot in list(self._slots.items()) if (s := slot.read(d)) and s.seq > seq]
+        return sorted(samples, key=lambda s: s.seq)
+
+    def devices(self) -> List[str]:
+        return list(self._slots)
+
+    async def wait(self, since: int, timeout: float, device: Optional[str] = None) -> List[Sample]:
+        """
+        Long-poll: samples newer than `since` (for one device, or all), waiting up to
+        `timeout` seconds for one to arrive. Returns [] on timeout.
+        """
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop, self._event = loop, asyncio.Event()
+        deadline = loop.time() + timeout
+        self._waiters += 1
+        try:
+            while True:
+                samples = self._newer(since, device)
+                remaining = deadline - loop.time()
+                if samples or remaining <= 0:
+                    return samples
+                event = self._event
+                try:
+                    await asyncio.wait_for(event.wait(), remaining)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            self._waiters -= 1
+
+    def _newer(self, since: int, device: Optional[str]) -> List[Sample]:
+        if device is None:
+            return self.since(since)
+        sample = self.get(device)
+        return [sample] if sample is not None and sample.seq > since else []
+
+    def _schedule_wake(self):
+        """Wake waiters once per loop iteration, however many writes happen meanwhile."""
+        loop = self._loop
+        if loop is None or self._wake_pending:
+            return
+        self._wake_pending = True
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is loop:
+            loop.call_soon(self._wake)
+        else:
+            try:
+                loop.call_soon_threadsafe(self._wake)
+            except RuntimeError:  # loop closed
+                self._wake_pending = False
+
+    def _wake(self):
+        self._wake_pending = False
+        event, self._event = self._event, asyncio.Event()
+        event.set()
+
+    def get_stats(self):
+        return {"devices": len(self._slots), "seq": self.seq, "updates": self.updates, "waiters": self._waiters}
+
+
+latest_samples = LatestSampleStore()
+
+
+def update_data(values, device: str = DEFAULT_DEVICE):
+    return latest_samples.update(device, values)
+
+
+def get_latest_data(device: Optional[str] = None):
+    sample = latest_samples.get(device)
+    return sample.values if sample is not None else None
@@ -1,20 +1,57 @@
 # backend/ingestion/streaming/movement_detector.py
 
 import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+RESYNC_EVERY = 4096  # frames between exact recomputes of the running sums (bounds float drift)
+
 
 class MovementDetector:
     """
     Detects and collects full movement sequences.
     A movement starts when variance > threshold, and ends when it stabilizes.
+
+    The last window_size frames live in a ring buffer with running per-sensor sums
+    and sums of squares, so update() computes the window variance in O(1) instead
+    of rebuilding an array from a list every frame. update_block() feeds a whole
+    (n, sensors) block with one vectorized variance over all its windows.
     """
 
     def __init__(self, threshold: float = 0.05, window_size: int = 5, min_length: int = 10):
         self.threshold = threshold
         self.window_size = window_size
         self.min_length = min_length
-        self.buffer = []         # short-term window
         self.sequence = []       # active movement sequence
         self.in_motion = False
+        self.is_moving = False   # variance over the latest window_size frames is above threshold
+        self.saw_motion = False  # any frame of the last update()/update_block() was moving
+        self._ring = None        # (window_size, sensors) float64, allocated on the first frame
+        self._pos = 0
+        self._count = 0
+        self._sum = None
+        self._sumsq = None
+        self._since_sync = 0
+
+    @property
+    def buffer(self):
+        """The short-term window, oldest frame first."""
+        if self._ring is None:
+            return []
+        order = (self._pos - self._count + np.arange(self._count)) % self.window_size
+        return self._ring[order].tolist()
+
+    def _ensure_ring(self, sensors: int):
+        if self._ring is None or self._ring.shape[1] != sensors:
+            self._ring = np.zeros((self.window_size, sensors), dtype=np.float64)
+            self._sum = np.zeros(sensors, dtype=np.float64)
+            self._sumsq = np.zeros(sensors, dtype=np.float64)
+            self._pos = self._count = self._since_sync = 0
+
+    def _resync(self):
+        window = self._ring[:self._count]
+        self._sum = window.sum(axis=0)
+        self._sumsq = np.square(window).sum(axis=0)
+        self._since_sync = 0
 
     def update(self, sensor_values):
         """
@@ -22,16 +59,70 @@ class MovementDetector:
         Returns None if still collecting,
         Returns a full sequence (list of frames) when movement ends.
         """
-        self.buffer.append(sensor_values)
-        if len(self.buffer) > self.window_size:
-            self.buffer.pop(0)
+        x = np.asarray(sensor_values, dtype=np.float64)
+        self._ensure_ring(x.shape[0])
+        if self._count == self.window_size:
+            old = self._ring[self._pos]
+            self._sum -= old
+            self._sumsq -= old * old
+        else:
+            self._count += 1
+        self._ring[self._pos] = x
+        self._sum += x
+        self._sumsq += x * x
+        self._pos = (self._pos + 1) % self.window_size
+        self._since_sync += 1
+        if self._since_sync >= RESYNC_EVERY:
+            self._resync()
 
-        if len(self.buffer) < self.window_size:
+        if self._count < self.window_size:
+            self.saw_motion = False
             return None
 
-        arr = np.array(self.buffer)
-        variances = np.var(arr, axis=0)
-        is_moving = np.any(variances > self.threshold)
+        mean = self._sum / self.window_size
+        variances = self._sumsq / self.window_size - mean * mean
+        is_moving = bool((variances > self.threshold).any())
+        self.saw_motion = is_moving
+        return self._advance(is_moving, sensor_values)
+
+    def update_block(self, frames):
+        """
+        Feed an (n, sensors) block of frames at once.
+        Returns the list of movement sequences that ended inside the block (often empty).
+        """
+        block = np.asarray(frames, dtype=np.float64)
+        if block.ndim != 2 or not len(block):
+            return []
+        self._ensure_ring(block.shape[1])
+        w = self.window_size
+        history = self._ring[(self._pos - self._count + np.arange(self._count)) % w][-(w - 1):] if w > 1 else block[:0]
+        extended = np.concatenate([history, block])
+
+        finished = []
+        self.saw_motion = False
+        if len(extended) >= w:
+            # Variance of every full window ending at a frame of this block, in one pass
+            windows = sliding_window_view(extended, w, axis=0)      # (m, sensors, w)
+            moving = (windows.var(axis=-1) > self.threshold).any(axis=1).tolist()
+            first = len(block) - len(moving)                        # frames before the first full window
+            self.saw_motion = any(moving)
+            rows = frames if isinstance(frames, list) else block.tolist()
+            for is_moving, row in zip(moving, rows[first:]):
+                sequence = self._advance(is_moving, row)
+                if sequence is not None:
+                    finished.append(sequence)
+            self.is_moving = moving[-1]
+
+        # Keep the newest window_size frames for the next call and resync the sums
+        tail = extended[-w:]
+        self._ring[:len(tail)] = tail
+        self._count = len(tail)
+        self._pos = self._count % w
+        self._resync()
+        return finished
+
+    def _advance(self, is_moving: bool, sensor_values):
+        self.is_moving = is_moving
 
         if is_moving and not self.in_motion:
             # movement starts
@@ -0,0 +1,367 @@
+# backend/ingestion/streaming/multi_collector.py
+"""
+One collector process per host for many gloves.
+
+Every glove (serial port) gets its own AsyncSerialReader, MovementDetector and
+session id. Gesture windows from all gloves are multiplexed over a single
+persistent WebSocket to /gesture/predict_ws (or a small pool, with each glove
+pinned to one connection so its windows and acks stay in order). The backend
+scores each window on its own, with no frames carried over between messages, and
+uses the session id only to route acks, the live-data sample and the fan-out
+update back to the right glove. New USB-serial gloves are picked up as they are
+plugged in, and per-device throughput / drop counters are logged periodically.
+
+Usage (from this directory, like collector.py):
+  python multi_collector.py            # settings from the "gloves" section of config.yaml
+"""
+import asyncio
+import json
+import logging
+import os
+import time
+from collections import deque
+
+import numpy as np
+import websockets
+
+try:
+    from .config_loader import load_config
+    from .flow_control import CreditWindow
+    from .frame_codec import FRAME_SUBPROTOCOL, encode_frames
+    from .movement_detection import MovementDetector
+    from .preprocessing import normalize_block
+    from .serial_reader import AsyncSerialReader
+except ImportError:  # run as a script from this directory, like collector.py
+    from config_loader import load_config
+    from flow_control import CreditWindow
+    from frame_codec import FRAME_SUBPROTOCOL, encode_frames
+    from movement_detection import MovementDetector
+    from preprocessing import normalize_block
+    from serial_reader import AsyncSerialReader
+
+logger = logging.getLogger("multi_collector")
+
+EXPECTED_VALUES = 11
+LINK_QUEUE_SIZE = 256      # gesture windows buffered per WebSocket before the oldest is dropped
+RECONNECT_DELAY = 2.0      # seconds between WebSocket reconnect attempts
+DEFAULT_USB_VIDS = (0x10C4, 0x1A86, 0x0403, 0x303A)  # CP210x, CH340, FTDI, Espressif
+
+
+def discover_ports(usb_vids=DEFAULT_USB_VIDS):
+    """Serial ports whose USB vendor id looks like a glove's USB-UART bridge."""
+    from serial.tools import list_ports
+    return sorted(p.device for p in list_ports.comports() if p.vid in usb_vids)
+
+
+class GloveChannel:
+    """One glove: its reader, movement detector, session id and counters."""
+
+    def __init__(self, port, session_id, reader, detector, link, discovered=False):
+        self.port = port
+        self.session_id = session_id
+        self.reader = reader
+        self.detector = detector
+        self.link = link
+        self.discovered = discovered
+        self.task = None
+        self.frames_in = 0
+        self.windows_queued = 0
+        self.windows_sent = 0
+        self.windows_dropped = 0
+        self.busy = 0
+        self.last_frame_at = None
+        self._rate_mark = (time.monotonic(), 0)
+
+    def frame_rate(self):
+        """Frames per second since the previous call."""
+        now = time.monotonic()
+        then, frames = self._rate_mark
+        self._rate_mark = (now, self.frames_in)
+        return (self.frames_in - frames) / max(now - then, 1e-9)
+
+    def get_stats(self):
+        reader = self.reader.get_stats()
+        return {
+            "port": self.port,
+            "link": self.link.index,
+            "frames_in": self.frames_in,
+            "windows_queued": self.windows_queued,
+            "windows_sent": self.windows_sent,
+            "windows_dropped": self.windows_dropped,
+            "busy": self.busy,
+            "serial_dropped_frames": reader["dropped_frames"],
+            "lines_rejected": reader["lines_rejected"],
+            "idle_s": None if self.last_frame_at is None else round(time.monotonic() - self.last_frame_at, 1),
+        }
+
+
+class BackendLink:
+    """
+    One persistent WebSocket carrying the windows of the gloves assigned to it.
+    Windows wait in a bounded queue while the socket is down or the backend's
+    credits are used up (see flow_control.py); on overflow the oldest is dropped
+    and charged to its glove.
+    """
+
+    def __init__(self, url, index=0, binary=True, queue_size=LINK_QUEUE_SIZE):
+        self.url = url
+        self.index = index
+        self.binary = binary
+        self.queue_size = queue_size
+        self.channels = {}           # session_id -> GloveChannel
+        self.use_binary = False
+        self.connected = False
+        self.messages_sent = 0
+        self.bytes_sent = 0
+        self.reconnects = 0
+        self.flow = CreditWindow()
+        self._queue = deque()
+        self._ready = asyncio.Event()
+
+    def put(self, channel, window, t_read=None):
+        if len(self._queue) >= self.queue_size:
+            stale = self._queue.popleft()[0]
+            stale.windows_dropped += 1
+        self._queue.append((channel, window, time.monotonic() if t_read is None else t_read))
+        channel.windows_queued += 1
+        self._ready.set()
+
+    def _encode(self, channel, window, seq):
+        if self.use_binary:
+            return encode_frames(window, channel.session_id, seq=seq)
+        return json.dumps({"sensor_values": window, "session_id": channel.session_id, "seq": seq})
+
+    async def run(self):
+        headers = {"Origin": "http://localhost:5173"}  # prevent 403
+        subprotocols = [FRAME_SUBPROTOCOL] if self.binary else None
+        while True:
+            try:
+                async with websockets.connect(self.url, additional_headers=headers, subprotocols=subprotocols) as ws:
+                    self.connected = True
+                    self.use_binary = ws.subprotocol == FRAME_SUBPROTOCOL
+                    self.flow.reset()
+                    logger.info(f"Link {self.index} connected to {self.url} "
+                                f"({'binary' if self.use_binary else 'JSON'} frames, {len(self.channels)} gloves)")
+                    receiver = asyncio.create_task(self._receive_loop(ws))
+                    try:
+                        await self._send_loop(ws)
+                    finally:
+                        receiver.cancel()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Link {self.index} WebSocket error: {e}, reconnecting in {RECONNECT_DELAY}s")
+            self.connected = False
+            self.reconnects += 1
+            await asyncio.sleep(RECONNECT_DELAY)
+
+    async def _send_loop(self, ws):
+        while True:
+            if not self._queue:
+                self._ready.clear()
+                await self._ready.wait()
+                continue
+            await self.flow.acquire()
+            item = self._queue.popleft()
+            channel, window, t_read = item
+            message = self._encode(channel, window, self.flow.register(t_read))
+            try:
+                await ws.send(message)
+            except Exception:
+                self._queue.appendleft(item)  # resend after reconnecting
+                raise
+            channel.windows_sent += 1
+            self.messages_sent += 1
+            self.bytes_sent += len(message)
+
+    async def _receive_loop(self, ws):
+        """Apply acks to the credit window and drain the backend's broadcast so its per-client queue never backs up."""
+        async for message in ws:
+            if isinstance(message, bytes):
+                continue
+            try:
+                data = json.loads(message)
+            except ValueError:
+                continue
+            if data.get("type") == "ack":
+                self.flow.ack(data)
+            if data.get("status") == "busy":
+                channel = self.channels.get(data.get("session_id"))
+                if channel is not None:
+                    channel.busy += 1
+
+    def get_stats(self):
+        return {
+            "connected": self.connected,
+            "binary": self.use_binary,
+            "gloves": len(self.channels),
+            "queued": len(self._queue),
+            "messages_sent": self.messages_sent,
+            "bytes_sent": self.bytes_sent,
+            "reconnects": self.reconnects,
+            "flow": self.flow.get_stats(),
+        }
+
+
+class MultiGloveCollector:
+    """Discovers and supervises N gloves, feeding their gesture windows to the backend links."""
+
+    def __init__(self, ws_url, serial_cfg, devices=(), discover=True, usb_vids=DEFAULT_USB_VIDS,
+                 rescan_interval=5.0, connections=1, binary=True, session_prefix="glove",
+                 stats_interval=10.0, reader_factory=AsyncSerialReader):
+        self.serial_cfg = serial_cfg
+        self.devices = list(devices)
+        self.discover = discover
+        self.usb_vids = tuple(usb_vids)
+        self.rescan_interval = rescan_interval
+        self.session_prefix = session_prefix
+        self.stats_interval = stats_interval
+        self.reader_factory = reader_factory
+        self.links = [BackendLink(ws_url, i, binary) for i in range(max(1, connections))]
+        self.channels = {}           # port -> GloveChannel
+        self._tasks = []
+
+    @classmethod
+    def from_config(cls, cfg):
+        gloves = cfg.get("gloves", {})
+        return cls(
+            cfg["backend"]["ws_url"],
+            cfg["serial"],
+            devices=gloves.get("devices") or [],
+            discover=gloves.get("discover", True),
+            usb_vids=gloves.get("usb_vids", DEFAULT_USB_VIDS),
+            rescan_interval=gloves.get("rescan_interval", 5),
+            connections=gloves.get("connections", 1),
+            binary=gloves.get("binary", True),
+            session_prefix=gloves.get("session_prefix", "glove"),
+            stats_interval=gloves.get("stats_interval", 10),
+        )
+
+    def session_id_for(self, port):
+        return f"{self.session_prefix}-{os.path.basename(port)}"
+
+    def add_device(self, port, session_id=None, discovered=False):
+        if port in self.channels:
+            return self.channels[port]
+        reader = self.reader_factory(
+            port=port,
+            baud_rate=self.serial_cfg.get("baud_rate", 115200),
+            total_sensors=self.serial_cfg.get("total_sensors", EXPECTED_VALUES),
+            reconnect_delay=self.serial_cfg.get("reconnect_delay", 1.0),
+        )
+        detector = MovementDetector(threshold=0.01, window_size=5, min_length=10)
+        link = min(self.links, key=lambda l: len(l.channels))  # a glove stays on one link
+        channel = GloveChannel(port, session_id or self.session_id_for(port), reader, detector, link, discovered)
+        link.channels[channel.session_id] = channel
+        self.channels[port] = channel
+        reader.start()
+        channel.task = asyncio.create_task(self._device_loop(channel))
+        logger.info(f"Glove added: {port} as session '{channel.session_id}' on link {link.index}")
+        return channel
+
+    async def remove_device(self, port):
+        channel = self.channels.pop(port, None)
+        if channel is None:
+            return
+        channel.link.channels.pop(channel.session_id, None)
+        channel.task.cancel()
+        try:
+            await channel.task
+        except asyncio.CancelledError:
+            pass
+        await asyncio.to_thread(channel.reader.stop)
+        logger.info(f"Glove removed: {port} ({channel.get_stats()})")
+
+    async def _device_loop(self, channel):
+        while True:
+            block, t_read = await channel.reader.get_timed()  # (n, total_sensors), parsed off the event loop
+            if block.shape[1] < EXPECTED_VALUES:
+                block = np.pad(block, ((0, 0), (0, EXPECTED_VALUES - block.shape[1])))
+            elif block.shape[1] > EXPECTED_VALUES:
+                block = block[:, :EXPECTED_VALUES]
+            channel.frames_in += len(block)
+            channel.last_frame_at = time.monotonic()
+            for window in channel.detector.update_block(normalize_block(block)):
+                channel.link.put(channel, window, t_read)
+
+    async def rescan(self):
+        """Add newly plugged-in gloves and drop discovered ones that disappeared."""
+        try:
+            ports = set(await asyncio.to_thread(discover_ports, self.usb_vids))
+        except Exception as e:
+            logger.warning(f"Port discovery failed: {e}")
+            return
+        for port in sorted(ports - set(self.channels)):
+            self.add_device(port, discovered=True)
+        for port, channel in list(self.channels.items()):
+            if channel.discovered and port not in ports:
+                await self.remove_device(port)
+
+    async def _discover_loop(self):
+        while True:
+            await self.rescan()
+            await asyncio.sleep(self.rescan_interval)
+
+    async def _stats_loop(self):
+        while True:
+            await asyncio.sleep(self.stats_interval)
+            for channel in list(self.channels.values()):
+                stats = channel.get_stats()
+                logger.info(
+                    f"[{channel.session_id}] {channel.frame_rate():.0f} frames/s, "
+                    f"windows sent {stats['windows_sent']}/{stats['windows_queued']}, "
+                    f"dropped {stats['windows_dropped']} windows + {stats['serial_dropped_frames']} serial frames, "
+                    f"busy {stats['busy']}"
+                )
+            for link in self.links:
+                stats = link.get_stats()
+                flow = stats.pop("flow")
+                logger.info(
+                    f"[link {link.index}] {stats}, in flight {flow['in_flight']}/{flow['credits']}, "
+                    f"acked {flow['acked']}, ack timeouts {flow['ack_timeouts']}, "
+                    f"end-to-end p50/p95 {flow['end_to_end']['p50_ms']}/{flow['end_to_end']['p95_ms']} ms"
+                )
+
+    async def run(self):
+        for device in self.devices:
+            self.add_device(device["port"], device.get("session_id"))
+        self._tasks = [asyncio.create_task(link.run()) for link in self.links]
+        if self.discover:
+            self._tasks.append(asyncio.create_task(self._discover_loop()))
+        if self.stats_interval:
+            self._tasks.append(asyncio.create_task(self._stats_loop()))
+        if not self.devices and not self.discover:
+            logger.warning("No gloves configured and discovery is off")
+        try:
+            await asyncio.gather(*self._tasks)
+        finally:
+            await self.close()
+
+    async def close(self):
+        for task in self._tasks:
+            task.cancel()
+        for port in list(self.channels):
+            await self.remove_device(port)
+        self._tasks = []
+
+    def get_stats(self):
+        return {
+            "devices": {c.session_id: c.get_stats() for c in self.channels.values()},
+            "links": [link.get_stats() for link in self.links],
+        }
+
+
+async def main():
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    collector = MultiGloveCollector.from_config(load_config())
+    try:
+        await collector.run()
+    finally:
+        logger.info(f"Multi-glove collector closed ({collector.get_stats()})")
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        logger.info("Stopped by user")
@@ -1,18 +1,22 @@
 # backend/ingestion/streaming/preprocessing.py
+import numpy as np
 
-def normalize_sensor_data(values):
-    vals = values.copy()
+# Flex sensors (ADC 0–4095 → [0,1]), accelerometer (raw / 16384 = g-force),
+# gyroscope (raw / 131 = deg/sec)
+SENSOR_SCALE = np.array([4095.0] * 5 + [16384.0] * 3 + [131.0] * 3)
+_INV_SCALE = 1.0 / SENSOR_SCALE
 
-    # Flex sensors (ADC 0–4095 → [0,1])
-    for i in range(5):
-        vals[i] = vals[i] / 4095.0
 
-    # Accelerometer (raw / 16384 = g-force)
-    for i in range(5, 8):
-        vals[i] = vals[i] / 16384.0
+def normalize_block(frames):
+    """
+    Normalize an (n, 11) block (or a single frame) with one broadcast multiply.
+    Values past the 11th are passed through unchanged.
+    """
+    out = np.array(frames, dtype=np.float64)  # always a copy
+    out[..., :len(_INV_SCALE)] *= _INV_SCALE
+    return out
 
-    # Gyroscope (raw / 131 = deg/sec)
-    for i in range(8, 11):
-        vals[i] = vals[i] / 131.0
 
-    return vals
+def normalize_sensor_data(values):
+    """Normalize one frame; returns a list like its input."""
+    return normalize_block(values).tolist()
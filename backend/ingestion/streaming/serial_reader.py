@@ -1,10 +1,54 @@
 # backend/ingestion/streaming/serial_reader.py
+import asyncio
 import serial
+import threading
 import time
 import logging
+import warnings
+
+import numpy as np
 
 logger = logging.getLogger("serial_reader")
 
+READ_CHUNK = 4096        # max bytes per bulk read
+READ_TIMEOUT = 0.05      # seconds a bulk read waits for the first byte
+MAX_PARTIAL = 4096       # bytes of an unterminated line kept before it is discarded
+QUEUE_BATCHES = 256      # frame blocks buffered for the event loop
+
+
+def parse_frames(data: bytes, total_sensors=11):
+    """
+    Parse a block of complete "v1,v2,...\r\n" lines into a (frames, total_sensors)
+    float32 array.
+
+    Every line's field count is checked (a cheap bytes.count), then, when all lines
+    are well formed, the whole block is converted by one np.fromstring call with no
+    per-value Python work. Lines with the wrong field count (boot messages,
+    truncated lines) or a non-numeric field are rejected and the rest are kept.
+    Returns (frames, rejected_line_count).
+    """
+    lines = data.replace(b"\r", b"").split(b"\n")
+    commas = total_sensors - 1
+    good = [line for line in lines if line.count(b",") == commas]
+    rejected = sum(1 for line in lines if line.strip()) - len(good)
+    if not good:
+        return np.empty((0, total_sensors), dtype=np.float32), rejected
+    values = _fromstring(b",".join(good))
+    if values.size == len(good) * total_sensors:
+        return values.astype(np.float32).reshape(-1, total_sensors), rejected
+
+    # A non-numeric field: convert line by line to keep the valid ones
+    rows = [row for row in map(_fromstring, good) if row.size == total_sensors]
+    rejected += len(good) - len(rows)
+    return np.asarray(rows, dtype=np.float32).reshape(-1, total_sensors), rejected
+
+
+def _fromstring(text: bytes):
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", DeprecationWarning)  # emitted on unparsable text
+        return np.fromstring(text, dtype=np.float64, sep=",")
+
+
 class SerialReader:
     def __init__(self, port="COM6", baud_rate=115200, total_sensors=11,reconnect_delay=1.0):
         self.port = port
@@ -43,3 +87,124 @@ class SerialReader:
         if self.ser and self.ser.is_open:
             self.ser.close()
             logger.info("Serial connection closed.")
+
+
+class AsyncSerialReader(SerialReader):
+    """
+    Serial ingestion that never blocks the event loop.
+
+    A daemon thread does bulk reads (whatever is waiting, up to READ_CHUNK bytes),
+    splits them into lines, parses every complete line of the chunk at once with
+    parse_frames(), and hands the resulting (frames, total_sensors) block to the
+    event loop through a bounded asyncio.Queue. When the consumer falls behind, the
+    oldest block is dropped and counted. The thread reconnects after
+    reconnect_delay if the port goes away.
+
+        reader = AsyncSerialReader(port="COM6")
+        reader.start()
+        block = await reader.get()   # np.ndarray, one row per frame
+    """
+
+    def __init__(self, port="COM6", baud_rate=115200, total_sensors=11, reconnect_delay=1.0,
+                 queue_size=QUEUE_BATCHES, chunk_size=READ_CHUNK):
+        super().__init__(port, baud_rate, total_sensors, reconnect_delay)
+        self.queue_size = queue_size
+        self.chunk_size = chunk_size
+        self.queue = None
+        self._loop = None
+        self._thread = None
+        self._stop = threading.Event()
+        self._partial = b""
+        # Accounting
+        self.bytes_read = 0
+        self.frames_read = 0
+        self.batches = 0
+        self.lines_rejected = 0
+        self.dropped_batches = 0
+        self.dropped_frames = 0
+        self.reconnects = 0
+
+    def start(self, loop=None):
+        """Start the reader thread; frame blocks are delivered on `loop` (default: the running loop)."""
+        self._loop = loop or asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=self.queue_size)
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="serial-reader", daemon=True)
+        self._thread.start()
+
+    async def get(self):
+        """Next block of frames, shape (n, total_sensors), float32."""
+        frames, _ = await self.queue.get()
+        return frames
+
+    async def get_timed(self):
+        """Next (frames, t_read) pair; t_read is the time.monotonic() the chunk came off the port."""
+        return await self.queue.get()
+
+    def stop(self, timeout=2.0):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        self.close()
+
+    def _run(self):
+        while not self._stop.is_set():
+            if not self.ser or not self.ser.is_open:
+                self.connect()
+                if not self.ser:
+                    self._stop.wait(self.reconnect_delay)
+                    continue
+                self.ser.timeout = READ_TIMEOUT
+                self._partial = b""
+            try:
+                chunk = self.ser.read(min(max(self.ser.in_waiting, 1), self.chunk_size))
+            except Exception as e:
+                logger.error(f"Read error: {e}, reconnecting in {self.reconnect_delay}s")
+                self.close()
+                self.ser = None
+                self.reconnects += 1
+                self._stop.wait(self.reconnect_delay)
+                continue
+            if chunk:
+                self.feed(chunk)
+
+    def feed(self, chunk: bytes):
+        """Parse every complete line in a raw chunk and deliver them as one block."""
+        t_read = time.monotonic()
+        self.bytes_read += len(chunk)
+        data = self._partial + chunk
+        end = data.rfind(b"\n")
+        if end < 0:
+            self._partial = data  # no complete line yet
+            if len(self._partial) > MAX_PARTIAL:
+                self._partial = b""
+                self.lines_rejected += 1
+            return
+        self._partial = data[end + 1:]  # incomplete tail, completed by the next chunk
+        frames, rejected = parse_frames(data[:end], self.total_sensors)
+        self.lines_rejected += rejected
+        if len(frames):
+            self._loop.call_soon_threadsafe(self._deliver, frames, t_read)
+
+    def _deliver(self, frames, t_read=None):
+        """Runs on the event loop: enqueue a block, dropping the oldest one on overflow."""
+        if self.queue.full():
+            stale, _ = self.queue.get_nowait()
+            self.dropped_batches += 1
+            self.dropped_frames += len(stale)
+        self.queue.put_nowait((frames, time.monotonic() if t_read is None else t_read))
+        self.batches += 1
+        self.frames_read += len(frames)
+
+    def get_stats(self):
+        return {
+            "bytes_read": self.bytes_read,
+            "frames_read": self.frames_read,
+            "batches": self.batches,
+            "lines_rejected": self.lines_rejected,
+            "queued_batches": self.queue.qsize() if self.queue is not None else 0,
+            "dropped_batches": self.dropped_batches,
+            "dropped_frames": self.dropped_frames,
+            "reconnects": self.reconnects,
+        }
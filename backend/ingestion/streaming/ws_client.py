@@ -4,32 +4,48 @@ import websockets
 import json
 import logging
 
+try:
+    from .frame_codec import FRAME_SUBPROTOCOL, encode_frames
+except ImportError:  # run as a script from this directory, like collector.py
+    from frame_codec import FRAME_SUBPROTOCOL, encode_frames
+
 logger = logging.getLogger("ws_client")
 
 class WSClient:
-    def __init__(self, url, session_id="demo", batch_size=5, batch_interval=0.05):
+    def __init__(self, url, session_id="demo", batch_size=5, batch_interval=0.05,
+                 binary=False, binary_dtype="float32", binary_scale=1.0):
         """
         url: WebSocket URL
         session_id: optional session identifier
         batch_size: max number of sequences per send
         batch_interval: time to wait before sending a batch (seconds)
+        binary: offer the packed binary frame protocol (see frame_codec.py); used only
+            if the backend accepts it, otherwise batches are sent as JSON
+        binary_dtype / binary_scale: "float32", or "int16" with value = raw * scale
         """
         self.url = url
         self.session_id = session_id
         self.batch_size = batch_size
         self.batch_interval = batch_interval
+        self.binary = binary
+        self.binary_dtype = binary_dtype
+        self.binary_scale = binary_scale
+        self.use_binary = False
+        self.seq = 0
         self.queue = []
         self.ws = None
         self.connected = False
 
     async def connect(self):
         headers = {"Origin": "http://localhost:5173"}  # prevent 403
+        subprotocols = [FRAME_SUBPROTOCOL] if self.binary else None
         while True:
             try:
-                async with websockets.connect(self.url, extra_headers=headers) as ws:
+                async with websockets.connect(self.url, additional_headers=headers, subprotocols=subprotocols) as ws:
                     self.ws = ws
                     self.connected = True
-                    logger.info("Connected to WS backend")
+                    self.use_binary = ws.subprotocol == FRAME_SUBPROTOCOL
+                    logger.info(f"Connected to WS backend ({'binary' if self.use_binary else 'JSON'} frames)")
                     await self._send_loop()
             except Exception as e:
                 self.connected = False
@@ -40,6 +56,14 @@ class WSClient:
         """Add a gesture window to the queue."""
         self.queue.append(sequence)
 
+    def _encode(self, batch):
+        """One message for a batch of frames: packed binary if negotiated, else JSON."""
+        if self.use_binary:
+            self.seq += 1
+            return encode_frames(batch, self.session_id, dtype=self.binary_dtype,
+                                 scale=self.binary_scale, seq=self.seq)
+        return json.dumps({"sensor_values": batch, "session_id": self.session_id})
+
     async def _send_loop(self):
         """Continuously send batches from the queue."""
         while True:
@@ -51,12 +75,8 @@ class WSClient:
             batch = self.queue[:self.batch_size]
             self.queue = self.queue[self.batch_size:]
 
-            payload = {
-                "sensor_values": batch,
-                "session_id": self.session_id
-            }
             try:
-                await self.ws.send(json.dumps(payload))
+                await self.ws.send(self._encode(batch))
                 resp = await self.ws.recv()
                 data = json.loads(resp)
                 pred = data.get("prediction")
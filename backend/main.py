@@ -7,14 +7,17 @@ from fastapi.responses import JSONResponse
 from fastapi.exception_handlers import RequestValidationError
 from routes import training_routes, sensor_routes, admin_routes, dashboard_routes
 from routes import gestures, utils_routes, auth_routes, voice_routes
-from AI.gesture_model_inference import preprocess_frame, predict_gesture
+from AI.gesture_model_inference import get_stream_stats
 from routes import model_status
 from routes import audio_files_routes
-from ingestion.streaming.live_data import get_latest_data
+from ingestion.streaming.live_data import latest_samples
 from core.indexes import create_indexes 
 from core.database import client, test_connection
 from core.settings import settings
-from core.model import model, predict_gesture  # Ensure H5 model is loaded
+from core.serialization import FastJSONResponse, send_json
+from core.bulk_writer import close_writers, get_ingest_stats
+from core.training_store import training_store
+from core.model import model_registry, predict_async, batcher, start_model_registry, shutdown_inference  # model loads in the lifespan
 from routes.auth_routes import (
     role_required_dep as role_required,
     role_or_internal_dep as role_or_internal,
@@ -24,6 +27,8 @@ from core.error_handler import create_error_response, error_tracker, performance
 from contextlib import asynccontextmanager
 import logging
 import asyncio
+import numpy as np
+from typing import Optional
 from routes.auth_routes import ensure_default_editor
 
 # Improved logging configuration
@@ -33,6 +38,13 @@ logging.basicConfig(
 )
 logger = logging.getLogger("signglove")
 
+async def _log_model_ready():
+    if await model_registry.wait_ready():
+        bundle = model_registry.active
+        logging.info(f"Gesture model ready ({bundle.runtime.name} runtime) for: {settings.MODEL_PATH}")
+    else:
+        logging.error("Gesture model is NOT loaded! WebSocket predictions will fail.")
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     await test_connection() 
@@ -41,16 +53,19 @@ async def lifespan(app: FastAPI):
     logging.info("Indexes created. App is starting...")
 
     # Check AI model
-    if model is None:
-        logging.error("H5 model is NOT loaded! WebSocket predictions will fail.")
-    else:
-        logging.info(f"H5 model loaded successfully from: {settings.MODEL_PATH}")
+    # Load + warm the AI model in the background so the API is up immediately;
+    # /health reports "warming" until inference is ready. Also enables hot reload.
+    await start_model_registry()
+    asyncio.create_task(_log_model_ready())
 
     yield
+    await gestures_predict.predict_manager.close()
+    await shutdown_inference()
+    await close_writers()  # flush buffered sensor documents before the client goes away
     client.close()
     logging.info("MongoDB connection closed. App is shutting down...")
 
-app = FastAPI(title="Sign Glove API", lifespan=lifespan)
+app = FastAPI(title="Sign Glove API", lifespan=lifespan, default_response_class=FastJSONResponse)
 
 # Setup middleware
 setup_middleware(app)
@@ -103,9 +118,11 @@ async def health_check():
     try:
         # Test database connection
         await test_connection()
+        model_state = model_registry.state
         return {
-            "status": "healthy",
+            "status": "warming" if model_state == "warming" else "healthy",
             "database": "connected",
+            "model": model_state,
             "timestamp": "2024-01-01T00:00:00Z"
         }
     except Exception as e:
@@ -117,14 +134,33 @@ async def get_metrics():
     """Get performance metrics."""
     return {
         "performance": performance_monitor.get_performance_stats(),
-        "errors": len(error_tracker.error_log)
+        "errors": len(error_tracker.error_log),
+        "inference": batcher.get_stats(),
+        "streaming": get_stream_stats(),
+        "broadcast": gestures_predict.predict_manager.get_stats(),
+        "ingest": get_ingest_stats(),
+        "training_store": training_store.get_stats()
     }
+LATEST_MAX_WAIT = 30.0  # seconds a long-poll may be held open
+
+
 @app.get("/gesture/latest")
-async def latest_sensor():
-    data = get_latest_data()
-    if data is None:
-        return {"values": [], "real_sensor": False}
-    return {"values": data, "real_sensor": True}
+async def latest_sensor(device: Optional[str] = None, since: Optional[int] = None, timeout: float = 0.0):
+    """
+    Latest sensor frame of one glove (default: the most recently active one).
+
+    With `since`, returns every glove's frame newer than that seq ("samples"),
+    holding the request up to `timeout` seconds until one arrives.
+    """
+    if since is not None:
+        samples = await latest_samples.wait(since, min(max(timeout, 0.0), LATEST_MAX_WAIT), device)
+        return {"seq": max([s.seq for s in samples], default=since),
+                "samples": [s._asdict() for s in samples]}
+    sample = latest_samples.get(device)
+    if sample is None:
+        return {"values": [], "real_sensor": False, "seq": 0}
+    return {"values": sample.values, "real_sensor": True, "seq": sample.seq,
+            "device": sample.device, "timestamp": sample.timestamp}
 
 @app.websocket("/gesture/predict_ws")
 async def predict_ws(ws: WebSocket):
@@ -135,11 +171,19 @@ async def predict_ws(ws: WebSocket):
             values = data.get("values", [])
             
             if not values:
-                await ws.send_json({"status": "error", "message": "No input values"})
+                await send_json(ws, {"status": "error", "message": "No input values"})
                 continue
             
-            result = predict_gesture(values)
-            await ws.send_json(result)
+            # Each message is one complete gesture window, scored on its own
+            try:
+                window = np.asarray(values, dtype=np.float32)
+            except (TypeError, ValueError):
+                window = None
+            if window is None or window.ndim != 2 or window.shape[1] != 11:
+                await send_json(ws, {"status": "error", "message": gestures_predict.INVALID_INPUT_MESSAGE})
+                continue
+            result = await predict_async(window)
+            await send_json(ws, result)
 
     except WebSocketDisconnect:
         logging.info("WebSocket client disconnected")
@@ -12,6 +12,8 @@ Endpoints:
 """
 from fastapi import APIRouter, HTTPException, Depends
 from core.database import sensor_collection, model_collection
+from core.sensor_buckets import delete_rows
+from core.training_store import record_change
 import logging
 import os
 import shutil
@@ -32,8 +34,10 @@ async def clear_sensor_data(_user=Depends(role_or_internal_dep("editor"))):
     """
     try:
         result = await sensor_collection.delete_many({})
-        logging.info(f"Deleted {result.deleted_count} sensor documents")
-        return {"status": "success", "deleted": result.deleted_count}
+        frames = await delete_rows()
+        await record_change("clear")
+        logging.info(f"Deleted {result.deleted_count} sensor documents and {frames} bucketed frames")
+        return {"status": "success", "deleted": result.deleted_count, "frames_deleted": frames}
     except Exception as e:
         logging.error(f"Failed to clear sensor data: {e}")
         raise HTTPException(status_code=500, detail="Failed to clear sensor data")
@@ -100,8 +104,10 @@ async def clear_all_training_data(_user=Depends(role_or_internal_dep("editor")))
         # Clear database records
         try:
             sensor_result = await sensor_collection.delete_many({})
+            bucket_frames = await delete_rows()
+            await record_change("clear")
             model_result = await model_collection.delete_many({})
-            summary["database_records"] = sensor_result.deleted_count + model_result.deleted_count
+            summary["database_records"] = sensor_result.deleted_count + bucket_frames + model_result.deleted_count
             logging.info(f"Deleted {summary['database_records']} total database records")
         except Exception as e:
             summary["errors"].append(f"Database cleanup failed: {str(e)}")
@@ -6,9 +6,11 @@ Endpoint:
 """
 from fastapi import APIRouter, HTTPException
 from core.database import sensor_collection, model_collection
+from core import sensor_buckets
 from pymongo import DESCENDING
 import logging
 import time
+from datetime import datetime
 
 router = APIRouter(prefix="/dashboard", tags=["Dashboard"])
 
@@ -24,7 +26,7 @@ async def get_dashboard_stats():
     try:
         # Count total gesture sessions
         try:
-            total_sessions = await sensor_collection.count_documents({})
+            total_sessions = await sensor_collection.count_documents({}) + await sensor_buckets.count_sessions()
         except Exception as e:
             logging.warning(f"Error counting sensor documents: {e}")
             total_sessions = 0
@@ -56,6 +58,9 @@ async def get_dashboard_stats():
             latest_model = await model_collection.find_one(sort=[("timestamp", DESCENDING)])
             
             sensor_time = latest_sensor.get("timestamp", "") if latest_sensor else ""
+            bucket_time = await sensor_buckets.latest_timestamp()
+            if bucket_time and (not isinstance(sensor_time, datetime) or bucket_time > sensor_time):
+                sensor_time = bucket_time
             model_time = latest_model.get("timestamp", "") if latest_model else ""
             
             if sensor_time and model_time:
@@ -8,11 +8,13 @@ Endpoint:
 
 from fastapi import APIRouter, HTTPException
 from db.mongo import get_sensor_collection
+from core.bulk_writer import BulkWriter
 from models.sensor_models import SensorData
 from datetime import datetime, timezone
 
 router = APIRouter()
 collection = get_sensor_collection()
+writer = BulkWriter(collection, "sensor_data (local)")  # batches concurrent device posts
 
 @router.post("/data")
 async def receive_data(data: SensorData):
@@ -24,7 +26,7 @@ async def receive_data(data: SensorData):
         doc = data.dict()
         doc["_timestamp"] = datetime.now(timezone.utc)
 
-        result = await collection.insert_one(doc)
-        return {"status": "success", "inserted_id": str(result.inserted_id)}
+        inserted_id = await writer.write(doc)
+        return {"status": "success", "inserted_id": str(inserted_id)}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
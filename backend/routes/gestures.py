@@ -2,7 +2,7 @@
 API routes for managing gesture sensor data in the sign glove system.
 
 Endpoints:
-- GET /export: Export all gesture data as CSV.
+- GET /export: Stream gesture data as CSV (label/session/time filters, optional gzip).
 - POST /upload: Upload raw sensor data CSV file.
 - GET /gestures: List all gesture sessions.
 - GET /gestures/{session_id}: Get data for a specific session.
@@ -10,17 +10,21 @@ Endpoints:
 - PUT /{session_id}: Update gesture label for a session.
 - DELETE /{session_id}: Delete session data.
 """
-from fastapi import APIRouter, HTTPException, Request, Depends, UploadFile, File
+from fastapi import APIRouter, HTTPException, Request, Depends, UploadFile, File, Query
 from fastapi.responses import StreamingResponse
 from models.sensor_models import SensorData
 from core.database import sensor_collection
+from core import sensor_buckets
+from core.bulk_writer import sensor_writer
+from core.training_store import record_change
+from core.serialization import FastJSONResponse
 from datetime import datetime, timezone
 import logging
-import csv
 import io
 import pandas as pd
-from utils.cache import cacheable, get_or_set_cache
-from typing import List, Dict, Any
+from utils.cache import cacheable
+from utils.csv_stream import csv_chunks
+from typing import List, Dict, Any, Optional
 from routes.auth_routes import role_required_dep
 
 logger = logging.getLogger("signglove")
@@ -30,48 +34,52 @@ router = APIRouter(prefix="/gestures", tags=["Gestures"])
 def get_trace_id(request: Request):
     return request.headers.get("x-trace-id", "none")
 
+EXPORT_HEADER = [f"flexSensor{i+1}" for i in range(11)] + ["label", "source", "timestamp"]
+EXPORT_PROJECTION = {"_id": 0, "values": 1, "label": 1, "source": 1, "timestamp": 1}
+
+def _export_row(doc: Dict[str, Any]) -> list:
+    return (doc.get("values") or []) + [doc.get("label", ""), doc.get("source", ""), doc.get("timestamp", "")]
+
 @router.get(
     "/export",
     summary="Export all gesture data as CSV",
-    description="Download all gesture data in CSV format for analysis or backup."
+    description="Download gesture data in CSV format for analysis or backup, optionally filtered and gzip-compressed."
 )
-async def export_gestures(request: Request):
+async def export_gestures(
+    request: Request,
+    label: Optional[str] = Query(None, description="Only rows with this label"),
+    session_id: Optional[str] = Query(None, description="Only rows of this session"),
+    start: Optional[datetime] = Query(None, description="Only frames recorded at or after this time"),
+    end: Optional[datetime] = Query(None, description="Only frames recorded before this time"),
+    gzip: bool = Query(False, description="Return gesture_data.csv.gz"),
+):
     """
-    Returns a CSV file with all gesture data.
+    Streams a CSV file with the matching gesture data, read from the database in
+    batches and encoded chunk by chunk, so memory does not grow with the export.
     Example: flexSensor1,flexSensor2,...,label,source,timestamp
     """
-    def fetch_csv():
-        output = io.StringIO()
-        writer = csv.writer(output)
-        writer.writerow([f"flexSensor{i+1}" for i in range(11)] + ["label", "source", "timestamp"])
-        return output.getvalue()
-    cached_csv = get_or_set_cache("gestures_export_csv", lambda: None, ttl=30)
-    if cached_csv:
-        logger.info(f"[trace={get_trace_id(request)}] Served cached gesture export CSV.")
-        output = io.StringIO(cached_csv)
-        return StreamingResponse(output, media_type="text/csv", headers={
-            "Content-Disposition": "attachment; filename=gesture_data.csv"
-        })
-    cursor = sensor_collection.find({}, {"_id": 0})
-    rows = [doc async for doc in cursor]
-    if not rows:
-        logger.warning(f"[trace={get_trace_id(request)}] No gesture data found for export.")
+    trace_id = get_trace_id(request)
+    query = {key: value for key, value in (("label", label), ("session_id", session_id)) if value}
+    rows = sensor_buckets.iter_rows(query, start=start, end=end, projection=EXPORT_PROJECTION)
+    first = await anext(rows, None)
+    if first is None:
+        logger.warning(f"[trace={trace_id}] No gesture data found for export.")
         raise HTTPException(status_code=404, detail="No gesture data found")
-    output = io.StringIO()
-    writer = csv.writer(output)
-    writer.writerow([f"flexSensor{i+1}" for i in range(11)] + ["label", "source", "timestamp"])
-    for row in rows:
-        values = row.get("values", [])
-        label = row.get("label", "")
-        source = row.get("source", "")
-        ts = row.get("timestamp", "")
-        writer.writerow(values + [label, source, ts])
-    output.seek(0)
-    logger.info(f"[trace={get_trace_id(request)}] Exported {len(rows)} gesture rows.")
-    from utils.cache import cache
-    cache.set("gestures_export_csv", output.getvalue(), 30)
-    return StreamingResponse(output, media_type="text/csv", headers={
-        "Content-Disposition": "attachment; filename=gesture_data.csv"
+
+    async def all_rows():
+        yield first
+        async for row in rows:
+            yield row
+
+    async def body():
+        stats = {}
+        async for chunk in csv_chunks(EXPORT_HEADER, all_rows(), _export_row, compress=gzip, stats=stats):
+            yield chunk
+        logger.info(f"[trace={trace_id}] Exported {stats['rows']} gesture rows ({stats['bytes']} bytes{', gzip' if gzip else ''}).")
+
+    filename = "gesture_data.csv.gz" if gzip else "gesture_data.csv"
+    return StreamingResponse(body(), media_type="application/gzip" if gzip else "text/csv", headers={
+        "Content-Disposition": f"attachment; filename={filename}"
     })
 
 @router.get(
@@ -100,12 +108,16 @@ async def list_gestures(request: Request) -> Dict[str, Any]:
     trace_id = get_trace_id(request)
     cursor = sensor_collection.find({}, {"_id": 0, "session_id": 1, "gesture_label": 1})
     gestures = await cursor.to_list(length=1000)
+    # Bucketed recordings: one entry per session instead of one per frame
+    gestures += [{"session_id": s["session_id"], "gesture_label": s["label"]}
+                 for s in await sensor_buckets.list_sessions()]
     logger.info(f"[trace={trace_id}] Listed {len(gestures)} gestures.")
-    return {
+    # Returned as a response so FastAPI skips jsonable_encoder; orjson encodes directly
+    return FastJSONResponse({
         "status": "success",
         "data": gestures,
         "message": "All gestures retrieved"
-    }
+    })
 
 @router.get(
     "/{session_id}",
@@ -124,16 +136,18 @@ async def get_sensor_data(session_id: str, request: Request) -> Dict[str, Any]:
     """
     trace_id = get_trace_id(request)
     data = await sensor_collection.find_one({"session_id": session_id})
+    if not data:
+        data = await sensor_buckets.read_session(session_id)  # all frames in one query
     if not data:
         logger.warning(f"[trace={trace_id}] Session not found: {session_id}")
         raise HTTPException(status_code=404, detail="Session not found")
-    data["_id"] = str(data["_id"])
     logger.info(f"[trace={trace_id}] Retrieved session: {session_id}")
-    return {
+    # ObjectId and datetime fields are encoded by FastJSONResponse itself
+    return FastJSONResponse({
         "status": "success",
         "data": data,
         "message": "Session data retrieved"
-    }
+    })
 
 @router.post(
     "",
@@ -153,12 +167,12 @@ async def create_sensor_data(data: SensorData, request: Request, _user=Depends(r
     trace_id = get_trace_id(request)
     doc = data.dict()
     doc["_timestamp"] = datetime.now(timezone.utc)
-    result = await sensor_collection.insert_one(doc)
+    inserted_id = await sensor_writer.write(doc)  # batched with concurrent inserts
     logger.info(f"[trace={trace_id}] Sensor data inserted: session={data.session_id}")
     return {
         "status": "success",
         "session_id": data.session_id,
-        "data": {"inserted_id": str(result.inserted_id)},
+        "data": {"inserted_id": str(inserted_id)},
         "message": "Sensor data inserted",
         "trace_id": trace_id
     }
@@ -227,8 +241,8 @@ async def upload_raw_csv(file: UploadFile = File(...), request: Request = None,
         if not documents:
             raise HTTPException(status_code=400, detail="No valid sensor data found in CSV")
         
-        # Insert into database
-        result = await sensor_collection.insert_many(documents)
+        # Insert into database, SENSOR_BUCKET_SIZE rows per document
+        inserted_ids = await sensor_buckets.insert_rows(documents)
         
         logger.info(f"[trace={trace_id}] Uploaded {len(documents)} sensor data rows from CSV: {file.filename}")
         
@@ -236,7 +250,7 @@ async def upload_raw_csv(file: UploadFile = File(...), request: Request = None,
             "status": "success",
             "message": f"Successfully uploaded {len(documents)} sensor data rows",
             "rows_processed": len(documents),
-            "inserted_ids": [str(id) for id in result.inserted_ids],
+            "inserted_ids": [str(id) for id in inserted_ids],
             "trace_id": trace_id
         }
         
@@ -268,13 +282,15 @@ async def update_label(session_id: str, label: str, request: Request, _user=Depe
         {"session_id": session_id},
         {"$set": {"gesture_label": label}}
     )
-    if result.matched_count == 0:
+    buckets = await sensor_buckets.relabel_session(session_id, label)
+    if result.matched_count == 0 and buckets == 0:
         logger.warning(f"[trace={trace_id}] Session not found for update: {session_id}")
         raise HTTPException(status_code=404, detail="Session not found")
+    await record_change("relabel", session_id)
     logger.info(f"[trace={trace_id}] Label updated for session {session_id} to '{label}'")
     return {
         "status": "success",
-        "data": {"updated": result.modified_count},
+        "data": {"updated": result.modified_count + buckets},
         "message": "Gesture label updated",
         "trace_id": trace_id
     }
@@ -296,13 +312,15 @@ async def delete_sensor_data(session_id: str, request: Request, _user=Depends(ro
     """
     trace_id = get_trace_id(request)
     result = await sensor_collection.delete_one({"session_id": session_id})
-    if result.deleted_count == 0:
+    frames = await sensor_buckets.delete_rows({"session_id": session_id})
+    if result.deleted_count == 0 and frames == 0:
         logger.warning(f"[trace={trace_id}] Session not found for delete: {session_id}")
         raise HTTPException(status_code=404, detail="Session not found")
+    await record_change("delete", session_id)
     logger.info(f"[trace={trace_id}] Deleted session: {session_id}")
     return {
         "status": "success",
-        "data": {"deleted": result.deleted_count},
+        "data": {"deleted": result.deleted_count, "frames_deleted": frames},
         "message": "Session deleted",
         "trace_id": trace_id
     }
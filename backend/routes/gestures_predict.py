@@ -1,114 +1,182 @@
 # backend/routes/gesture_routes_tts_cooldown.py
-from fastapi import APIRouter, WebSocket, WebSocketDisconnect
+from fastapi import APIRouter, WebSocket
 import asyncio
 import logging
 import time
-from core.model import predict_gesture
+from collections import OrderedDict
+import numpy as np
+from core.model import predict_async
+from core.settings import settings
+from AI.gesture_model_inference import StreamingGestureSession
+from core.broadcaster import Broadcaster
+from core.serialization import loads
+from ingestion.streaming.frame_codec import FRAME_SUBPROTOCOL, FrameCodecError, decode_frames
+from ingestion.streaming.live_data import latest_samples
 from core.tts import TTSWorker
 
 logger = logging.getLogger("signglove")
 router = APIRouter(prefix="/gesture", tags=["gesture"])
 
 EXPECTED_VALUES = 11
-THROTTLE = 0.05  # 50ms per frame (~20Hz) for human-like UI speed
 TTS_COOLDOWN = 0.4  # seconds before repeating the same gesture
+MAX_SESSIONS_PER_CONNECTION = 64  # gloves a multiplexing collector may send over one socket
+INVALID_INPUT_MESSAGE = f"Invalid input shape, expected frames of {EXPECTED_VALUES} values"
 
 # TTS worker
 tts_worker = TTSWorker()
 
-# ---------------- WEBSOCKET MANAGER ----------------
-class ConnectionManager:
-    def __init__(self):
-        self.active_connections: list[WebSocket] = []
-
-    async def connect(self, websocket: WebSocket):
-        await websocket.accept()
-        self.active_connections.append(websocket)
-        logger.info(f"WS client connected: {len(self.active_connections)} total")
-
-    def disconnect(self, websocket: WebSocket):
-        if websocket in self.active_connections:
-            self.active_connections.remove(websocket)
-            logger.info(f"WS client disconnected: {len(self.active_connections)} remaining")
-
-    async def broadcast(self, message: dict):
-        alive = []
-        for conn in self.active_connections:
-            try:
-                await conn.send_json(message)
-                alive.append(conn)
-            except:
-                pass  # ignore send errors
-        self.active_connections = alive
-
-predict_manager = ConnectionManager()
+# ---------------- WEBSOCKET FAN-OUT ----------------
+# Pub/sub: bounded per-client queues with their own writer tasks, one serialization
+# per message; a slow dashboard only delays (or disconnects) itself.
+predict_manager = Broadcaster()
+
+def _ack(session_id: str, seq: int, status: str, prediction=None) -> dict:
+    """Per-message acknowledgement; "credits" caps the sender's unacknowledged messages."""
+    return {
+        "type": "ack",
+        "session_id": session_id,
+        "seq": seq,
+        "status": status,
+        "prediction": prediction,
+        "credits": settings.STREAM_SEND_CREDITS,
+    }
+
+def _invalid(session_id: str, seq) -> dict:
+    """Error reply for a malformed message; tagged messages also get their credit back."""
+    reply = {"status": "error", "message": INVALID_INPUT_MESSAGE, "session_id": session_id}
+    if seq:
+        reply.update(type="ack", seq=seq, credits=settings.STREAM_SEND_CREDITS)
+    return reply
+
+async def _score(window) -> dict:
+    """predict_async, with unexpected failures logged and reported as an empty result."""
+    try:
+        return await predict_async(window)
+    except Exception as e:
+        logger.error(f"Prediction error: {e}")
+        return {}
 
 # ---------------- PREDICT WS ----------------
 @router.websocket("/predict_ws")
 async def predict_ws(websocket: WebSocket):
-    await predict_manager.connect(websocket)
-    last_tts_time = {}  # track last TTS time per gesture
+    # Clients that offer the binary frame subprotocol may send packed frames; JSON always works
+    binary = FRAME_SUBPROTOCOL in websocket.scope.get("subprotocols", [])
+    # ?mode=raw: the client streams raw frames and the server segments gestures
+    # (thin clients without a collector); default: collector-cut gesture windows
+    raw_stream = websocket.query_params.get("mode") == "raw"
+    await predict_manager.connect(websocket, subprotocol=FRAME_SUBPROTOCOL if binary else None)
+    last_tts_time = {}  # track last TTS time per (session, gesture)
+    # Raw mode: one segmenting stream per glove session (a multi-glove client
+    # multiplexes several session ids over this one connection)
+    streams = OrderedDict()
+    session_id = "unknown_session"
 
     try:
         while True:
             try:
-                # Wait for JSON from client; timeout keeps connection alive
-                data = await asyncio.wait_for(websocket.receive_json(), timeout=1.0)
+                # Wait for a message from the client; timeout keeps connection alive
+                message = await asyncio.wait_for(websocket.receive(), timeout=1.0)
             except asyncio.TimeoutError:
                 continue
-            except WebSocketDisconnect:
-                logger.info("WS client disconnected")
-                break
             except Exception as e:
                 logger.warning(f"Receive error: {e}")
-                continue
+                break
 
-            # Extract and clean sequence
-            sequence = data.get("sensor_values", [])
-            session_id = data.get("session_id", "unknown_session")
+            if message["type"] == "websocket.disconnect":
+                logger.info("WS client disconnected")
+                break
 
-            clean_sequence = [
-                (frame + [0.0]*(EXPECTED_VALUES - len(frame)))[:EXPECTED_VALUES]
-                for frame in sequence if isinstance(frame, list) and frame
-            ]
-            if not clean_sequence:
+            seq = None
+            try:
+                if message.get("bytes") is not None:
+                    # Binary frames: one np.frombuffer, no per-value Python objects
+                    block = decode_frames(message["bytes"])
+                    session_id = block.session_id or session_id
+                    seq = block.seq
+                    frames = block.frames
+                    if frames.shape[1] != EXPECTED_VALUES:
+                        frames = np.pad(frames, ((0, 0), (0, max(0, EXPECTED_VALUES - frames.shape[1]))))[:, :EXPECTED_VALUES]
+                else:
+                    data = loads(message.get("text") or "{}")
+                    sequence = data.get("sensor_values", [])
+                    session_id = data.get("session_id", "unknown_session")
+                    seq = data.get("seq")
+                    clean_sequence = [
+                        (frame + [0.0]*(EXPECTED_VALUES - len(frame)))[:EXPECTED_VALUES]
+                        for frame in sequence if isinstance(frame, list) and frame
+                    ]
+                    # Non-numeric values fail here, not inside the session's window
+                    frames = np.asarray(clean_sequence, dtype=np.float32).reshape(-1, EXPECTED_VALUES)
+            except (FrameCodecError, ValueError, TypeError, AttributeError) as e:
+                logger.warning(f"Invalid message skipped: {e}")
+                predict_manager.send_to(websocket, _invalid(session_id, seq))
+                continue
+            if not len(frames):
+                if seq:
+                    predict_manager.send_to(websocket, _ack(session_id, seq, "empty"))
                 continue  # skip empty batch
+            latest_samples.update(session_id, frames[-1])  # /gesture/latest
 
             # -------- AI prediction --------
-            try:
-                result = predict_gesture(clean_sequence)
-                gesture_name = result.get("prediction") if result.get("status") == "success" else None
-            except Exception as e:
-                logger.error(f"Prediction error: {e}")
-                gesture_name = None
-
-            # -------- Trigger TTS immediately with cooldown --------
-            now = time.time()
-            if gesture_name and gesture_name not in ["Rest"]:
-                last_time = last_tts_time.get(gesture_name, 0)
-                if now - last_time > TTS_COOLDOWN:
-                    tts_worker.enqueue({"prediction": gesture_name})
-                    last_tts_time[gesture_name] = now
-
-            # -------- Broadcast every frame with throttling --------
-            for frame in clean_sequence:
-                payload = {
-                    "prediction": gesture_name or "None",
-                    "values": frame,
+            stream = None
+            if raw_stream:
+                # Raw frames: this session's segmenter decides when a gesture has ended
+                stream = streams.get(session_id)
+                if stream is None:
+                    if len(streams) >= MAX_SESSIONS_PER_CONNECTION:
+                        streams.popitem(last=False)  # forget the least recently active glove
+                    stream = streams[session_id] = StreamingGestureSession(segment=True)
+                else:
+                    streams.move_to_end(session_id)
+                stream.extend(frames)
+                windows = stream.take_segments()  # one window per movement that ended in this message
+            else:
+                # A collector message is one complete gesture window: score it on its own,
+                # never mixed with frames of earlier messages
+                windows = [frames]
+            predicted = bool(windows)
+            results = await asyncio.gather(*(_score(window) for window in windows))
+            gestures = [r.get("prediction") if r.get("status") == "success" else None for r in results]
+            if stream is not None:
+                for r in results:
+                    if r.get("status") == "success":
+                        stream.last_result = r
+                if not predicted:
+                    gestures = [(stream.last_result or {}).get("prediction")]  # no movement ended: reuse
+            gesture_name = gestures[-1]
+
+            # -------- Backpressure: tell the sender to slow down, skip fan-out --------
+            busy_result = next((r for r in results if r.get("status") == "busy"), None)
+            if busy_result is not None:
+                busy = {
+                    "status": "busy",
+                    "message": busy_result.get("message"),
                     "session_id": session_id
                 }
+                if seq:
+                    busy.update(type="ack", seq=seq, credits=1)  # one window in flight until inference catches up
+                predict_manager.send_to(websocket, busy)
+                continue
 
-                # Send to sender
-                try:
-                    await websocket.send_json(payload)
-                except Exception as e:
-                    logger.warning(f"Send error to sender: {e}")
+            # -------- Trigger TTS immediately with cooldown, once per scored gesture --------
+            now = time.time()
+            for name in gestures if predicted else ():
+                if not name or name in ["Rest"]:
+                    continue
+                last_time = last_tts_time.get((session_id, name), 0)
+                if now - last_time > TTS_COOLDOWN:
+                    tts_worker.enqueue({"prediction": name})
+                    last_tts_time[(session_id, name)] = now
 
-                # Broadcast to other clients
-                await predict_manager.broadcast(payload)
+            # -------- Ack the sender (collectors tag messages with a seq for flow control) --------
+            if seq:
+                ack = _ack(session_id, seq, "success" if predicted else "skipped", gesture_name)
+                if raw_stream:
+                    ack["predictions"] = gestures if predicted else []  # every gesture that ended in this message
+                predict_manager.send_to(websocket, ack)
 
-                # Throttle to simulate human-like speed in UI
-                await asyncio.sleep(THROTTLE)
+            # -------- Fan out to every client (sender included), coalesced per UI tick --------
+            predict_manager.publish(session_id, gesture_name or "None", frames)  # rows serialize as arrays
 
     finally:
-        predict_manager.disconnect(websocket)
+        await predict_manager.disconnect(websocket)
@@ -1,9 +1,38 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends
+import json
 import os
 from core.settings import settings
+from core import model as inference
+from routes.auth_routes import role_or_internal_dep
 
 router = APIRouter()
 
+def _training_accuracy():
+    """Per-fold and fold-ensemble validation accuracy recorded by AI/model.py, if available."""
+    try:
+        with open(settings.METRICS_PATH) as f:
+            metrics = json.load(f)
+    except (OSError, ValueError):
+        return None
+    fold_accuracies = metrics.get("fold_accuracies") or []
+    return {
+        "average": metrics.get("average_accuracy"),
+        "folds": fold_accuracies,
+        "best_fold": int(max(range(len(fold_accuracies)), key=fold_accuracies.__getitem__)) + 1 if fold_accuracies else None,
+        "ensemble": metrics.get("ensemble_accuracy"),  # probability-averaged folds; absent before it was recorded
+    }
+
+def _inference_status():
+    bundle = inference.model_registry.active
+    runtime = bundle.runtime if bundle else None
+    if runtime is None:
+        return None
+    status = {"runtime": runtime.name, "ensemble": settings.INFERENCE_ENSEMBLE, "version": bundle.version}
+    if hasattr(runtime, "get_stats"):
+        # Ensemble vs best-fold latency per window, plus how often the budget forced a fallback
+        status.update(runtime.get_stats())
+    return status
+
 @router.get("/model/status")
 async def get_model_status():
     model_exists = os.path.exists(settings.MODEL_PATH)
@@ -13,6 +42,14 @@ async def get_model_status():
         "singleHand": model_exists,
         "dualHand": False,  # update if you implement dual-hand models
         "lastUpdated": os.path.getmtime(settings.MODEL_PATH) if model_exists else None,
-        "error": None if model_exists else "No trained models available"
+        "error": None if model_exists else "No trained models available",
+        "inference": _inference_status(),
+        "accuracy": _training_accuracy() if metrics_exists else None,
+        "registry": inference.model_registry.get_stats(),
     }
     return status
+
+@router.post("/model/reload")
+async def reload_model(_user=Depends(role_or_internal_dep("editor"))):
+    """Load the artifacts on disk, warm them up and swap them in without a restart."""
+    return await inference.model_registry.reload("api")
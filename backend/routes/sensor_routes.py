@@ -10,6 +10,8 @@ Endpoints:
 from fastapi import APIRouter, HTTPException, Query, Depends
 from models.sensor_models import SensorData
 from core.database import sensor_collection
+from core.bulk_writer import sensor_writer
+from core.training_store import record_change
 from bson import ObjectId
 from typing import List
 from fastapi.encoders import jsonable_encoder
@@ -31,8 +33,8 @@ async def create_sensor_data(data: SensorData, _user=Depends(role_required_dep("
     Insert new sensor data into the database.
     """
     try:
-        result = await sensor_collection.insert_one(data.model_dump())
-        return {"inserted_id": str(result.inserted_id)}
+        inserted_id = await sensor_writer.write(data.model_dump())  # batched with concurrent inserts
+        return {"inserted_id": str(inserted_id)}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -62,6 +64,7 @@ async def update_sensor_label(session_id: str, label: str = Query(...), _user=De
         )
         if result.matched_count == 0:
             raise HTTPException(status_code=404, detail="Session not found")
+        await record_change("relabel", session_id)
         return {"message": "Label updated", "modified_count": result.modified_count}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -75,6 +78,7 @@ async def delete_sensor_data(session_id: str, _user=Depends(role_required_dep("e
         result = await sensor_collection.delete_one({"session_id": session_id})
         if result.deleted_count == 0:
             raise HTTPException(status_code=404, detail="Session not found")
+        await record_change("delete", session_id)
         return {"message": "Sensor data deleted"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -6,15 +6,19 @@ Endpoints:
 - GET /training/: List all training results.
 - GET /training/{session_id}: Fetch a training result by session ID.
 - POST /training/run: Upload CSV, run training, and log result.
+- POST /training/trigger: Train on the stored sensor frames (.npy dataset from the training store).
+- GET /training/export: Download the stored sensor frames as a training CSV.
 - GET /training/metrics: Fetch detailed training metrics and visualizations.
 """
 from fastapi import APIRouter, HTTPException, UploadFile, File, Depends
 from models.model_result import ModelResult
 from core.database import model_collection, sensor_collection
+from core.training_store import training_store
 from fastapi.responses import JSONResponse, FileResponse
 from datetime import datetime, timezone
 from uuid import uuid4
 from core.settings import settings
+from core.model import model_registry
 import logging
 import subprocess
 import shutil
@@ -22,7 +26,7 @@ import os
 import json
 import sys
 from utils.cache import cacheable
-from typing import Dict, Any, List
+from typing import Dict, Any
 import csv
 from routes.auth_routes import role_required_dep, role_or_internal_dep
 
@@ -224,6 +228,8 @@ async def run_training(file: UploadFile = File(...), dual_hand: bool = False, _u
             proc.wait()
             with open(settings.TRAINING_LOG_PATH, 'a', encoding='utf-8') as logf:
                 logf.write(f"\n=== Training finished with code {proc.returncode} ===\n")
+            if proc.returncode == 0:
+                model_registry.request_reload("training finished")
         threading.Thread(target=_stream_logs, daemon=True).start()
 
         return {"status": "started", "message": "Training started. Tail /utils/training/logs to view progress."}
@@ -233,70 +239,27 @@ async def run_training(file: UploadFile = File(...), dual_hand: bool = False, _u
         raise HTTPException(status_code=500, detail="Failed to run training")
 
 @router.post("/trigger")
-async def trigger_training_run(dual_hand: bool = False, _user=Depends(role_or_internal_dep("editor"))):
+async def trigger_training_run(dual_hand: bool = False, full: bool = False, _user=Depends(role_or_internal_dep("editor"))):
     """
     Trigger the model training job (same as POST /training/run but without upload).
-    Set dual_hand=True to use dual-hand data for training.
+    Set dual_hand=True to use dual-hand data for training. The .npy training dataset
+    is brought up to date incrementally from the training store; full=True re-reads
+    every stored frame instead. The training CSV is not written here (GET /training/export).
     """
     try:
-        # Export latest sensor data from MongoDB to CSV so training uses fresh data
-        export_path = settings.GESTURE_DUALHAND_DATA_PATH if dual_hand else settings.GESTURE_DATA_PATH
-        os.makedirs(os.path.dirname(export_path), exist_ok=True)
-        cursor = sensor_collection.find().sort("timestamp", 1)
-        rows: List[Dict[str, Any]] = []
-        async for doc in cursor:
-            values = doc.get("values", [])
-            # Support both single-hand (11 values) and dual-hand (22 values)
-            if isinstance(values, list) and len(values) in [11, 22]:
-                rows.append({
-                    "session_id": doc.get("session_id", "auto"),
-                    "label": doc.get("label", "unknown"),
-                    "values": values
-                })
-        if not rows:
-            logging.warning("No sensor data found to export for training. Using existing CSV if present.")
-            # If there are no rows and the CSV does not exist, return 400 instead of failing later
-            if not os.path.exists(export_path):
-                raise HTTPException(status_code=400, detail="No training data available. Collect data first.")
-        else:
-            # Determine header based on data dimensions
-            sample_values = rows[0]["values"] if rows else []
-            if len(sample_values) == 11:
-                # Single-hand header
-                header = [
-                    "session_id", "label",
-                    "flex1", "flex2", "flex3", "flex4", "flex5",
-                    "accel_x", "accel_y", "accel_z",
-                    "gyro_x", "gyro_y", "gyro_z"
-                ]
-            elif len(sample_values) == 22:
-                # Dual-hand header
-                header = [
-                    "session_id", "label",
-                    # Left hand
-                    "left_flex1", "left_flex2", "left_flex3", "left_flex4", "left_flex5",
-                    "left_accel_x", "left_accel_y", "left_accel_z",
-                    "left_gyro_x", "left_gyro_y", "left_gyro_z",
-                    # Right hand
-                    "right_flex1", "right_flex2", "right_flex3", "right_flex4", "right_flex5",
-                    "right_accel_x", "right_accel_y", "right_accel_z",
-                    "right_gyro_x", "right_gyro_y", "right_gyro_z"
-                ]
-            else:
-                raise HTTPException(status_code=400, detail=f"Invalid data dimensions: {len(sample_values)}. Expected 11 or 22 values.")
-            with open(export_path, "w", newline="") as f:
-                writer = csv.writer(f)
-                writer.writerow(header)
-                for r in rows:
-                    writer.writerow([r["session_id"], r["label"], *r["values"]])
-            hand_type = "single-hand" if len(sample_values) == 11 else "dual-hand"
-            logging.info(f"Exported {len(rows)} {hand_type} sensor rows to {export_path} for training.")
+        await training_store.sync(full=full)
+        width = 22 if dual_hand else 11
+        dataset = await training_store.export_dataset(width)
+        hand_type = "dual-hand" if dual_hand else "single-hand"
+        if not dataset["rows"]:
+            raise HTTPException(status_code=400, detail="No training data available. Collect data first.")
+        action = "Rebuilt" if dataset["rewritten"] else "Reusing"
+        logging.info(f"{action} {hand_type} training dataset with {dataset['rows']} rows in {dataset['path']}.")
 
         # Start model.py and stream logs
         script_path = os.path.join(os.path.dirname(__file__), '..', 'AI', 'model.py')
-        # Pass the file path as an environment variable so model.py knows which file to use
         env = os.environ.copy()
-        env['GESTURE_DATA_FILE'] = export_path
+        env['TRAINING_DATASET_DIR'] = dataset["path"]  # model.py maps the .npy shards instead of parsing CSV
         os.makedirs(os.path.dirname(settings.TRAINING_LOG_PATH), exist_ok=True)
         with open(settings.TRAINING_LOG_PATH, 'w', encoding='utf-8') as logf:
             logf.write("=== Training started ===\n")
@@ -316,6 +279,8 @@ async def trigger_training_run(dual_hand: bool = False, _user=Depends(role_or_in
             proc.wait()
             with open(settings.TRAINING_LOG_PATH, 'a', encoding='utf-8') as logf:
                 logf.write(f"\n=== Training finished with code {proc.returncode} ===\n")
+            if proc.returncode == 0:
+                model_registry.request_reload("training finished")
         threading.Thread(target=_stream_logs, daemon=True).start()
 
         return {"status": "started", "message": "Training started. Tail /utils/training/logs to view progress."}
@@ -326,6 +291,27 @@ async def trigger_training_run(dual_hand: bool = False, _user=Depends(role_or_in
         logging.error(f"Triggered training failed: {e}")
         raise HTTPException(status_code=500, detail="Training failed")
 
+@router.get("/export")
+async def export_training_csv(dual_hand: bool = False, full: bool = False, _user=Depends(role_or_internal_dep("editor"))):
+    """
+    Bring the training CSV up to date from the training store and download it
+    (gesture_data.csv, or the dual-hand file with dual_hand=True). Training itself
+    reads the .npy dataset written by POST /training/trigger.
+    """
+    export_path = settings.GESTURE_DUALHAND_DATA_PATH if dual_hand else settings.GESTURE_DATA_PATH
+    try:
+        await training_store.sync(full=full)
+        export = await training_store.export_csv(export_path, 22 if dual_hand else 11)
+    except Exception as e:
+        logging.error(f"Training CSV export failed: {e}")
+        raise HTTPException(status_code=500, detail="Failed to export training data")
+    if not export["rows"] and not os.path.exists(export_path):
+        raise HTTPException(status_code=404, detail="No training data available. Collect data first.")
+    if export["rows"]:
+        action = "Rewrote" if export["rewritten"] else "Appended"
+        logging.info(f"{action} {export['appended']} sensor rows ({export['rows']} total) in {export_path}.")
+    return FileResponse(export_path, media_type="text/csv", filename=os.path.basename(export_path))
+
 @router.post("/dual-hand/run")
 async def run_dual_hand_training(file: UploadFile = File(...), _user=Depends(role_or_internal_dep("editor"))):
     """
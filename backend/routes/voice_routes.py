@@ -34,6 +34,7 @@ except ImportError:
     HAS_WHISPER = False
 
 from core.database import voice_collection
+from core.serialization import send_json
 try:
     from services.tts_service import tts_service
 except ImportError:
@@ -202,7 +203,7 @@ async def websocket_voice_stream(websocket: WebSocket):
     logger.info(f"Voice WebSocket connected: {session_id}")
     
     # Send welcome message
-    await websocket.send_json({
+    await send_json(websocket, {
         "type": "connection_established",
         "session_id": session_id,
         "voice_recognition_available": bool(HAS_SPEECH_RECOGNITION or HAS_WHISPER),
@@ -225,7 +226,7 @@ async def websocket_voice_stream(websocket: WebSocket):
                     # Validate audio data
                     if not isinstance(audio_data, list) or len(audio_data) == 0:
                         logger.warning("Received empty or invalid audio data")
-                        await websocket.send_json({
+                        await send_json(websocket, {
                             "type": "error",
                             "message": "Empty or invalid audio data",
                             "timestamp": time.time()
@@ -279,7 +280,7 @@ async def websocket_voice_stream(websocket: WebSocket):
                                 "audio_data": audio_data,
                                 "sample_rate": sample_rate
                             }
-                            await websocket.send_json(response)
+                            await send_json(websocket, response)
                             logger.debug(f"Sent result for chunk {response.get('chunk_id')}")
                         except Exception as e:
                             logger.error(f"Failed to send result: {e}")
@@ -287,7 +288,7 @@ async def websocket_voice_stream(websocket: WebSocket):
                             
                     except Exception as e:
                         logger.error(f"Error processing audio chunk: {e}")
-                        await websocket.send_json({
+                        await send_json(websocket, {
                             "type": "error",
                             "message": f"Error processing audio: {str(e)}",
                             "timestamp": time.time()
@@ -297,12 +298,12 @@ async def websocket_voice_stream(websocket: WebSocket):
                     # Handle other message types
                     if data.get("type") == "ping":
                         # Respond to ping for connection health check
-                        await websocket.send_json({
+                        await send_json(websocket, {
                             "type": "pong",
                             "timestamp": time.time()
                         })
                     else:
-                        await websocket.send_json({
+                        await send_json(websocket, {
                             "type": "error",
                             "message": f"Unsupported message type: {data.get('type')}",
                             "timestamp": time.time()
@@ -310,12 +311,12 @@ async def websocket_voice_stream(websocket: WebSocket):
                     
             except asyncio.TimeoutError:
                 # Send keepalive
-                await websocket.send_json({"type": "keepalive", "timestamp": time.time()})
+                await send_json(websocket, {"type": "keepalive", "timestamp": time.time()})
                 continue
                 
             except json.JSONDecodeError as e:
                 logger.error(f"JSON decode error: {e}")
-                await websocket.send_json({
+                await send_json(websocket, {
                     "type": "error",
                     "message": "Invalid JSON format",
                     "timestamp": time.time()
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Benchmark the collector's per-frame stage (normalize + movement detection):
+the original per-index loop and list-window np.var, the O(1) running-sum
+MovementDetector.update, and block processing with normalize_block +
+MovementDetector.update_block.
+
+Usage:
+  python backend/scripts/bench_collector.py                   # 20000 frames, 20-frame blocks
+  python backend/scripts/bench_collector.py --frames 100000 --block 50
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+# Ensure backend dir is on sys.path so 'ingestion' absolute imports work
+backend_dir = Path(__file__).resolve().parents[1]
+if str(backend_dir) not in sys.path:
+    sys.path.insert(0, str(backend_dir))
+
+from ingestion.streaming.movement_detection import MovementDetector
+from ingestion.streaming.preprocessing import normalize_block, normalize_sensor_data
+
+
+def legacy_normalize(values):
+    vals = values.copy()
+    for i in range(5):
+        vals[i] = vals[i] / 4095.0
+    for i in range(5, 8):
+        vals[i] = vals[i] / 16384.0
+    for i in range(8, 11):
+        vals[i] = vals[i] / 131.0
+    return vals
+
+
+class LegacyDetector(MovementDetector):
+    """The original update(): list window, pop(0), np.array + np.var every frame."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.window = []
+
+    def update(self, sensor_values):
+        self.window.append(sensor_values)
+        if len(self.window) > self.window_size:
+            self.window.pop(0)
+        if len(self.window) < self.window_size:
+            return None
+        variances = np.var(np.array(self.window), axis=0)
+        return self._advance(bool(np.any(variances > self.threshold)), sensor_values)
+
+
+def synthetic_stream(n: int, seed: int = 0) -> np.ndarray:
+    """Raw ADC/IMU values alternating between rest and movement."""
+    rng = np.random.default_rng(seed)
+    base = np.array([2000.0] * 5 + [0.0, 0.0, 16384.0] + [0.0] * 3)
+    noise = np.where((np.arange(n) // 100) % 2 == 0, 5.0, 2000.0)[:, None]
+    return (base + rng.normal(0, 1, (n, 11)) * noise).astype(np.float32)
+
+
+def run(name, fn, n_frames):
+    start = time.perf_counter()
+    sequences = fn()
+    elapsed = time.perf_counter() - start
+    print(f"{name:<28}{elapsed / n_frames * 1e6:>10.2f}{n_frames / elapsed / 1000:>12.1f}{sequences:>11}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--frames", type=int, default=20000)
+    parser.add_argument("--block", type=int, default=20, help="frames per serial block")
+    args = parser.parse_args()
+
+    stream = synthetic_stream(args.frames)
+    rows = stream.tolist()
+
+    def legacy():
+        detector = LegacyDetector(threshold=0.01)
+        return sum(1 for frame in rows if detector.update(legacy_normalize(frame)))
+
+    def per_frame():
+        detector = MovementDetector(threshold=0.01)
+        return sum(1 for frame in rows if detector.update(normalize_sensor_data(frame)))
+
+    def blocks():
+        detector = MovementDetector(threshold=0.01)
+        return sum(len(detector.update_block(normalize_block(stream[i:i + args.block])))
+                   for i in range(0, len(stream), args.block))
+
+    print(f"{args.frames} frames, {args.block}-frame blocks")
+    print(f"{'path':<28}{'us/frame':>10}{'kframes/s':>12}{'sequences':>11}")
+    run("legacy loop + list np.var", legacy, args.frames)
+    run("running-sum update()", per_frame, args.frames)
+    run("normalize_block + blocks", blocks, args.frames)
+
+
+if __name__ == "__main__":
+    main()
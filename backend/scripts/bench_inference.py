@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Benchmark single-window gesture inference: Keras model.predict vs the compiled
+direct-call runtime and (when exported) the TFLite runtime used by core.model.
+
+Usage:
+  python backend/scripts/bench_inference.py                # 200 iterations, batch 1
+  python backend/scripts/bench_inference.py --iters 500 --batch 8
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+# Ensure backend dir is on sys.path so 'core' absolute imports work
+backend_dir = Path(__file__).resolve().parents[1]
+if str(backend_dir) not in sys.path:
+    sys.path.insert(0, str(backend_dir))
+
+from core.settings import settings
+from core.runtime import KerasRuntime, TFLiteRuntime, tflite_path_for
+
+
+def time_calls(fn, x, iters: int, warmup: int = 5):
+    for _ in range(warmup):
+        fn(x)
+    samples = []
+    for _ in range(iters):
+        start = time.perf_counter()
+        fn(x)
+        samples.append((time.perf_counter() - start) * 1000.0)
+    samples.sort()
+    return {
+        "mean": statistics.fmean(samples),
+        "p50": samples[len(samples) // 2],
+        "p95": samples[int(len(samples) * 0.95) - 1],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default=settings.MODEL_PATH)
+    parser.add_argument("--iters", type=int, default=200)
+    parser.add_argument("--batch", type=int, default=1)
+    args = parser.parse_args()
+
+    from tensorflow.keras.models import load_model
+    model = load_model(args.model)
+    runtime = KerasRuntime(model)
+    _, timesteps, features = model.input_shape
+    x = np.random.rand(args.batch, timesteps, features).astype(np.float32)
+
+    diff = np.abs(model.predict(x, verbose=0) - runtime(x)).max()
+    print(f"Model: {args.model}  input: {x.shape}  max |predict - compiled| = {diff:.2e}")
+
+    results = {
+        "model.predict": time_calls(lambda b: model.predict(b, verbose=0), x, args.iters),
+        runtime.name: time_calls(runtime, x, args.iters),
+    }
+    tflite_path = tflite_path_for(args.model)
+    if os.path.exists(tflite_path):
+        results["tflite"] = time_calls(TFLiteRuntime(tflite_path), x, args.iters)
+    print(f"{'path':<16}{'mean ms':>10}{'p50 ms':>10}{'p95 ms':>10}")
+    for name, r in results.items():
+        print(f"{name:<16}{r['mean']:>10.2f}{r['p50']:>10.2f}{r['p95']:>10.2f}")
+    for name in list(results)[1:]:
+        speedup = results["model.predict"]["p50"] / results[name]["p50"]
+        print(f"Speedup vs model.predict (p50), {name}: {speedup:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark the per-request preprocessing around the forward pass: sklearn
+scaler.transform + label_encoder.inverse_transform vs the extracted mean/scale arrays
+and classes tuple used by core.model.
+
+Usage:
+  python backend/scripts/bench_preprocess.py               # 20000 calls, one 50-frame window
+  python backend/scripts/bench_preprocess.py --iters 50000 --batch 8
+"""
+import argparse
+import pickle
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+# Ensure backend dir is on sys.path so 'core' absolute imports work
+backend_dir = Path(__file__).resolve().parents[1]
+if str(backend_dir) not in sys.path:
+    sys.path.insert(0, str(backend_dir))
+
+from core.settings import settings
+from core.model_registry import ModelBundle
+
+
+def time_calls(fn, iters: int, warmup: int = 200):
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(iters):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1e6)
+    samples.sort()
+    return {"mean": statistics.fmean(samples), "p50": samples[len(samples) // 2]}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iters", type=int, default=20000)
+    parser.add_argument("--batch", type=int, default=1)
+    parser.add_argument("--frames", type=int, default=50)
+    args = parser.parse_args()
+
+    with open(settings.SCALER_PATH, "rb") as f:
+        scaler = pickle.load(f)
+    with open(settings.ENCODER_PATH, "rb") as f:
+        label_encoder = pickle.load(f)
+    bundle = ModelBundle(None, scaler, label_encoder)
+
+    rng = np.random.default_rng(0)
+    batch = (rng.random((args.batch, args.frames, settings.TOTAL_SENSORS)) * 4000).astype(np.float32)
+    proba = rng.random((args.batch, len(bundle.classes))).astype(np.float32)
+
+    def sklearn_path():
+        scaled = scaler.transform(batch.reshape(-1, batch.shape[-1])).astype(np.float32).reshape(batch.shape)
+        labels = [label_encoder.inverse_transform([int(np.argmax(row))])[0] for row in proba]
+        return scaled, labels
+
+    def vectorized_path():
+        scaled = bundle.scale(batch)
+        labels = [bundle.decode(i) for i in proba.argmax(axis=1).tolist()]
+        return scaled, labels
+
+    (ref_scaled, ref_labels), (vec_scaled, vec_labels) = sklearn_path(), vectorized_path()
+    diff = float(np.abs(ref_scaled - vec_scaled).max())
+    print(f"input {batch.shape}: max |sklearn - vectorized| = {diff:.2e}, labels equal: {ref_labels == vec_labels}")
+
+    results = {
+        "sklearn": time_calls(sklearn_path, args.iters),
+        "vectorized": time_calls(vectorized_path, args.iters),
+    }
+    print(f"{'path':<12}{'mean us':>10}{'p50 us':>10}")
+    for name, r in results.items():
+        print(f"{name:<12}{r['mean']:>10.1f}{r['p50']:>10.1f}")
+    print(f"Speedup (p50): {results['sklearn']['p50'] / results['vectorized']['p50']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
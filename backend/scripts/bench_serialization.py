@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Benchmark response serialization before/after core.serialization on the two hot
+paths:
+
+  /gestures      FastAPI default (jsonable_encoder + JSONResponse) vs returning a
+                 FastJSONResponse, measured in-process through the ASGI app
+  predict_ws     the per-tick broadcast message and a prediction result, stdlib
+                 json.dumps (WebSocket.send_json) vs dumps_str
+
+Usage:
+  python backend/scripts/bench_serialization.py
+  python backend/scripts/bench_serialization.py --sessions 5000 --iters 2000
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict
+
+# Ensure backend dir is on sys.path so 'core' absolute imports work
+backend_dir = Path(__file__).resolve().parents[1]
+if str(backend_dir) not in sys.path:
+    sys.path.insert(0, str(backend_dir))
+
+import httpx
+from bson import ObjectId
+from fastapi import FastAPI
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from core.serialization import HAS_ORJSON, FastJSONResponse, dumps_str
+
+
+def time_calls(fn, iters: int, warmup: int = 50):
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(iters):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1e6)
+    samples.sort()
+    return {"mean": statistics.fmean(samples), "p50": samples[len(samples) // 2]}
+
+
+async def time_requests(client: httpx.AsyncClient, url: str, iters: int, warmup: int = 20):
+    for _ in range(warmup):
+        (await client.get(url)).raise_for_status()
+    samples = []
+    for _ in range(iters):
+        start = time.perf_counter()
+        (await client.get(url)).raise_for_status()
+        samples.append((time.perf_counter() - start) * 1e6)
+    samples.sort()
+    return {"mean": statistics.fmean(samples), "p50": samples[len(samples) // 2]}
+
+
+def report(title: str, results: Dict[str, Dict[str, float]]):
+    print(f"\n{title}")
+    print(f"  {'path':<22}{'mean us':>10}{'p50 us':>10}")
+    for name, r in results.items():
+        print(f"  {name:<22}{r['mean']:>10.1f}{r['p50']:>10.1f}")
+    before, after = list(results.values())
+    print(f"  Speedup (p50): {before['p50'] / after['p50']:.1f}x")
+
+
+def build_app(sessions: list, session_doc: dict) -> FastAPI:
+    """The /gestures handlers as before (dicts) and after (FastJSONResponse)."""
+    app = FastAPI()
+    legacy_doc = dict(session_doc, _id=str(session_doc["_id"]))
+
+    @app.get("/before/gestures")
+    async def list_before() -> Dict[str, Any]:
+        return {"status": "success", "data": sessions, "message": "All gestures retrieved"}
+
+    @app.get("/after/gestures")
+    async def list_after() -> Dict[str, Any]:
+        return FastJSONResponse({"status": "success", "data": sessions, "message": "All gestures retrieved"})
+
+    @app.get("/before/gestures/s")
+    async def get_before() -> Dict[str, Any]:
+        return {"status": "success", "data": legacy_doc, "message": "Session data retrieved"}
+
+    @app.get("/after/gestures/s")
+    async def get_after() -> Dict[str, Any]:
+        return FastJSONResponse({"status": "success", "data": session_doc, "message": "Session data retrieved"})
+
+    return app
+
+
+async def bench_rest(args, sessions, session_doc):
+    app = build_app(sessions, session_doc)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for path, label in (("/gestures", f"GET /gestures ({len(sessions)} sessions)"),
+                            ("/gestures/s", "GET /gestures/{session_id}")):
+            before = (await client.get(f"/before{path}")).json()
+            after = (await client.get(f"/after{path}")).json()
+            assert before == after, f"{path}: responses differ"
+            report(label, {
+                "default JSONResponse": await time_requests(client, f"/before{path}", args.iters),
+                "FastJSONResponse": await time_requests(client, f"/after{path}", args.iters),
+            })
+
+    listing = {"status": "success", "data": sessions, "message": "All gestures retrieved"}
+    report(f"/gestures encode only, unannotated route ({len(sessions)} sessions)", {
+        "jsonable_encoder+json": time_calls(lambda: JSONResponse(jsonable_encoder(listing)).body, args.iters),
+        "FastJSONResponse": time_calls(lambda: FastJSONResponse(listing).body, args.iters),
+    })
+
+
+def bench_ws(args):
+    frames = [[round(512.0 + i + j * 0.25, 2) for j in range(11)] for i in range(args.frames)]
+    broadcast = {"prediction": "Hello", "values": frames[-1], "frames": frames, "session_id": "glove-1"}
+    result = {"status": "success", "prediction": "Hello", "confidence": 0.9731, "runtime": "keras-compiled"}
+
+    def stdlib(message):
+        return json.dumps(message, separators=(",", ":"), ensure_ascii=False)
+
+    assert json.loads(stdlib(broadcast)) == json.loads(dumps_str(broadcast))
+    report(f"predict_ws broadcast ({args.frames} frames)", {
+        "json.dumps": time_calls(lambda: stdlib(broadcast), args.iters * 5),
+        "dumps_str": time_calls(lambda: dumps_str(broadcast), args.iters * 5),
+    })
+    report("predict_ws prediction result", {
+        "json.dumps": time_calls(lambda: stdlib(result), args.iters * 5),
+        "dumps_str": time_calls(lambda: dumps_str(result), args.iters * 5),
+    })
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=1000, help="rows in the /gestures listing (route caps at 1000)")
+    parser.add_argument("--frames", type=int, default=50, help="frames in one broadcast message")
+    parser.add_argument("--iters", type=int, default=1000)
+    args = parser.parse_args()
+
+    print(f"encoder: {'orjson' if HAS_ORJSON else 'stdlib json (orjson not installed)'}")
+    sessions = [{"session_id": f"session_{i:05d}", "gesture_label": "Hello"} for i in range(args.sessions)]
+    session_doc = {
+        "_id": ObjectId(),
+        "session_id": "session_00001",
+        "timestamp": datetime.now(timezone.utc),
+        "values": [512.0 + j for j in range(11)],
+        "label": "Hello",
+        "source": "glove",
+    }
+    asyncio.run(bench_rest(args, sessions, session_doc))
+    bench_ws(args)
+
+
+if __name__ == "__main__":
+    main()
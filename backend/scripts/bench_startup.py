@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Benchmark backend startup: time to import the app module (what uvicorn blocks on
+before serving) and time until the gesture model is loaded and warmed up, each in a
+fresh interpreter.
+
+Usage:
+  python backend/scripts/bench_startup.py                       # import main, default runtime
+  python backend/scripts/bench_startup.py --runtime keras --repeat 5
+  python backend/scripts/bench_startup.py --module core.model   # without the app's routes
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+backend_dir = Path(__file__).resolve().parents[1]
+
+PROBE = r"""
+import asyncio, json, sys, time
+start = time.perf_counter()
+__import__({module!r})
+import_ms = (time.perf_counter() - start) * 1000.0
+tf_at_import = "tensorflow" in sys.modules
+
+from core.model import model_registry
+start = time.perf_counter()
+asyncio.run(model_registry.reload("startup"))
+ready_ms = (time.perf_counter() - start) * 1000.0
+print(json.dumps({{
+    "import_ms": import_ms,
+    "ready_ms": ready_ms,
+    "tf_at_import": tf_at_import,
+    "tf_loaded": "tensorflow" in sys.modules,
+    "runtime": model_registry.get_stats()["runtime"],
+}}))
+"""
+
+
+def run_once(module: str, runtime: str) -> dict:
+    env = os.environ.copy()
+    env["INFERENCE_RUNTIME"] = runtime
+    env["MODEL_RELOAD_POLL_S"] = "0"
+    env.setdefault("TF_CPP_MIN_LOG_LEVEL", "3")
+    proc = subprocess.run(
+        [sys.executable, "-c", PROBE.format(module=module)],
+        cwd=backend_dir, env=env, capture_output=True, text=True,
+    )
+    if proc.returncode != 0:
+        raise SystemExit(f"Probe failed:\n{proc.stderr[-2000:]}")
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--module", default="main", help="module uvicorn imports (default: main)")
+    parser.add_argument("--runtime", default="auto", choices=["auto", "tflite", "keras"])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    runs = [run_once(args.module, args.runtime) for _ in range(args.repeat)]
+    last = runs[-1]
+    print(f"module={args.module} runtime={last['runtime']} "
+          f"tensorflow imported at app import: {last['tf_at_import']}, after load: {last['tf_loaded']}")
+    for key, label in (("import_ms", "app import (blocks serving)"), ("ready_ms", "model load + warmup (background)")):
+        samples = [r[key] for r in runs]
+        print(f"{label:<36}median {statistics.median(samples):9.1f} ms   min {min(samples):9.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Move legacy one-document-per-frame sensor_data rows into sensor_buckets.
+
+Per-frame rows are the documents holding a single frame under "values" or
+"combined_values" (collect_data.py, collect_dual_hand_data.py, CSV uploads).
+Session documents (sensor_values batches) are left where they are. Sessions
+are migrated one at a time: buckets are inserted, then the rows they replace
+are deleted.
+
+Usage:
+  python backend/scripts/migrate_sensor_buckets.py            # report what would move
+  python backend/scripts/migrate_sensor_buckets.py --apply    # migrate
+"""
+import asyncio
+import sys
+from pathlib import Path
+
+# Ensure backend dir is on sys.path so 'core' absolute imports work
+backend_dir = Path(__file__).resolve().parents[1]
+if str(backend_dir) not in sys.path:
+    sys.path.insert(0, str(backend_dir))
+
+try:
+    # Import backend modules (match runtime import style)
+    from core.database import sensor_collection, sensor_bucket_collection
+    from core.sensor_buckets import make_buckets
+    from core.training_store import record_change
+except Exception as e:
+    print(f"Failed to import backend modules: {e}")
+    sys.exit(1)
+
+PER_FRAME_QUERY = {
+    "sensor_values": {"$exists": False},
+    "$or": [{"values.0": {"$exists": True}}, {"combined_values.0": {"$exists": True}}],
+}
+
+
+async def migrate_session(session_id, apply: bool):
+    query = {**PER_FRAME_QUERY, "session_id": session_id}
+    rows = await sensor_collection.find(query).sort("timestamp", 1).to_list(None)
+    buckets = make_buckets(rows)
+    if apply and buckets:
+        await sensor_bucket_collection.insert_many(buckets, ordered=False)
+        await sensor_collection.delete_many({"_id": {"$in": [row["_id"] for row in rows]}})
+        await record_change("migrate", session_id)  # frames now live under new ids
+    return len(rows), len(buckets)
+
+
+async def main():
+    apply = "--apply" in sys.argv
+    sessions = await sensor_collection.distinct("session_id", PER_FRAME_QUERY)
+    if not sessions:
+        print("No per-frame sensor documents found.")
+        return 0
+
+    total_rows = total_buckets = 0
+    for session_id in sessions:
+        rows, buckets = await migrate_session(session_id, apply)
+        total_rows += rows
+        total_buckets += buckets
+        print(f"- {session_id}: {rows} rows -> {buckets} buckets")
+
+    print("\nSummary:")
+    print(f"- Sessions: {len(sessions)}")
+    print(f"- Documents: {total_rows} -> {total_buckets}")
+    if not apply:
+        print("\nDry run; pass --apply to migrate.")
+    return 0
+
+
+if __name__ == "__main__":
+    try:
+        exit(asyncio.run(main()))
+    except KeyboardInterrupt:
+        print("\nAborted")
+        sys.exit(130)
@@ -0,0 +1,51 @@
+"""
+Encode CSV from an async row source in bounded chunks, for StreamingResponse.
+
+Rows are written into a small text buffer that is encoded (and optionally
+gzip-compressed) and handed out every chunk_bytes, so memory stays constant
+however many rows the source yields.
+"""
+import csv
+import io
+import zlib
+from typing import Any, AsyncIterator, Callable, Iterable, Optional
+
+CHUNK_BYTES = 64 * 1024
+
+
+async def csv_chunks(header: Iterable[Any], rows: AsyncIterator[Any], to_row: Callable[[Any], Iterable[Any]],
+                     compress: bool = False, chunk_bytes: int = CHUNK_BYTES,
+                     stats: Optional[dict] = None) -> AsyncIterator[bytes]:
+    """
+    Yield encoded CSV: the header, then to_row(row) for every row. compress=True
+    produces a single gzip stream. `stats`, if given, receives "rows" and "bytes".
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    gzip = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS) if compress else None
+    stats = stats if stats is not None else {}
+    stats.update(rows=0, bytes=0)
+
+    def drain() -> bytes:
+        data = buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+        if gzip is not None:
+            data = gzip.compress(data)
+        stats["bytes"] += len(data)
+        return data
+
+    writer.writerow(header)
+    async for row in rows:
+        writer.writerow(to_row(row))
+        stats["rows"] += 1
+        if buffer.tell() >= chunk_bytes:
+            chunk = drain()
+            if chunk:  # gzip may hold everything back until it has a full block
+                yield chunk
+    tail = drain()
+    if gzip is not None:
+        trailer = gzip.flush()
+        stats["bytes"] += len(trailer)
+        tail += trailer
+    yield tail
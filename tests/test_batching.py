@@ -0,0 +1,137 @@
+"""
+Unit tests for the inference micro-batching scheduler.
+"""
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'backend')))
+import asyncio
+import numpy as np
+import pytest
+from core.batching import MicroBatcher, Histogram, InferenceBusyError
+
+pytestmark = pytest.mark.unit
+
+
+def make_forward(calls):
+    def forward(batch):
+        calls.append(batch.shape)
+        # One "probability" row per sequence: echo the first value of each sequence
+        return batch[:, 0, :2].copy()
+    return forward
+
+
+class TestHistogram:
+    def test_observe_and_snapshot(self):
+        hist = Histogram([1, 5, 10])
+        for value in (0.5, 3, 3, 20):
+            hist.observe(value)
+        snap = hist.snapshot()
+        assert snap["count"] == 4
+        assert snap["buckets"]["le_1"] == 1
+        assert snap["buckets"]["le_5"] == 3
+        assert snap["buckets"]["le_10"] == 3
+        assert snap["buckets"]["le_inf"] == 4
+
+
+class TestMicroBatcher:
+    @pytest.mark.asyncio
+    async def test_concurrent_requests_share_one_forward_pass(self):
+        calls = []
+        batcher = MicroBatcher(make_forward(calls), max_batch_size=8, max_wait_ms=20)
+        seqs = [np.full((50, 11), i, dtype=np.float32) for i in range(5)]
+        results = await asyncio.gather(*(batcher.submit(s) for s in seqs))
+        await batcher.close()
+
+        assert calls == [(5, 50, 11)]
+        assert [float(r[0]) for r in results] == [0, 1, 2, 3, 4]
+        stats = batcher.get_stats()
+        assert stats["batches_run"] == 1
+        assert stats["requests_served"] == 5
+        assert stats["batch_size"]["count"] == 1
+
+    @pytest.mark.asyncio
+    async def test_sequences_bucketed_by_length(self):
+        calls = []
+        batcher = MicroBatcher(make_forward(calls), max_batch_size=8, max_wait_ms=20)
+        seqs = [np.zeros((50, 11), np.float32), np.zeros((30, 11), np.float32), np.ones((50, 11), np.float32)]
+        results = await asyncio.gather(*(batcher.submit(s) for s in seqs))
+        await batcher.close()
+
+        assert sorted(calls) == [(1, 30, 11), (2, 50, 11)]
+        assert [float(r[0]) for r in results] == [0, 0, 1]
+
+    @pytest.mark.asyncio
+    async def test_max_batch_size_splits_batches(self):
+        calls = []
+        batcher = MicroBatcher(make_forward(calls), max_batch_size=2, max_wait_ms=20)
+        seqs = [np.zeros((10, 11), np.float32) for _ in range(5)]
+        await asyncio.gather(*(batcher.submit(s) for s in seqs))
+        await batcher.close()
+
+        assert [c[0] for c in calls] == [2, 2, 1]
+
+    @pytest.mark.asyncio
+    async def test_forward_error_propagates_to_callers(self):
+        def failing(batch):
+            raise RuntimeError("boom")
+        batcher = MicroBatcher(failing, max_batch_size=4, max_wait_ms=1)
+        with pytest.raises(RuntimeError):
+            await batcher.submit(np.zeros((50, 11), np.float32))
+        await batcher.close()
+
+    @pytest.mark.asyncio
+    async def test_forward_runs_on_executor_thread(self):
+        import threading
+        from concurrent.futures import ThreadPoolExecutor
+        threads = []
+
+        def forward(batch):
+            threads.append(threading.current_thread().name)
+            return batch[:, 0, :2].copy()
+
+        executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="inference")
+        batcher = MicroBatcher(forward, max_batch_size=4, max_wait_ms=1, executor=executor)
+        await batcher.submit(np.zeros((50, 11), np.float32))
+        await batcher.close()
+        executor.shutdown()
+
+        assert threads and threads[0].startswith("inference")
+
+    @pytest.mark.asyncio
+    async def test_full_queue_raises_busy(self):
+        calls = []
+        batcher = MicroBatcher(make_forward(calls), max_batch_size=8, max_wait_ms=20, max_pending=2)
+        seqs = [np.zeros((50, 11), np.float32) for _ in range(3)]
+        results = await asyncio.gather(*(batcher.submit(s) for s in seqs), return_exceptions=True)
+        await batcher.close()
+
+        assert isinstance(results[2], InferenceBusyError)
+        assert batcher.get_stats()["rejected"] == 1
+        assert batcher.pending == 0
+
+    @pytest.mark.asyncio
+    async def test_close_finishes_in_flight_batches_and_fails_queued_requests(self):
+        import threading
+        from concurrent.futures import ThreadPoolExecutor
+        release = threading.Event()
+
+        def slow_forward(batch):
+            release.wait(5)
+            return batch[:, 0, :2].copy()
+
+        executor = ThreadPoolExecutor(max_workers=1)
+        batcher = MicroBatcher(slow_forward, max_batch_size=1, max_wait_ms=0, executor=executor)
+        in_flight = asyncio.ensure_future(batcher.submit(np.ones((50, 11), np.float32)))
+        queued = asyncio.ensure_future(batcher.submit(np.zeros((50, 11), np.float32)))
+        await asyncio.sleep(0.05)  # the first batch is running, the second waits for a slot
+
+        closing = asyncio.ensure_future(batcher.close())
+        await asyncio.sleep(0.01)
+        assert not closing.done()  # close() waits for the running batch
+        release.set()
+        await closing
+        executor.shutdown()
+
+        assert float((await in_flight)[0]) == 1.0
+        with pytest.raises(RuntimeError, match="closed"):
+            await queued
@@ -0,0 +1,120 @@
+"""
+Unit tests for the pub/sub WebSocket broadcaster.
+"""
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'backend')))
+import asyncio
+import json
+import pytest
+from core.broadcaster import Broadcaster
+import core.broadcaster as broadcaster_module
+
+pytestmark = pytest.mark.unit
+
+
+class RecordingWebSocket:
+    def __init__(self, fail=False, delay=0.0):
+        self.sent = []
+        self.fail = fail
+        self.delay = delay
+        self.closed_with = None
+
+    async def accept(self, subprotocol=None):
+        pass
+
+    async def send_text(self, text):
+        if self.fail:
+            raise RuntimeError("socket closed")
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        self.sent.append(json.loads(text))
+
+    async def close(self, code=1000):
+        self.closed_with = code
+
+
+class TestBroadcaster:
+    @pytest.mark.asyncio
+    async def test_updates_within_a_tick_become_one_message(self):
+        hub = Broadcaster(tick_s=0.05)
+        ws = RecordingWebSocket()
+        await hub.connect(ws)
+        hub.publish("s1", "Hello", [[1.0], [2.0]])
+        await asyncio.sleep(0.01)          # first update goes out immediately
+        for i in range(3, 8):
+            hub.publish("s1", "We", [[float(i)]])
+        await asyncio.sleep(0.08)
+        await hub.close()
+
+        assert len(ws.sent) == 2
+        assert ws.sent[0]["frames"] == [[1.0], [2.0]]
+        assert ws.sent[1] == {
+            "prediction": "We",
+            "values": [7.0],
+            "frames": [[3.0], [4.0], [5.0], [6.0], [7.0]],
+            "session_id": "s1",
+        }
+        assert hub.updates_coalesced == 4
+
+    @pytest.mark.asyncio
+    async def test_serializes_once_per_message(self, monkeypatch):
+        calls = []
+        real = broadcaster_module.serialize
+        monkeypatch.setattr(broadcaster_module, "serialize", lambda m: calls.append(m) or real(m))
+        hub = Broadcaster(tick_s=0.01)
+        clients = [RecordingWebSocket() for _ in range(5)]
+        for ws in clients:
+            await hub.connect(ws)
+        hub.publish("a", "Hello", [[1.0]])
+        hub.publish("b", "We", [[2.0]])
+        await asyncio.sleep(0.02)
+        await hub.close()
+
+        assert len(calls) == 2
+        for ws in clients:
+            assert {m["session_id"]: m["prediction"] for m in ws.sent} == {"a": "Hello", "b": "We"}
+
+    @pytest.mark.asyncio
+    async def test_slow_client_drops_without_stalling_others(self):
+        hub = Broadcaster(tick_s=0.001, queue_size=2, send_timeout_s=5.0)
+        fast, slow = RecordingWebSocket(), RecordingWebSocket(delay=0.2)
+        await hub.connect(fast)
+        await hub.connect(slow)
+        for i in range(10):
+            hub.publish("s", "U", [[float(i)]])
+            await asyncio.sleep(0.005)
+        await asyncio.sleep(0.01)
+
+        assert len(fast.sent) == 10
+        assert hub.get_stats()["dropped"] > 0
+        await hub.close()
+
+    @pytest.mark.asyncio
+    async def test_stalled_client_is_disconnected(self):
+        hub = Broadcaster(tick_s=0.001, send_timeout_s=0.02)
+        stalled = RecordingWebSocket(delay=1.0)
+        await hub.connect(stalled)
+        hub.publish("s", "U", [[1.0]])
+        await asyncio.sleep(0.05)
+        hub.flush()  # prunes the closed subscriber
+
+        assert stalled.closed_with == 1008
+        assert hub.get_stats()["subscribers"] == 0
+        assert hub.get_stats()["slow_disconnects"] == 1
+        await hub.close()
+
+    @pytest.mark.asyncio
+    async def test_send_to_reaches_one_client_and_frames_are_bounded(self):
+        hub = Broadcaster(tick_s=0.01, max_frames=3)
+        a, b = RecordingWebSocket(), RecordingWebSocket()
+        await hub.connect(a)
+        await hub.connect(b)
+        hub.send_to(a, {"status": "busy", "session_id": "s"})
+        hub.publish("s", "U", [[float(i)] for i in range(10)])
+        await asyncio.sleep(0.02)
+        await hub.close()
+
+        assert a.sent[0]["status"] == "busy"
+        assert all(m.get("status") != "busy" for m in b.sent)
+        assert b.sent[0]["frames"] == [[7.0], [8.0], [9.0]]
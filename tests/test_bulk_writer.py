@@ -0,0 +1,108 @@
+"""
+Unit tests for the buffered bulk writer used for sensor ingestion.
+"""
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'backend')))
+import asyncio
+import pytest
+from pymongo.errors import AutoReconnect, BulkWriteError
+from core.bulk_writer import BulkWriter, IngestError
+
+pytestmark = pytest.mark.unit
+
+
+class FakeCollection:
+    """insert_many that records batches; `failures` is consumed one entry per call."""
+
+    def __init__(self, failures=(), delay=0.0):
+        self.batches = []
+        self.stored = {}
+        self.failures = list(failures)
+        self.delay = delay
+
+    async def insert_many(self, docs, ordered=True):
+        assert ordered is False
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        failure = self.failures.pop(0) if self.failures else None
+        if failure == "lost_reply":  # written, but the acknowledgement never arrived
+            self.stored.update((d["_id"], d) for d in docs)
+            raise AutoReconnect("connection reset")
+        if isinstance(failure, Exception):
+            raise failure
+        errors = [{"index": i, "code": 11000, "errmsg": "E11000 duplicate key"}
+                  for i, d in enumerate(docs) if d["_id"] in self.stored]
+        self.batches.append(len(docs))
+        self.stored.update((d["_id"], d) for d in docs)
+        if errors:
+            raise BulkWriteError({"writeErrors": errors, "nInserted": len(docs) - len(errors)})
+
+
+def writer_for(collection, **kwargs):
+    kwargs.setdefault("flush_interval_ms", 10_000)
+    return BulkWriter(collection, "test", retry_backoff=0.001, **kwargs)
+
+
+class TestBulkWriter:
+    @pytest.mark.asyncio
+    async def test_flushes_full_batches_then_the_rest_on_flush(self):
+        collection = FakeCollection()
+        writer = writer_for(collection, batch_size=3)
+        ids = [await writer.put({"n": i}) for i in range(7)]
+        await asyncio.sleep(0.01)
+        assert collection.batches == [3, 3]  # the partial batch waits for the interval
+
+        await writer.flush()
+        assert collection.batches == [3, 3, 1]
+        assert list(collection.stored) == ids
+        stats = writer.get_stats()
+        assert stats["written"] == 7 and stats["pending"] == 0 and stats["batches"] == 3
+        await writer.close()
+
+    @pytest.mark.asyncio
+    async def test_partial_batch_written_after_flush_interval(self):
+        collection = FakeCollection()
+        writer = writer_for(collection, batch_size=100, flush_interval_ms=20)
+        doc_id = await asyncio.wait_for(writer.write({"n": 1}), 1.0)
+        assert collection.batches == [1] and doc_id in collection.stored
+        await writer.close()
+
+    @pytest.mark.asyncio
+    async def test_transient_failures_are_retried_without_duplicates(self):
+        collection = FakeCollection(failures=["lost_reply", AutoReconnect("primary stepped down")])
+        writer = writer_for(collection, batch_size=2)
+        results = await asyncio.gather(writer.write({"n": 1}), writer.write({"n": 2}))
+        assert len(collection.stored) == 2 and set(results) == set(collection.stored)
+        stats = writer.get_stats()
+        assert stats["retries"] == 2 and stats["written"] == 2 and stats["failed"] == 0
+        await writer.close()
+
+    @pytest.mark.asyncio
+    async def test_gives_up_after_retries(self):
+        collection = FakeCollection(failures=[AutoReconnect("down")] * 3)
+        writer = writer_for(collection, batch_size=1, retries=2)
+        with pytest.raises(IngestError):
+            await writer.write({"n": 1})
+        assert writer.get_stats()["failed"] == 1 and writer.pending == 0
+        await writer.close()
+
+    @pytest.mark.asyncio
+    async def test_full_buffer_makes_producers_wait(self):
+        collection = FakeCollection(delay=0.05)
+        writer = writer_for(collection, batch_size=2, max_pending=2, flush_interval_ms=0)
+        await asyncio.gather(*(writer.put({"n": i}) for i in range(6)))
+        assert writer.get_stats()["backpressure_waits"] > 0
+        await writer.close()  # flushes everything still buffered
+        assert len(collection.stored) == 6
+
+    def test_background_thread_for_sync_producers(self):
+        collection = FakeCollection()
+        writer = writer_for(collection, batch_size=4)
+        writer.start_background()
+        for i in range(5):
+            writer.submit({"n": i}, timeout=1)
+        writer.flush_sync(timeout=1)
+        assert collection.batches == [4, 1]
+        writer.close_sync(timeout=1)
+        assert writer._thread is None
@@ -0,0 +1,97 @@
+"""
+Unit tests for the streaming CSV export: chunked encoding and filtered row reads.
+"""
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'backend')))
+import csv
+import gzip
+import io
+from datetime import datetime, timedelta, timezone
+import pytest
+import core.sensor_buckets as sensor_buckets
+from core.sensor_buckets import iter_rows, make_buckets
+from utils.csv_stream import csv_chunks
+
+pytestmark = pytest.mark.unit
+
+T0 = datetime(2025, 7, 1, 12, 0, 0)
+
+
+async def arange(n):
+    for i in range(n):
+        yield i
+
+
+async def collect(chunks):
+    return [chunk async for chunk in chunks]
+
+
+class FakeCursor:
+    def __init__(self, docs):
+        self.docs = docs
+
+    def sort(self, *args):
+        return self
+
+    def batch_size(self, n):
+        return self
+
+    def __aiter__(self):
+        return self._iter()
+
+    async def _iter(self):
+        for doc in self.docs:
+            yield doc
+
+
+class FakeCollection:
+    def __init__(self, docs):
+        self.docs = docs
+        self.queries = []
+
+    def find(self, query=None, projection=None):
+        self.queries.append((query, projection))
+        return FakeCursor(self.docs)
+
+
+class TestCsvChunks:
+    @pytest.mark.asyncio
+    async def test_rows_are_split_into_bounded_chunks(self):
+        stats = {}
+        chunks = await collect(csv_chunks(["n", "square"], arange(5000), lambda i: [i, i * i],
+                                          chunk_bytes=4096, stats=stats))
+        assert len(chunks) > 10
+        assert max(len(c) for c in chunks) < 4096 + 64
+        rows = list(csv.reader(io.StringIO(b"".join(chunks).decode())))
+        assert rows[0] == ["n", "square"] and rows[-1] == ["4999", str(4999 * 4999)]
+        assert stats["rows"] == 5000 and stats["bytes"] == sum(map(len, chunks))
+
+    @pytest.mark.asyncio
+    async def test_gzip_is_one_valid_stream(self):
+        stats = {}
+        chunks = await collect(csv_chunks(["n"], arange(20000), lambda i: [i], compress=True,
+                                          chunk_bytes=1024, stats=stats))
+        text = gzip.decompress(b"".join(chunks)).decode()
+        assert text.splitlines()[1:] == [str(i) for i in range(20000)]
+        assert stats["bytes"] == sum(map(len, chunks))
+
+
+class TestIterRowsFilters:
+    @pytest.mark.asyncio
+    async def test_time_window_clips_buckets_and_filters_legacy(self, monkeypatch):
+        rows = [{"session_id": "s", "label": "A", "values": [i] * 11, "timestamp": T0 + timedelta(seconds=i)}
+                for i in range(10)]
+        legacy = FakeCollection([{"values": [99] * 11, "label": "A", "timestamp": T0}])
+        buckets = FakeCollection(make_buckets(rows, bucket_size=4))
+        monkeypatch.setattr(sensor_buckets, "sensor_collection", legacy)
+        monkeypatch.setattr(sensor_buckets, "sensor_bucket_collection", buckets)
+
+        start = (T0 + timedelta(seconds=3)).replace(tzinfo=timezone.utc)
+        end = T0 + timedelta(seconds=7)
+        got = [row async for row in iter_rows({"label": "A"}, start=start, end=end, projection={"_id": 0})]
+
+        assert [row["values"][0] for row in got] == [99, 3, 4, 5, 6]  # legacy first, then clipped buckets
+        naive_start = T0 + timedelta(seconds=3)
+        assert legacy.queries == [({"label": "A", "timestamp": {"$gte": naive_start, "$lt": end}}, {"_id": 0})]
+        assert buckets.queries == [({"label": "A", "end": {"$gte": naive_start}, "start": {"$lt": end}}, None)]
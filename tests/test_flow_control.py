@@ -0,0 +1,76 @@
+"""
+Unit tests for collector -> backend credit flow control and latency accounting.
+"""
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'backend')))
+import asyncio
+import time
+import pytest
+from ingestion.streaming.flow_control import CreditWindow, LatencyStats
+
+pytestmark = pytest.mark.unit
+
+
+class TestCreditWindow:
+    @pytest.mark.asyncio
+    async def test_blocks_at_credit_limit_until_acked(self):
+        flow = CreditWindow(credits=2)
+        t_read = time.monotonic()
+        seqs = []
+        for _ in range(2):
+            await flow.acquire()
+            seqs.append(flow.register(t_read))
+        assert seqs == [1, 2]
+
+        waiter = asyncio.create_task(flow.acquire())
+        await asyncio.sleep(0.01)
+        assert not waiter.done()
+
+        assert flow.ack({"type": "ack", "seq": 1, "status": "success", "credits": 2})
+        await asyncio.wait_for(waiter, 0.5)
+        stats = flow.get_stats()
+        assert stats["acked"] == 1 and stats["in_flight"] == 1
+        assert stats["end_to_end"]["count"] == 1
+
+    @pytest.mark.asyncio
+    async def test_backend_credits_and_busy_shrink_the_window(self):
+        flow = CreditWindow(credits=4)
+        flow.register(time.monotonic())
+        flow.ack({"type": "ack", "seq": 1, "status": "busy", "credits": 1})
+        assert flow.credits == 1 and flow.busy == 1
+
+        flow.register(time.monotonic())
+        waiter = asyncio.create_task(flow.acquire())
+        await asyncio.sleep(0.01)
+        assert not waiter.done()
+        waiter.cancel()
+
+    @pytest.mark.asyncio
+    async def test_lost_ack_frees_its_credit_after_timeout(self):
+        flow = CreditWindow(credits=1, ack_timeout=0.05)
+        flow.register(time.monotonic())
+        await asyncio.wait_for(flow.acquire(), 0.5)
+        assert flow.get_stats()["ack_timeouts"] == 1
+        assert not flow.ack({"type": "ack", "seq": 1, "credits": 1})  # late ack is ignored
+
+    def test_reset_forgets_in_flight_and_seq_wraps(self):
+        flow = CreditWindow(credits=3)
+        flow.next_seq = 0xFFFFFFFF
+        assert flow.register(0.0) == 0xFFFFFFFF
+        assert flow.register(0.0) == 1
+        flow.reset()
+        assert flow.get_stats()["in_flight"] == 0
+
+
+class TestLatencyStats:
+    def test_summary_in_milliseconds(self):
+        stats = LatencyStats()
+        for ms in range(1, 101):
+            stats.add(ms / 1000)
+        summary = stats.summary()
+        assert summary["count"] == 100
+        assert summary["p50_ms"] == 51.0
+        assert summary["p95_ms"] == 96.0
+        assert summary["max_ms"] == 100.0
+        assert LatencyStats().summary()["p50_ms"] is None
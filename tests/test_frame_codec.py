@@ -0,0 +1,51 @@
+"""
+Unit tests for the binary glove frame protocol.
+"""
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'backend')))
+import json
+import numpy as np
+import pytest
+from ingestion.streaming.frame_codec import (
+    FrameCodecError, HEADER_SIZE, decode_frames, encode_frames,
+)
+
+pytestmark = pytest.mark.unit
+
+
+class TestFrameCodec:
+    def test_float32_round_trip(self):
+        frames = np.random.default_rng(0).random((50, 11)).astype(np.float32) * 4000
+        data = encode_frames(frames, session_id="glove-1", seq=7)
+        assert len(data) == HEADER_SIZE + len("glove-1") + 50 * 11 * 4
+
+        block = decode_frames(data)
+        assert block.session_id == "glove-1"
+        assert block.seq == 7
+        assert block.frames.dtype == np.float32
+        np.testing.assert_array_equal(block.frames, frames)
+
+    def test_int16_with_scale(self):
+        frames = [[1.5, -2.25, 300.0], [0.0, 10.0, -300.0]]
+        block = decode_frames(encode_frames(frames, dtype="int16", scale=0.25))
+        np.testing.assert_allclose(block.frames, frames)
+
+    def test_single_frame_and_list_input(self):
+        block = decode_frames(encode_frames([1.0] * 11))
+        assert block.frames.shape == (1, 11)
+
+    def test_smaller_than_json(self):
+        frames = np.random.default_rng(1).random((50, 11)) * 4000
+        binary = encode_frames(frames, session_id="demo")
+        text = json.dumps({"sensor_values": frames.tolist(), "session_id": "demo"})
+        assert len(binary) * 3 < len(text)
+
+    @pytest.mark.parametrize("data", [
+        b"",
+        b"XX" + bytes(20),
+        encode_frames([[1.0, 2.0]])[:-1],
+    ])
+    def test_malformed_messages_raise(self, data):
+        with pytest.raises(FrameCodecError):
+            decode_frames(data)
@@ -0,0 +1,87 @@
+"""
+Unit tests for the per-device latest-sample store behind /gesture/latest.
+"""
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'backend')))
+import asyncio
+import threading
+import pytest
+from ingestion.streaming.live_data import LatestSampleStore, get_latest_data, update_data
+
+pytestmark = pytest.mark.unit
+
+
+class TestLatestSampleStore:
+    def test_latest_per_device_and_since(self):
+        store = LatestSampleStore()
+        assert store.get() is None
+        store.update("left", [1.0] * 11)
+        seq = store.update("right", [2.0] * 11)
+        store.update("left", [3.0] * 11)
+
+        assert store.get("right").values == [2.0] * 11
+        assert store.get().device == "left" and store.get().values == [3.0] * 11
+        assert [s.device for s in store.since(0)] == ["right", "left"]
+        assert [s.device for s in store.since(seq)] == ["left"]
+
+    def test_width_change_reallocates_slot(self):
+        store = LatestSampleStore()
+        store.update("a", [1.0] * 11)
+        store.update("a", [1.0, 2.0])
+        assert store.get("a").values == [1.0, 2.0]
+
+    def test_readers_never_see_torn_frames(self):
+        store = LatestSampleStore()
+        stop = threading.Event()
+
+        def writer(device):
+            i = 0
+            while not stop.is_set():
+                store.update(device, [float(i)] * 256)
+                i += 1
+
+        threads = [threading.Thread(target=writer, args=(d,)) for d in ("a", "b")]
+        for t in threads:
+            t.start()
+        try:
+            for _ in range(2000):
+                for sample in store.since(0):
+                    assert len(set(sample.values)) == 1
+        finally:
+            stop.set()
+            for t in threads:
+                t.join()
+
+    def test_module_helpers(self):
+        update_data([5.0] * 11, device="helper-glove")
+        assert get_latest_data("helper-glove") == [5.0] * 11
+
+
+class TestLongPoll:
+    @pytest.mark.asyncio
+    async def test_wait_returns_immediately_when_newer_exists(self):
+        store = LatestSampleStore()
+        store.update("a", [1.0])
+        samples = await asyncio.wait_for(store.wait(0, 5.0), 0.5)
+        assert [s.device for s in samples] == ["a"]
+
+    @pytest.mark.asyncio
+    async def test_wait_wakes_on_update_from_another_thread(self):
+        store = LatestSampleStore()
+        seq = store.update("a", [1.0])
+        waiter = asyncio.create_task(store.wait(seq, 5.0, device="b"))
+        await asyncio.sleep(0.01)
+        store.update("a", [2.0])  # a different device does not satisfy the waiter
+        await asyncio.sleep(0.01)
+        assert not waiter.done()
+
+        threading.Thread(target=store.update, args=("b", [3.0])).start()
+        samples = await asyncio.wait_for(waiter, 1.0)
+        assert samples[0].device == "b" and samples[0].values == [3.0]
+        assert store.get_stats()["waiters"] == 0
+
+    @pytest.mark.asyncio
+    async def test_wait_times_out_empty(self):
+        store = LatestSampleStore()
+        assert await store.wait(0, 0.02) == []
@@ -0,0 +1,198 @@
+"""
+Unit tests for hot model reload (core.model_registry).
+"""
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'backend')))
+import asyncio
+import numpy as np
+import pytest
+from core.model_registry import ModelBundle, ModelRegistry, file_fingerprint
+from core.model_artifacts import load_run, publish_run
+
+pytestmark = pytest.mark.unit
+
+
+class FakeRuntime:
+    name = "fake"
+
+    def __init__(self, tag):
+        self.tag = tag
+        self.warmed = False
+
+    def __call__(self, batch):
+        return np.full((len(batch), 1), self.tag, dtype=np.float32)
+
+    def warmup(self):
+        self.warmed = True
+        return 0.0
+
+
+class TestModelRegistry:
+    def test_initial_load_and_swap_callback(self):
+        swapped = []
+        registry = ModelRegistry(lambda: ModelBundle(FakeRuntime(1)), lambda: [], on_swap=swapped.append)
+        bundle = registry.load_initial()
+        assert bundle.version == 1
+        assert swapped == [bundle]
+
+    @pytest.mark.asyncio
+    async def test_reload_warms_then_swaps(self):
+        tags = iter([1, 2])
+        registry = ModelRegistry(lambda: ModelBundle(FakeRuntime(next(tags))), lambda: [])
+        old = registry.load_initial()
+
+        result = await registry.reload("test")
+        assert result == {"status": "success", "version": 2, "runtime": "fake"}
+        assert registry.active is not old
+        assert registry.active.runtime.warmed
+        # A batch that already picked up the old bundle still completes on it
+        assert old.runtime(np.zeros((1, 50, 11)))[0, 0] == 1
+
+    @pytest.mark.asyncio
+    async def test_start_loads_in_background(self):
+        registry = ModelRegistry(lambda: ModelBundle(FakeRuntime(1)), lambda: [])
+        assert registry.state == "cold"
+        registry.start(watch=False)
+        assert registry.state == "warming"
+        assert await registry.wait_ready()
+        assert registry.state == "ready"
+        assert registry.active.runtime.warmed
+        await registry.stop()
+
+    def test_ensure_loaded_loads_once(self):
+        loads = []
+        registry = ModelRegistry(lambda: loads.append(1) or ModelBundle(FakeRuntime(1)), lambda: [])
+        first = registry.ensure_loaded()
+        assert registry.ensure_loaded() is first
+        assert loads == [1]
+        assert registry.state == "ready"
+
+    @pytest.mark.asyncio
+    async def test_ensure_loaded_async_loads_off_the_event_loop(self):
+        import threading
+        release = threading.Event()
+
+        def slow_loader():
+            release.wait(5)
+            return ModelBundle(FakeRuntime(1))
+
+        registry = ModelRegistry(slow_loader, lambda: [])
+        first = asyncio.create_task(registry.ensure_loaded_async())
+        await asyncio.sleep(0.01)  # the loop keeps running while the loader blocks
+        assert not first.done() and registry.state == "warming"
+        assert await registry.ensure_loaded_async() is None  # a concurrent caller does not wait
+
+        release.set()
+        bundle = await first
+        assert bundle.version == 1 and registry.state == "ready"
+        assert await registry.ensure_loaded_async() is bundle
+
+    @pytest.mark.asyncio
+    async def test_failed_reload_keeps_serving_old_bundle(self):
+        loads = iter([ModelBundle(FakeRuntime(1)), ModelBundle(None)])
+        registry = ModelRegistry(lambda: next(loads), lambda: [])
+        old = registry.load_initial()
+
+        result = await registry.reload("test")
+        assert result["status"] == "error"
+        assert registry.active is old
+        assert registry.get_stats()["failed_reloads"] == 1
+
+    @pytest.mark.asyncio
+    async def test_watcher_reloads_after_artifacts_settle(self, tmp_path):
+        artifact = tmp_path / "scaler.pkl"
+        artifact.write_bytes(b"v1")
+        paths = lambda: [str(artifact)]
+        registry = ModelRegistry(lambda: ModelBundle(FakeRuntime(1), fingerprint=file_fingerprint(paths())),
+                                 paths, poll_interval_s=0.01)
+        registry.load_initial()
+        registry.start()
+        try:
+            await asyncio.sleep(0.03)
+            assert registry.reloads == 0
+            artifact.write_bytes(b"version 2")
+            for _ in range(100):
+                await asyncio.sleep(0.01)
+                if registry.reloads:
+                    break
+            assert registry.reloads == 1
+            assert registry.active.version == 2
+        finally:
+            await registry.stop()
+
+    @pytest.mark.asyncio
+    async def test_staged_rewrite_never_mixes_runs(self, tmp_path):
+        """Scaler and encoder land minutes before the folds: only the finished run is swapped in."""
+        results, models = tmp_path / "results", tmp_path / "models"
+        results.mkdir()
+        models.mkdir()
+        marker = str(results / "training_metrics.json")
+        scaler, encoder, fold = results / "scaler.pkl", results / "label_encoder.pkl", models / "fold1.h5"
+        paths = lambda: [str(scaler), str(encoder), str(fold), marker]
+
+        def write_run(tag, staging):
+            staging.mkdir()
+            for name in ("scaler.pkl", "label_encoder.pkl", "fold1.h5"):
+                (staging / name).write_text(tag)
+            return {str(scaler): str(staging / "scaler.pkl"), str(encoder): str(staging / "label_encoder.pkl"),
+                    str(fold): str(staging / "fold1.h5")}
+
+        def loader():
+            bundle, run_id = load_run(marker, paths(), lambda: ModelBundle(
+                FakeRuntime(fold.read_text()), scaler=scaler.read_text(), label_encoder=None))
+            bundle.fingerprint, bundle.run_id = file_fingerprint([marker]), run_id
+            return bundle
+
+        publish_run(marker, {"run_id": "v1"}, write_run("v1", tmp_path / "staging1"))
+        registry = ModelRegistry(loader, lambda: [marker], poll_interval_s=0.01)
+        registry.load_initial()
+        registry.start(load=False)
+        try:
+            # An old-style training job rewrites the scaler and encoder in place first...
+            scaler.write_text("v2")
+            encoder.write_text("v2")
+            await asyncio.sleep(0.05)
+            assert registry.reloads == 0  # the marker did not change
+            result = await registry.reload("manual")
+            assert result["status"] == "error" and registry.active.scaler == "v1"
+
+            # ...and the finished run is published with its marker written last
+            publish_run(marker, {"run_id": "v2"}, write_run("v2", tmp_path / "staging2"))
+            for _ in range(100):
+                await asyncio.sleep(0.01)
+                if registry.reloads:
+                    break
+            active = registry.active
+            assert registry.reloads == 1 and active.run_id == "v2"
+            assert (active.scaler, active.runtime.tag) == ("v2", "v2")
+        finally:
+            await registry.stop()
+
+    def test_bundle_scales_batches(self):
+        class Doubler:
+            def transform(self, x):
+                return x * 2
+        bundle = ModelBundle(FakeRuntime(1), scaler=Doubler())
+        out = bundle.scale(np.ones((2, 3, 11), dtype=np.float32))
+        assert out.shape == (2, 3, 11)
+        assert np.all(out == 2)
+
+    def test_vectorized_scaler_and_decoding_match_sklearn(self):
+        from sklearn.preprocessing import LabelEncoder, StandardScaler
+        rng = np.random.default_rng(0)
+        scaler = StandardScaler().fit(rng.random((200, 11)) * 1000)
+        encoder = LabelEncoder().fit(["We", "Hello", "Are"])
+        bundle = ModelBundle(FakeRuntime(1), scaler=scaler, label_encoder=encoder)
+
+        batch = (rng.random((3, 50, 11)) * 1000).astype(np.float32)
+        expected = scaler.transform(batch.reshape(-1, 11)).reshape(batch.shape)
+        np.testing.assert_allclose(bundle.scale(batch), expected, rtol=1e-5, atol=1e-5)
+        assert [bundle.decode(i) for i in range(3)] == list(encoder.inverse_transform([0, 1, 2]))
+
+    def test_scale_does_not_modify_input(self):
+        from sklearn.preprocessing import StandardScaler
+        scaler = StandardScaler().fit(np.random.default_rng(1).random((20, 11)))
+        window = np.ones((1, 5, 11), dtype=np.float32)
+        ModelBundle(FakeRuntime(1), scaler=scaler).scale(window)
+        assert np.all(window == 1)
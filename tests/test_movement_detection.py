@@ -0,0 +1,86 @@
+"""
+Unit tests for the collector's vectorized normalization and movement detection.
+"""
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'backend')))
+import numpy as np
+import pytest
+from ingestion.streaming.movement_detection import MovementDetector
+from ingestion.streaming.preprocessing import normalize_block, normalize_sensor_data
+
+pytestmark = pytest.mark.unit
+
+
+def reference_flags(stream, window_size, threshold):
+    """Per-frame motion flags computed the straightforward way (np.var over a list window)."""
+    flags = []
+    for i in range(len(stream)):
+        if i + 1 < window_size:
+            flags.append(None)
+            continue
+        variances = np.var(np.array(stream[i + 1 - window_size:i + 1]), axis=0)
+        flags.append(bool(np.any(variances > threshold)))
+    return flags
+
+
+def gesture_stream(seed=0):
+    """Rest, a movement, rest, a short twitch, rest."""
+    rng = np.random.default_rng(seed)
+    rest = lambda n: 0.5 + rng.normal(0, 0.01, (n, 11))
+    move = lambda n: 0.5 + rng.normal(0, 0.6, (n, 11))
+    return np.concatenate([rest(20), move(30), rest(20), move(3), rest(20)])
+
+
+class TestNormalization:
+    def test_block_matches_per_sensor_scaling(self):
+        frame = [4095.0] * 5 + [16384.0, -16384.0, 8192.0] + [131.0, -262.0, 0.0]
+        expected = [1.0] * 5 + [1.0, -1.0, 0.5] + [1.0, -2.0, 0.0]
+        assert normalize_sensor_data(frame) == pytest.approx(expected)
+        block = normalize_block(np.array([frame] * 4, dtype=np.float32))
+        assert block.shape == (4, 11)
+        np.testing.assert_allclose(block, [expected] * 4)
+
+    def test_does_not_modify_input_and_passes_extra_values(self):
+        frame = np.full((2, 12), 131.0)
+        out = normalize_block(frame)
+        assert np.all(frame == 131.0)
+        assert np.all(out[:, 11] == 131.0)
+
+
+class TestMovementDetector:
+    def test_running_variance_matches_reference(self):
+        stream = gesture_stream()
+        detector = MovementDetector(threshold=0.05, window_size=5)
+        flags = []
+        for frame in stream:
+            detector.update(frame)
+            flags.append(detector.is_moving if detector._count == 5 else None)
+        assert flags == reference_flags(list(stream), 5, 0.05)
+
+    def test_update_finds_movement_sequences(self):
+        detector = MovementDetector(threshold=0.05, window_size=5, min_length=10)
+        finished = [seq for frame in gesture_stream().tolist() if (seq := detector.update(frame))]
+        assert len(finished) == 1          # the 3-frame twitch is shorter than min_length
+        assert len(finished[0]) >= 30
+
+    def test_block_updates_match_frame_updates(self):
+        stream = gesture_stream(1)
+        per_frame = MovementDetector(threshold=0.05)
+        expected = [seq for frame in stream.tolist() if (seq := per_frame.update(frame))]
+
+        blocked = MovementDetector(threshold=0.05)
+        got = []
+        for start in range(0, len(stream), 7):   # blocks that straddle the window boundary
+            got.extend(blocked.update_block(stream[start:start + 7]))
+
+        assert len(got) == len(expected) == 1
+        np.testing.assert_allclose(got[0], expected[0])
+        assert blocked.is_moving == per_frame.is_moving
+        np.testing.assert_allclose(blocked.buffer, per_frame.buffer)
+
+    def test_block_shorter_than_window_only_fills_history(self):
+        detector = MovementDetector(window_size=5)
+        assert detector.update_block(np.zeros((3, 11))) == []
+        assert not detector.saw_motion
+        assert len(detector.buffer) == 3
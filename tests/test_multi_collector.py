@@ -0,0 +1,152 @@
+"""
+Unit tests for the multi-glove collector (one process, many gloves, one WebSocket).
+"""
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'backend')))
+import asyncio
+import json
+import numpy as np
+import pytest
+import websockets
+from ingestion.streaming.frame_codec import FRAME_SUBPROTOCOL, decode_frames
+from ingestion.streaming.multi_collector import BackendLink, GloveChannel, MultiGloveCollector
+
+pytestmark = pytest.mark.unit
+
+
+def gesture_block(seed):
+    """Raw frames: rest, one large movement, rest (one gesture window for the detector)."""
+    rng = np.random.default_rng(seed)
+    rest = np.tile([2000.0] * 5 + [0.0, 0.0, 16384.0] + [0.0] * 3, (15, 1))
+    move = rest[:1] + rng.normal(0, 3000, (20, 11))
+    return np.concatenate([rest, move, rest]).astype(np.float32)
+
+
+class FakeReader:
+    def __init__(self, port, **kwargs):
+        self.port = port
+        self.queue = asyncio.Queue()
+        self.stopped = False
+
+    def start(self):
+        self.queue.put_nowait(gesture_block(len(self.port)))
+
+    async def get_timed(self):
+        return await self.queue.get(), 0.0
+
+    def stop(self):
+        self.stopped = True
+
+    def get_stats(self):
+        return {"dropped_frames": 0, "lines_rejected": 0}
+
+
+class TestBackendLink:
+    def test_overflow_drops_oldest_window_and_charges_its_glove(self):
+        link = BackendLink("ws://unused", queue_size=2)
+        a = GloveChannel("A", "glove-A", FakeReader("A"), None, link)
+        b = GloveChannel("B", "glove-B", FakeReader("B"), None, link)
+        link.put(a, [[0.0] * 11])
+        link.put(b, [[1.0] * 11])
+        link.put(b, [[2.0] * 11])
+
+        assert a.windows_dropped == 1 and b.windows_dropped == 0
+        assert link.get_stats()["queued"] == 2
+
+
+class TestMultiGloveCollector:
+    @pytest.mark.asyncio
+    async def test_gloves_are_multiplexed_over_one_websocket(self):
+        received = []
+        connections = []
+
+        async def handler(ws):
+            connections.append(ws.subprotocol)
+            async for message in ws:
+                received.append(decode_frames(message))
+
+        async with websockets.serve(handler, "127.0.0.1", 0, subprotocols=[FRAME_SUBPROTOCOL]) as server:
+            port = server.sockets[0].getsockname()[1]
+            collector = MultiGloveCollector(
+                f"ws://127.0.0.1:{port}", {"total_sensors": 11},
+                devices=[{"port": "COM5", "session_id": "left"}, {"port": "/dev/ttyUSB1"}],
+                discover=False, stats_interval=0, reader_factory=FakeReader,
+            )
+            run = asyncio.create_task(collector.run())
+            for _ in range(200):
+                await asyncio.sleep(0.01)
+                if len(received) >= 2:
+                    break
+            stats = collector.get_stats()
+            run.cancel()
+            try:
+                await run
+            except asyncio.CancelledError:
+                pass
+
+        assert connections == [FRAME_SUBPROTOCOL]  # one socket, binary frames negotiated
+        assert sorted(block.session_id for block in received) == ["glove-ttyUSB1", "left"]
+        assert all(block.frames.shape[1] == 11 and len(block.frames) >= 10 for block in received)
+        assert stats["devices"]["left"]["frames_in"] == 50
+        assert stats["devices"]["left"]["windows_sent"] == 1
+        assert stats["links"][0]["messages_sent"] == 2
+
+    @pytest.mark.asyncio
+    async def test_rescan_adds_and_removes_discovered_gloves(self, monkeypatch):
+        import ingestion.streaming.multi_collector as multi
+        ports = ["/dev/ttyUSB0", "/dev/ttyUSB1"]
+        monkeypatch.setattr(multi, "discover_ports", lambda vids: list(ports))
+        collector = MultiGloveCollector("ws://unused", {}, devices=[{"port": "COM9"}],
+                                        connections=2, reader_factory=FakeReader)
+        collector.add_device("COM9")
+        await collector.rescan()
+        assert set(collector.channels) == {"COM9", "/dev/ttyUSB0", "/dev/ttyUSB1"}
+        assert sorted(len(link.channels) for link in collector.links) == [1, 2]
+
+        ports.remove("/dev/ttyUSB0")
+        removed = collector.channels["/dev/ttyUSB0"]
+        await collector.rescan()
+        assert set(collector.channels) == {"COM9", "/dev/ttyUSB1"}  # configured gloves are kept
+        assert removed.reader.stopped
+        await collector.close()
+
+    @pytest.mark.asyncio
+    async def test_link_waits_for_backend_credits(self):
+        received = []
+        release = asyncio.Event()
+
+        async def handler(ws):
+            async for message in ws:
+                block = decode_frames(message)
+                received.append(block.seq)
+                if len(received) == 1:
+                    await release.wait()  # hold the first ack back
+                await ws.send(json.dumps({"type": "ack", "session_id": block.session_id, "seq": block.seq,
+                                          "status": "success", "prediction": "Hello", "credits": 1}))
+
+        async with websockets.serve(handler, "127.0.0.1", 0, subprotocols=[FRAME_SUBPROTOCOL]) as server:
+            link = BackendLink(f"ws://127.0.0.1:{server.sockets[0].getsockname()[1]}")
+            link.flow.initial_credits = 1
+            channel = GloveChannel("A", "glove-A", FakeReader("A"), None, link)
+            for i in range(3):
+                link.put(channel, [[float(i)] * 11])
+            run = asyncio.create_task(link.run())
+            await asyncio.sleep(0.1)
+            assert received == [1]               # one credit: the second window waits for an ack
+            release.set()
+            for _ in range(100):
+                await asyncio.sleep(0.01)
+                if len(received) == 3 and link.flow.acked == 3:
+                    break
+            run.cancel()
+            try:
+                await run
+            except asyncio.CancelledError:
+                pass
+
+        assert received == [1, 2, 3]
+        stats = link.get_stats()["flow"]
+        assert stats["acked"] == 3 and stats["in_flight"] == 0
+        assert stats["end_to_end"]["count"] == 3
+
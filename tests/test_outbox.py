@@ -0,0 +1,25 @@
+"""
+Unit tests for the per-session coalescing of WebSocket updates.
+"""
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'backend')))
+import pytest
+from core.outbox import SessionCoalescer
+
+pytestmark = pytest.mark.unit
+
+
+class TestSessionCoalescer:
+    def test_drain_gives_one_message_per_session_and_clears(self):
+        updates = SessionCoalescer(max_frames=2)
+        updates.offer("a", "Hello", [[1.0]])
+        updates.offer("b", "We", [[2.0]])
+        updates.offer("a", "Yes", [[3.0], [4.0]])
+
+        assert updates.drain() == [
+            {"prediction": "Yes", "values": [4.0], "frames": [[3.0], [4.0]], "session_id": "a"},
+            {"prediction": "We", "values": [2.0], "frames": [[2.0]], "session_id": "b"},
+        ]
+        assert updates.updates_coalesced == 1 and len(updates) == 0 and updates.drain() == []
+
@@ -0,0 +1,148 @@
+"""
+Unit tests for /gesture/predict_ws (routes.gestures_predict) with a recording predictor.
+"""
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'backend')))
+import importlib
+import types
+from contextlib import asynccontextmanager
+import numpy as np
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+pytestmark = pytest.mark.unit
+
+
+class FakeEngine:
+    """Silent pyttsx3 engine: the tests must not need a speech backend."""
+
+    def setProperty(self, name, value):
+        pass
+
+    def say(self, text):
+        pass
+
+    def runAndWait(self):
+        pass
+
+
+@pytest.fixture
+def route(monkeypatch):
+    monkeypatch.setitem(sys.modules, "pyttsx3", types.SimpleNamespace(init=FakeEngine))
+    module = importlib.import_module("routes.gestures_predict")
+    windows = []
+
+    async def fake_predict(window):
+        windows.append(np.array(window, dtype=np.float32))
+        return {"status": "success", "prediction": f"G{len(windows)}", "confidence": 0.9}
+
+    monkeypatch.setattr(module, "predict_async", fake_predict)
+
+    @asynccontextmanager
+    async def lifespan(app):
+        yield
+        await module.predict_manager.close()  # as main.py's lifespan does
+
+    app = FastAPI(lifespan=lifespan)
+    app.include_router(module.router)
+    with TestClient(app) as client:
+        yield client, windows
+
+
+def receive_ack(ws, seq):
+    while True:
+        message = ws.receive_json()
+        if message.get("type") == "ack" and message.get("seq") == seq:
+            return message
+
+
+class TestWindowedMessages:
+    def test_each_window_is_scored_on_its_own(self, route):
+        client, windows = route
+        first = [[1.0] * 11 for _ in range(40)]
+        second = [[2.0] * 11 for _ in range(30)]
+        with client.websocket_connect("/gesture/predict_ws") as ws:
+            ws.send_json({"session_id": "glove", "seq": 1, "sensor_values": first})
+            assert receive_ack(ws, 1)["prediction"] == "G1"
+            ws.send_json({"session_id": "glove", "seq": 2, "sensor_values": second})
+            assert receive_ack(ws, 2)["prediction"] == "G2"
+
+        assert windows[1].shape == (30, 11)
+        assert (windows[1] == 2.0).all()  # no frames carried over from the first window
+
+    def test_long_windows_are_not_cut_to_the_last_timesteps(self, route):
+        client, windows = route
+        with client.websocket_connect("/gesture/predict_ws") as ws:
+            ws.send_json({"session_id": "glove", "seq": 1, "sensor_values": [[float(i)] * 11 for i in range(80)]})
+            receive_ack(ws, 1)
+        assert windows[0].shape == (80, 11) and windows[0][0, 0] == 0.0
+
+
+class TestRawStream:
+    def raw_gesture(self, seed):
+        """Raw ADC frames: rest, one large movement, rest."""
+        rng = np.random.default_rng(seed)
+        rest = np.tile([2000.0] * 5 + [0.0, 0.0, 16384.0] + [0.0] * 3, (15, 1))
+        move = rest[:1] + rng.normal(0, 3000, (20, 11))
+        return np.concatenate([rest, move, rest])
+
+    def test_every_movement_in_a_message_gets_its_own_prediction(self, route):
+        client, windows = route
+        frames = np.concatenate([self.raw_gesture(1), self.raw_gesture(2)]).tolist()
+        with client.websocket_connect("/gesture/predict_ws?mode=raw") as ws:
+            ws.send_json({"session_id": "glove", "seq": 1, "sensor_values": frames})
+            ack = receive_ack(ws, 1)
+
+        assert ack["status"] == "success" and ack["predictions"] == ["G1", "G2"]
+        assert len(windows) == 2 and all(len(w) <= 30 for w in windows)
+
+    def test_stride_gates_movements_before_they_are_scored(self, route, monkeypatch):
+        from core.settings import settings
+        from AI.gesture_model_inference import get_stream_stats
+        client, windows = route
+        monkeypatch.setattr(settings, "INFERENCE_STRIDE", 60)
+        skipped = get_stream_stats()["predictions_skipped"]
+        frames = np.concatenate([self.raw_gesture(1), self.raw_gesture(2)]).tolist()
+        with client.websocket_connect("/gesture/predict_ws?mode=raw") as ws:
+            ws.send_json({"session_id": "glove", "seq": 1, "sensor_values": frames})
+            ack = receive_ack(ws, 1)
+
+        assert ack["predictions"] == ["G1"] and len(windows) == 1  # the second movement never reached the model
+        stats = get_stream_stats()
+        assert stats["stride"] == 60 and stats["predictions_skipped"] == skipped + 1
+
+
+class TestBinaryFrames:
+    def test_packed_frames_stay_an_array_through_scoring_and_fan_out(self, route, monkeypatch):
+        from ingestion.streaming.frame_codec import FRAME_SUBPROTOCOL, encode_frames
+        module = importlib.import_module("routes.gestures_predict")
+        client, windows = route
+        published = []
+        publish = module.predict_manager.publish
+        monkeypatch.setattr(module.predict_manager, "publish",
+                            lambda session_id, prediction, frames: published.append(frames) or publish(session_id, prediction, frames))
+        frames = np.arange(40 * 11, dtype=np.float32).reshape(40, 11)
+        with client.websocket_connect("/gesture/predict_ws", subprotocols=[FRAME_SUBPROTOCOL]) as ws:
+            ws.send_bytes(encode_frames(frames, session_id="glove", seq=1))
+            assert receive_ack(ws, 1)["prediction"] == "G1"
+            while "frames" not in (update := ws.receive_json()):
+                pass
+
+        assert isinstance(published[0], np.ndarray)
+        np.testing.assert_array_equal(windows[0], frames)
+        assert update["values"] == frames[-1].tolist() and len(update["frames"]) == 40
+
+
+class TestMalformedInput:
+    @pytest.mark.parametrize("mode", ["", "?mode=raw"])
+    def test_bad_frames_get_an_error_and_keep_the_socket_open(self, route, mode):
+        client, windows = route
+        with client.websocket_connect("/gesture/predict_ws" + mode) as ws:
+            ws.send_json({"session_id": "glove", "seq": 1, "sensor_values": [["x"] * 11, [1.0] * 11]})
+            error = receive_ack(ws, 1)
+            assert error["status"] == "error" and error["message"] == "Invalid input shape, expected frames of 11 values"
+
+            ws.send_json({"session_id": "glove", "seq": 2, "sensor_values": [[1.0] * 11 for _ in range(20)]})
+            assert receive_ack(ws, 2)["status"] in ("success", "skipped")
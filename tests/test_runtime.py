@@ -0,0 +1,157 @@
+"""
+Unit tests for the pluggable inference runtimes.
+"""
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'backend')))
+import shutil
+import numpy as np
+import pytest
+from core.settings import settings
+from core.runtime import (load_runtime, tflite_path_for, score_windows, KerasRuntime, TFLiteRuntime,
+                          EnsembleRuntime, best_fold_from_metrics)
+
+pytestmark = pytest.mark.unit
+
+TFLITE_PATH = tflite_path_for(settings.MODEL_PATH)
+
+
+def test_tflite_path_for():
+    assert tflite_path_for("/m/gesture_model_fold1.h5") == "/m/gesture_model_fold1.tflite"
+    assert tflite_path_for("/m/gesture_model_fold1.h5", quantized=True) == "/m/gesture_model_fold1.int8.tflite"
+
+
+def test_load_runtime_missing_model_returns_none(tmp_path):
+    assert load_runtime(str(tmp_path / "missing.h5")) is None
+
+
+@pytest.mark.skipif(not os.path.exists(TFLITE_PATH), reason="exported TFLite model not available")
+class TestTFLiteRuntime:
+    def test_auto_prefers_tflite(self, tmp_path):
+        h5_path = tmp_path / "gesture_model_fold1.h5"
+        shutil.copy(TFLITE_PATH, tflite_path_for(str(h5_path)))
+        runtime = load_runtime(str(h5_path))
+        assert runtime.name == "tflite"
+
+    def test_auto_ignores_tflite_older_than_its_h5(self, tmp_path):
+        h5_path = str(tmp_path / "gesture_model_fold1.h5")
+        shutil.copy(TFLITE_PATH, tflite_path_for(h5_path))
+        shutil.copy(settings.MODEL_PATH, h5_path)
+        os.utime(tflite_path_for(h5_path), (0, 0))  # exported before the .h5 was retrained
+        assert load_runtime(h5_path).name == "keras-compiled"
+
+    def test_batch_and_window_fitting(self):
+        runtime = TFLiteRuntime(TFLITE_PATH)
+        batch = np.random.default_rng(0).standard_normal((3, runtime.timesteps, runtime.num_features))
+        out = runtime(batch)
+        assert out.shape == (3, runtime.num_classes)
+        np.testing.assert_allclose(out.sum(axis=1), 1.0, atol=1e-5)
+
+        # Longer windows average the TIMESTEPS windows that cover them
+        longer = np.concatenate([np.zeros((1, 10, runtime.num_features)), batch[:1]], axis=1)
+        expected = (runtime(longer[:, :runtime.timesteps]) + out[:1]) / 2
+        np.testing.assert_allclose(runtime(longer), expected, atol=1e-6)
+
+        # Shorter windows are edge-padded at the end
+        short = batch[:1, :20]
+        padded = np.pad(short, ((0, 0), (0, runtime.timesteps - 20), (0, 0)), mode="edge")
+        np.testing.assert_allclose(runtime(short), runtime(padded), atol=1e-6)
+
+
+    def test_keras_and_tflite_agree_on_short_and_long_windows(self):
+        from tensorflow.keras.models import load_model
+        keras_runtime = KerasRuntime(load_model(settings.MODEL_PATH))
+        tflite_runtime = TFLiteRuntime(TFLITE_PATH)
+        rng = np.random.default_rng(1)
+        for frames in (30, 50, 80):
+            batch = rng.standard_normal((4, frames, 11)).astype(np.float32)
+            keras_out, tflite_out = keras_runtime(batch), tflite_runtime(batch)
+            np.testing.assert_allclose(keras_out, tflite_out, atol=1e-4)
+            assert (keras_out.argmax(axis=1) == tflite_out.argmax(axis=1)).all()
+
+
+class TestScoreWindows:
+    def forward(self, windows):
+        """Per-window mean of feature 0 and the window length, to see what was scored."""
+        self.shapes.append(windows.shape)
+        return np.stack([windows[:, :, 0].mean(axis=1), np.full(len(windows), windows.shape[1])], axis=1)
+
+    def setup_method(self):
+        self.shapes = []
+
+    def test_short_windows_are_edge_padded(self):
+        batch = np.arange(30, dtype=np.float32).reshape(1, 30, 1)
+        out = score_windows(self.forward, batch, 50)
+        assert self.shapes == [(1, 50, 1)]
+        assert out[0, 0] == pytest.approx((sum(range(30)) + 20 * 29) / 50)
+
+    def test_long_windows_are_covered_and_averaged_in_one_pass(self):
+        batch = np.arange(2 * 80, dtype=np.float32).reshape(2, 80, 1)
+        out = score_windows(self.forward, batch, 50)
+        assert self.shapes == [(6, 50, 1)]  # starts 0, 25 and 30 (aligned to the end), for both windows
+        starts = (0, 25, 30)
+        assert out[0, 0] == pytest.approx(np.mean([np.mean(range(s, s + 50)) for s in starts]))
+        assert out.shape == (2, 2)
+
+    def test_trained_length_and_variable_length_models_pass_through(self):
+        batch = np.zeros((3, 50, 1), dtype=np.float32)
+        score_windows(self.forward, batch, 50)
+        score_windows(self.forward, np.zeros((3, 70, 1), dtype=np.float32), None)
+        assert self.shapes == [(3, 50, 1), (3, 70, 1)]
+
+
+class ConstantRuntime:
+    """Stand-in fold model that returns the same probabilities for every window."""
+
+    name = "constant"
+    timesteps = 50
+    num_features = 11
+
+    def __init__(self, proba):
+        self.proba = np.asarray(proba, dtype=np.float32)
+        self.num_classes = len(proba)
+        self.calls = 0
+
+    def __call__(self, batch):
+        self.calls += 1
+        return np.tile(self.proba, (len(batch), 1))
+
+
+class TestEnsembleRuntime:
+    def test_averages_member_probabilities(self):
+        members = [ConstantRuntime([1.0, 0.0]), ConstantRuntime([0.0, 1.0]), ConstantRuntime([0.5, 0.5])]
+        ensemble = EnsembleRuntime(members)
+        out = ensemble(np.zeros((3, 50, 11)))
+        np.testing.assert_allclose(out, [[0.5, 0.5]] * 3, atol=1e-6)
+        assert ensemble.mode == "concurrent"
+        assert all(m.calls == 1 for m in members)
+
+    def test_budget_falls_back_to_best_fold(self):
+        members = [ConstantRuntime([1.0, 0.0]), ConstantRuntime([0.0, 1.0])]
+        ensemble = EnsembleRuntime(members, best_index=1, budget_ms=10.0)
+        ensemble._ensemble_ms = 4.0  # per window: 2 windows fit the budget, 4 do not
+
+        np.testing.assert_allclose(ensemble(np.zeros((2, 50, 11))), [[0.5, 0.5]] * 2)
+        np.testing.assert_allclose(ensemble(np.zeros((4, 50, 11))), [[0.0, 1.0]] * 4)
+        stats = ensemble.get_stats()
+        assert stats["best_fold"] == 2
+        assert stats["ensemble_batches"] == 1 and stats["fallback_batches"] == 1
+
+    def test_fallback_reprobes_the_ensemble(self):
+        members = [ConstantRuntime([1.0, 0.0]), ConstantRuntime([0.0, 1.0])]
+        ensemble = EnsembleRuntime(members, best_index=1, budget_ms=10.0, reprobe_every=3)
+        ensemble._ensemble_ms = 100.0  # a one-off spike: every batch falls back
+
+        for _ in range(3):
+            np.testing.assert_allclose(ensemble(np.zeros((1, 50, 11))), [[0.0, 1.0]])
+        assert ensemble.probes == 1 and ensemble._ensemble_ms < 10.0  # re-timed on the third fallback
+
+        np.testing.assert_allclose(ensemble(np.zeros((1, 50, 11))), [[0.5, 0.5]])
+        stats = ensemble.get_stats()
+        assert stats["probes"] == 1 and stats["fallback_batches"] == 3 and stats["ensemble_batches"] == 1
+
+    def test_best_fold_from_metrics(self, tmp_path):
+        metrics = tmp_path / "training_metrics.json"
+        metrics.write_text('{"fold_accuracies": [0.91, 0.97, 0.93]}')
+        assert best_fold_from_metrics(str(metrics)) == 2
+        assert best_fold_from_metrics(str(tmp_path / "missing.json")) is None
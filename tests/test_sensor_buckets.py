@@ -0,0 +1,86 @@
+"""
+Unit tests for bucketed sensor storage and its legacy-row compatibility layer.
+"""
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'backend')))
+from datetime import datetime, timedelta
+import numpy as np
+import pytest
+from core.sensor_buckets import BucketWriter, expand_bucket, make_buckets, pack_bucket, unpack_frames
+
+pytestmark = pytest.mark.unit
+
+T0 = datetime(2025, 7, 1, 12, 0, 0)
+
+
+def legacy_rows(session_id, n, label="Hello", start=0):
+    return [
+        {"session_id": session_id, "label": label, "values": [start + i] * 11,
+         "timestamp": T0 + timedelta(milliseconds=10 * (start + i))}
+        for i in range(n)
+    ]
+
+
+class FakeCollection:
+    def __init__(self):
+        self.docs = []
+
+    def insert_one(self, doc):
+        self.docs.append(doc)
+
+
+class TestPacking:
+    def test_round_trip_restores_legacy_rows(self):
+        rows = legacy_rows("s1", 5)
+        bucket = pack_bucket("s1", "Hello", [r["values"] for r in rows], [r["timestamp"] for r in rows])
+        assert bucket["count"] == 5 and bucket["dtype"] == "<i4"
+        assert len(bucket["frames"]) == 5 * 11 * 4
+        assert list(expand_bucket(bucket)) == rows
+
+    def test_fractional_values_are_float32(self):
+        bucket = pack_bucket("s1", "Hello", [[0.5] * 11], [T0])
+        assert bucket["dtype"] == "<f4"
+        assert unpack_frames(bucket).tolist() == [[0.5] * 11]
+
+    def test_dual_hand_rows_keep_their_legacy_fields(self):
+        bucket = pack_bucket("d1", "Hi", [list(range(22))], [T0], source="dual_hand_collection",
+                             field="combined_values")
+        row = next(iter(expand_bucket(bucket)))
+        assert row["combined_values"] == list(range(22))
+        assert row["left_hand"] == list(range(11)) and row["right_hand"] == list(range(11, 22))
+        assert "values" not in row
+
+    def test_mismatched_timestamps_rejected(self):
+        with pytest.raises(ValueError):
+            pack_bucket("s1", "Hello", [[1] * 11, [2] * 11], [T0])
+
+
+class TestMakeBuckets:
+    def test_splits_by_session_and_bucket_size(self):
+        rows = legacy_rows("a", 450) + legacy_rows("b", 30, label="Bye")
+        buckets = make_buckets(rows, bucket_size=200)
+        assert [(b["session_id"], b["count"]) for b in buckets] == [("a", 200), ("a", 200), ("a", 50), ("b", 30)]
+        assert buckets[1]["start"] == rows[200]["timestamp"] and buckets[1]["end"] == rows[399]["timestamp"]
+        expanded = [row for b in buckets for row in expand_bucket(b)]
+        assert expanded == rows
+
+    def test_rows_without_a_frame_are_skipped(self):
+        rows = [{"session_id": "x", "sensor_values": [[1] * 11]}] + legacy_rows("a", 3)
+        assert [b["count"] for b in make_buckets(rows)] == [3]
+
+
+class TestBucketWriter:
+    def test_writes_full_buckets_and_flushes_the_rest(self):
+        collection = FakeCollection()
+        writer = BucketWriter("s1", "Hello", source="collect_data", bucket_size=4, collection=collection)
+        for row in legacy_rows("s1", 10):
+            writer.append(row["values"], row["timestamp"])
+        assert [d["count"] for d in collection.docs] == [4, 4]
+
+        writer.close()
+        assert [d["count"] for d in collection.docs] == [4, 4, 2]
+        writer.close()  # nothing buffered: no empty bucket
+        assert writer.buckets_written == 3
+        frames = np.concatenate([unpack_frames(d) for d in collection.docs])
+        assert frames[:, 0].tolist() == list(range(10))
@@ -0,0 +1,102 @@
+"""
+Unit tests for the async serial reader and batched frame parsing.
+"""
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'backend')))
+import asyncio
+import time
+import numpy as np
+import pytest
+from ingestion.streaming.serial_reader import AsyncSerialReader, parse_frames
+
+pytestmark = pytest.mark.unit
+
+LINE = b"1000,2000,3000,4000,4095,-16384,0,16384,131,-131,0.5\r\n"
+
+
+class FakeSerial:
+    """Hands out the queued chunks, then behaves like an idle port."""
+
+    def __init__(self, chunks):
+        self.chunks = list(chunks)
+        self.is_open = True
+        self.timeout = 0.01
+
+    @property
+    def in_waiting(self):
+        return len(self.chunks[0]) if self.chunks else 0
+
+    def read(self, size=1):
+        if self.chunks:
+            return self.chunks.pop(0)
+        time.sleep(self.timeout)
+        return b""
+
+    def close(self):
+        self.is_open = False
+
+
+class TestParseFrames:
+    def test_parses_many_lines_at_once(self):
+        frames, rejected = parse_frames(LINE * 3)
+        assert rejected == 0
+        assert frames.dtype == np.float32
+        assert frames.shape == (3, 11)
+        assert frames[0].tolist() == [1000, 2000, 3000, 4000, 4095, -16384, 0, 16384, 131, -131, 0.5]
+
+    def test_counts_match_but_a_line_is_split_wrong(self):
+        # Same total comma count as two good lines, but split 9/11 across them
+        data = b"1,2,3,4,5,6,7,8,9,10\n1,2,3,4,5,6,7,8,9,10,11,12\n"
+        frames, rejected = parse_frames(data)
+        assert frames.shape == (0, 11)
+        assert rejected == 2
+
+    def test_rejects_malformed_lines_and_keeps_the_rest(self):
+        data = LINE + b"ets Jun  8 2016 boot\r\n1,2,3\r\n1,2,3,4,5,6,7,8,9,10,oops\r\n" + LINE
+        frames, rejected = parse_frames(data)
+        assert rejected == 3
+        assert frames.shape == (2, 11)
+
+
+class TestAsyncSerialReader:
+    @pytest.mark.asyncio
+    async def test_feed_joins_partial_lines_across_chunks(self):
+        reader = AsyncSerialReader()
+        reader._loop = asyncio.get_running_loop()
+        reader.queue = asyncio.Queue()
+        data = LINE * 3
+        reader.feed(data[:70])
+        reader.feed(data[70:])
+        await asyncio.sleep(0)
+
+        blocks = [(await reader.get()) for _ in range(reader.queue.qsize())]
+        assert sum(len(b) for b in blocks) == 3
+        assert reader.get_stats()["lines_rejected"] == 0
+
+    @pytest.mark.asyncio
+    async def test_overflow_drops_oldest_block(self):
+        reader = AsyncSerialReader(queue_size=2)
+        reader.queue = asyncio.Queue(maxsize=2)
+        for n in (1, 2, 3):
+            reader._deliver(np.full((n, 11), n, dtype=np.float32))
+
+        stats = reader.get_stats()
+        assert stats["dropped_batches"] == 1
+        assert stats["dropped_frames"] == 1
+        assert (await reader.get())[0, 0] == 2
+
+    @pytest.mark.asyncio
+    async def test_reader_thread_delivers_blocks_without_blocking_the_loop(self):
+        reader = AsyncSerialReader()
+        reader.ser = FakeSerial([LINE * 10, LINE * 5])
+        reader.start()
+        try:
+            received = 0
+            while received < 15:
+                block = await asyncio.wait_for(reader.get(), 1.0)
+                received += len(block)
+            assert received == 15
+            assert reader.get_stats()["batches"] == 2
+        finally:
+            await asyncio.to_thread(reader.stop)
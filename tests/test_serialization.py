@@ -0,0 +1,63 @@
+"""
+Unit tests for the fast JSON serialization layer (core.serialization).
+"""
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'backend')))
+import json
+from datetime import datetime, timezone
+import numpy as np
+import pytest
+from bson import ObjectId
+from core.serialization import FastJSONResponse, dumps, dumps_str, loads, send_json
+
+pytestmark = pytest.mark.unit
+
+
+class RecordingWebSocket:
+    def __init__(self):
+        self.sent = []
+
+    async def send_text(self, text):
+        self.sent.append(text)
+
+
+class TestSerialization:
+    def test_encodes_numpy_datetime_and_objectid(self):
+        oid = ObjectId()
+        payload = {
+            "_id": oid,
+            "timestamp": datetime(2025, 1, 2, 3, 4, 5, tzinfo=timezone.utc),
+            "values": np.arange(3, dtype=np.float32),
+            "frames": np.ones((2, 11), dtype=np.float32)[:, ::2],  # non-contiguous view
+            "confidence": np.float64(0.25),
+            "count": np.int64(7),
+        }
+        decoded = json.loads(dumps(payload))
+        assert decoded["_id"] == str(oid)
+        assert decoded["timestamp"] == "2025-01-02T03:04:05Z"  # pydantic-style UTC suffix
+        assert decoded["values"] == [0.0, 1.0, 2.0]
+        assert decoded["frames"] == [[1.0] * 6] * 2
+        assert decoded["confidence"] == 0.25
+        assert decoded["count"] == 7
+
+    def test_compact_text_round_trips(self):
+        message = {"prediction": "Hello", "frames": [[1.5, 2.0]], "session_id": "s1"}
+        text = dumps_str(message)
+        assert " " not in text
+        assert loads(text) == message
+
+    def test_unknown_types_raise(self):
+        with pytest.raises(TypeError):
+            dumps({"x": object()})
+
+    def test_response_renders_bytes(self):
+        response = FastJSONResponse({"status": "success", "data": [{"_id": ObjectId("0" * 24)}]})
+        assert response.media_type == "application/json"
+        assert json.loads(response.body) == {"status": "success", "data": [{"_id": "0" * 24}]}
+
+    @pytest.mark.asyncio
+    async def test_send_json_sends_a_text_frame(self):
+        ws = RecordingWebSocket()
+        await send_json(ws, {"status": "success", "confidence": np.float32(0.5)})
+        assert ws.sent == ['{"status":"success","confidence":0.5}']
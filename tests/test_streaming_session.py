@@ -0,0 +1,161 @@
+"""
+Unit tests for per-connection streaming inference state.
+"""
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'backend')))
+import numpy as np
+import pytest
+from AI.gesture_model_inference import StreamingGestureSession
+from core.settings import settings
+
+pytestmark = pytest.mark.unit
+
+
+def frames(start, n, features=11):
+    return np.arange(start, start + n, dtype=np.float32)[:, None].repeat(features, axis=1)
+
+
+class TestStreamingGestureSession:
+    def test_window_fills_then_slides(self):
+        session = StreamingGestureSession(timesteps=4)
+        for i in range(3):
+            assert session.push(frames(i, 1)[0]) is None
+        assert session.window()[:, 0].tolist() == [0, 1, 2]
+
+        model_input = session.push(frames(3, 1)[0])
+        assert model_input.shape == (1, 4, 11)
+        session.push(frames(4, 1)[0])
+        session.push(frames(5, 1)[0])
+        assert session.window()[:, 0].tolist() == [2, 3, 4, 5]
+
+    def test_window_is_a_view(self):
+        session = StreamingGestureSession(timesteps=4)
+        session.extend(frames(0, 6))
+        window = session.window()
+        assert np.shares_memory(window, session._buffer)
+
+    def test_extend_matches_push(self):
+        pushed = StreamingGestureSession(timesteps=5)
+        extended = StreamingGestureSession(timesteps=5)
+        data = frames(0, 13)
+        for frame in data:
+            pushed.push(frame)
+        extended.extend(data[:3])
+        extended.extend(data[3:11])
+        extended.extend(data[11:])
+        np.testing.assert_array_equal(pushed.window(), extended.window())
+        assert extended.frames_seen == 13
+
+    def test_sessions_are_independent(self):
+        a = StreamingGestureSession(timesteps=3)
+        b = StreamingGestureSession(timesteps=3)
+        a.extend(frames(0, 3))
+        b.extend(frames(100, 3))
+        assert a.window()[:, 0].tolist() == [0, 1, 2]
+        assert b.window()[:, 0].tolist() == [100, 101, 102]
+
+    def test_transform_applied_on_append(self):
+        session = StreamingGestureSession(timesteps=2, transform=lambda x: x * 2)
+        session.extend(frames(1, 2))
+        assert session.window()[:, 0].tolist() == [2, 4]
+
+    def test_smoothing_uses_rolling_mode(self):
+        session = StreamingGestureSession(rolling_window=3)
+        assert session.smooth(1) == 1
+        assert session.smooth(2) == 1  # tie -> smallest class, like scipy.stats.mode
+        assert session.smooth(2) == 2
+        session.reset()
+        assert session.frames_seen == 0 and not session.prediction_buffer
+
+
+class TestPredictionGating:
+    def test_stride_predicts_every_k_frames(self):
+        session = StreamingGestureSession(timesteps=4, stride=3, motion_gate=False)
+        decisions = []
+        for i in range(9):
+            session.push(frames(i, 1)[0])
+            decisions.append(session.due())
+        assert decisions == [False, False, True] * 3
+        assert session.predictions_run == 3
+        assert session.predictions_skipped == 6
+
+    def test_no_new_frames_is_not_due(self):
+        session = StreamingGestureSession(timesteps=4, stride=1, motion_gate=False)
+        session.extend(frames(0, 4))
+        assert session.due()
+        assert not session.due()
+
+    def test_motion_gate_skips_rest_and_scores_movement_end(self):
+        session = StreamingGestureSession(timesteps=4, stride=1, motion_gate=True)
+        rest = np.zeros((10, 11), dtype=np.float32)
+        session.extend(rest)
+        assert not session.due()
+
+        moving = frames(0, 10) * 5.0
+        session.extend(moving)
+        assert session.motion_detector.is_moving
+        assert session.due()
+
+        # First still block after the movement: one final prediction, then idle
+        session.extend(rest)
+        assert session.due()
+        session.extend(rest)
+        assert not session.due()
+
+
+class TestSegmentMode:
+    def raw_gesture(self, seed=0):
+        """Raw ADC frames: rest, one large movement, rest."""
+        rng = np.random.default_rng(seed)
+        rest = np.tile([2000.0] * 5 + [0.0, 0.0, 16384.0] + [0.0] * 3, (15, 1))
+        move = rest[:1] + rng.normal(0, 3000, (20, 11))
+        return np.concatenate([rest, move, rest]).astype(np.float32)
+
+    def test_predicts_once_per_movement_from_raw_frames(self):
+        session = StreamingGestureSession(timesteps=50, segment=True)
+        windows = []
+        for chunk in np.array_split(self.raw_gesture(), 10):  # small raw batches, as a thin client sends
+            session.extend(chunk)
+            windows.append(session.take_segments())
+
+        assert sum(len(w) for w in windows) == 1
+        assert session.segments == 1
+        assert session.predictions_run == 1 and session.predictions_skipped == 9
+        window = next(w for w in windows if w)[0]
+        assert 10 <= len(window) <= 50
+        assert np.abs(window[:, :5]).max() < 5  # normalized on the way in
+
+    def test_rest_never_reaches_the_window(self):
+        session = StreamingGestureSession(timesteps=4, segment=True)
+        rest = np.full((40, 11), 2000.0, dtype=np.float32)
+        for block in np.split(rest, 4):
+            session.extend(block)
+            assert session.take_segments() == []
+        assert session.frames_seen == 0 and session.predictions_run == 0
+
+    def test_two_movements_in_one_block_are_scored_separately(self):
+        session = StreamingGestureSession(timesteps=50, segment=True)
+        first, second = self.raw_gesture(seed=1), self.raw_gesture(seed=2)
+        session.extend(np.concatenate([first, second]))
+
+        segments = session.take_segments()
+        assert len(segments) == 2 and session.segments == 2 and session.predictions_run == 2
+        assert all(10 <= len(segment) <= 30 for segment in segments)  # neither carries the other's frames
+        assert not np.array_equal(segments[0][:10], segments[1][:10])
+        assert session.take_segments() == []  # each movement is handed out once
+
+    def test_stride_drops_a_movement_that_follows_too_closely(self):
+        session = StreamingGestureSession(timesteps=50, segment=True, stride=60)
+        session.extend(np.concatenate([self.raw_gesture(seed=1), self.raw_gesture(seed=2)]))
+
+        assert len(session.take_segments()) == 1  # the second ends < 60 frames after the first
+        assert session.segments == 2 and session.predictions_skipped == 1
+
+    def test_motion_gate_drops_movements_below_the_raw_threshold(self, monkeypatch):
+        monkeypatch.setattr(settings, "INFERENCE_MOTION_THRESHOLD", 1e12)
+        session = StreamingGestureSession(timesteps=50, segment=True, motion_gate=True)
+        session.extend(self.raw_gesture())
+
+        assert session.take_segments() == [] and session.segments == 1
+        assert session.predictions_run == 0 and session.predictions_skipped == 2  # dropped + empty take
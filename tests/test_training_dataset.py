@@ -0,0 +1,48 @@
+"""
+Unit tests for the columnar training dataset: shard layout, codes and build swaps.
+"""
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'backend')))
+import numpy as np
+import pytest
+from core.training_dataset import load_dataset, read_index, write_dataset
+
+pytestmark = pytest.mark.unit
+
+
+def chunk(labels, sessions, width=11, start=0):
+    n = len(labels)
+    return {
+        "values": np.arange(start, start + n, dtype=np.float64).repeat(width).reshape(n, width),
+        "label": np.asarray(labels),
+        "session_id": np.asarray(sessions),
+    }
+
+
+class TestTrainingDataset:
+    def test_chunks_are_written_as_mappable_shards(self, tmp_path):
+        chunks = [chunk(["Hello", "Hello", "We"], ["s1", "s1", "s2"]),
+                  chunk(["We", "Are"], ["s2", "s3"], start=3)]
+        index = write_dataset(str(tmp_path), chunks, rows=5, width=11, source=["a.npz"])
+        assert index["labels"] == ["Hello", "We", "Are"]
+        assert index["label_counts"] == {"Hello": 2, "We": 2, "Are": 1}
+
+        dataset = load_dataset(str(tmp_path))
+        assert isinstance(dataset.values, np.memmap) and dataset.values.dtype == np.float32
+        assert dataset.values[:, 0].tolist() == [0, 1, 2, 3, 4]
+        assert dataset.label_names().tolist() == ["Hello", "Hello", "We", "We", "Are"]
+        assert dataset.sessions.tolist() == [0, 0, 1, 1, 2]
+        assert read_index(str(tmp_path))["source"] == ["a.npz"]
+
+    def test_rebuild_replaces_the_previous_build(self, tmp_path):
+        write_dataset(str(tmp_path), [chunk(["A"], ["s"])], rows=1, width=11)
+        write_dataset(str(tmp_path), [chunk(["B", "B"], ["t", "t"])], rows=2, width=11)
+        assert sorted(os.listdir(tmp_path)) == ["build-000002", "index.json"]
+        assert load_dataset(str(tmp_path), mmap=False).label_names().tolist() == ["B", "B"]
+
+    def test_row_count_must_match(self, tmp_path):
+        with pytest.raises(ValueError):
+            write_dataset(str(tmp_path), [chunk(["A", "A"], ["s", "s"])], rows=3, width=11)
+        with pytest.raises(FileNotFoundError):
+            load_dataset(str(tmp_path))
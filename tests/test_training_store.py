@@ -0,0 +1,302 @@
+"""
+Unit tests for the incremental training export: high-water marks, the change log and CSV appends.
+"""
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'backend')))
+import csv
+from datetime import datetime, timedelta, timezone
+import numpy as np
+import pytest
+from bson import ObjectId
+import core.training_store as training_store
+from core.sensor_buckets import pack_bucket
+from core.training_dataset import load_dataset, read_index
+from core.training_store import TrainingStore
+
+pytestmark = pytest.mark.unit
+
+T0 = datetime(2025, 7, 1, 12, 0, 0)
+OLD = datetime(2025, 1, 1)
+
+
+def old_id(n):
+    """Ids old enough to be past the settle window, in insertion order."""
+    return ObjectId.from_datetime(OLD + timedelta(seconds=n))
+
+
+def matches(doc, query):
+    for key, cond in query.items():
+        if key == "$or":
+            if not any(matches(doc, sub) for sub in cond):
+                return False
+            continue
+        value = doc.get(key)
+        if not isinstance(cond, dict):
+            if value != cond:
+                return False
+            continue
+        for op, arg in cond.items():
+            if op == "$gt" and not value > arg:
+                return False
+            if op == "$lte" and not value <= arg:
+                return False
+            if op == "$in" and value not in arg:
+                return False
+            if op == "$size" and not (isinstance(value, list) and len(value) == arg):
+                return False
+    return True
+
+
+class FakeCursor:
+    def __init__(self, docs):
+        self.docs = docs
+
+    def sort(self, key, direction):
+        self.docs = sorted(self.docs, key=lambda d: d[key])
+        return self
+
+    def batch_size(self, n):
+        return self
+
+    def __aiter__(self):
+        return self._iter()
+
+    async def _iter(self):
+        for doc in self.docs:
+            yield doc
+
+
+class FakeCollection:
+    def __init__(self):
+        self.docs = []
+        self.queries = []
+
+    def add(self, doc, n):
+        doc["_id"] = old_id(n)
+        self.docs.append(doc)
+
+    def find(self, query=None, projection=None):
+        self.queries.append(query)
+        return FakeCursor([dict(d) for d in self.docs if matches(d, query or {})])
+
+    async def insert_one(self, doc):
+        doc.setdefault("_id", ObjectId())
+        self.docs.append(doc)
+
+
+def frame(i, width=11):
+    return [i] * width
+
+
+def bucket(session_id, label, start, count, width=11):
+    frames = [frame(start + i, width) for i in range(count)]
+    timestamps = [T0 + timedelta(seconds=start + i) for i in range(count)]
+    return pack_bucket(session_id, label, frames, timestamps)
+
+
+def read_csv(path):
+    with open(path, newline="") as f:
+        return list(csv.reader(f))
+
+
+@pytest.fixture
+def db(monkeypatch):
+    collections = {name: FakeCollection() for name in ("legacy", "buckets", "changes")}
+    monkeypatch.setattr(training_store, "sensor_collection", collections["legacy"])
+    monkeypatch.setattr(training_store, "sensor_bucket_collection", collections["buckets"])
+    monkeypatch.setattr(training_store, "sensor_change_collection", collections["changes"])
+    return collections
+
+
+@pytest.fixture
+def store(tmp_path):
+    return TrainingStore(str(tmp_path / "store"), segment_rows=4, settle_s=30.0)
+
+
+class TestIncrementalSync:
+    @pytest.mark.asyncio
+    async def test_only_frames_above_the_high_water_mark_are_read(self, db, store, tmp_path):
+        db["legacy"].add({"session_id": "a", "label": "Hello", "values": frame(1), "timestamp": T0}, 1)
+        db["legacy"].add({"session_id": "a", "label": "Hello", "values": [1, 2, 3]}, 2)  # not a training frame
+        db["buckets"].add(bucket("b", "Yes", 10, 5), 3)
+        first = await store.sync()
+        assert first["new_frames"] == 6 and store.get_stats()["segments"] == 1
+
+        db["buckets"].add(bucket("c", "No", 20, 3), 4)
+        second = await store.sync()
+        assert second["new_frames"] == 3 and store.get_stats()["segments"] == 2
+        lag_floor = ObjectId.from_datetime(OLD + timedelta(seconds=3) - timedelta(seconds=store.lag_s))
+        assert db["buckets"].queries[-1]["_id"] == {"$gt": lag_floor}
+
+        csv_path = str(tmp_path / "gesture_data.csv")
+        export = await store.export_csv(csv_path, 11)
+        rows = read_csv(csv_path)
+        assert export["rows"] == 9 and rows[0][:3] == ["session_id", "label", "flex1"]
+        assert rows[1] == ["a", "Hello"] + ["1"] * 11
+        assert [r[0] for r in rows[1:]] == ["a"] + ["b"] * 5 + ["c"] * 3
+
+    @pytest.mark.asyncio
+    async def test_csv_is_appended_until_it_changes_underneath(self, db, store, tmp_path):
+        csv_path = str(tmp_path / "gesture_data.csv")
+        db["buckets"].add(bucket("a", "Hello", 0, 4), 1)
+        await store.sync()
+        assert (await store.export_csv(csv_path, 11))["rewritten"] is True
+
+        db["buckets"].add(bucket("b", "Yes", 4, 2), 2)
+        await store.sync()
+        export = await store.export_csv(csv_path, 11)
+        assert export == {"path": csv_path, "rows": 6, "appended": 2, "rewritten": False}
+        assert len(read_csv(csv_path)) == 7
+
+        with open(csv_path, "w") as f:  # e.g. POST /training/run wrote an uploaded file here
+            f.write("session_id,label\n")
+        os.utime(csv_path, ns=(0, 0))
+        export = await store.export_csv(csv_path, 11)
+        assert export["rewritten"] is True and len(read_csv(csv_path)) == 7
+
+    @pytest.mark.asyncio
+    async def test_recent_frames_stay_in_the_tail_until_settled(self, db, store, tmp_path):
+        db["buckets"].add(bucket("a", "Hello", 0, 2), 1)
+        recent = bucket("b", "Yes", 2, 3)
+        recent["_id"] = ObjectId.from_datetime(datetime.now(timezone.utc) - timedelta(seconds=10))  # still settling
+        db["buckets"].docs.append(recent)
+
+        result = await store.sync()
+        assert result["new_frames"] == 2 and result["tail_frames"] == 3
+        assert store.get_stats()["high_water_marks"]["sensor_buckets"] == str(old_id(1))
+        csv_path = str(tmp_path / "gesture_data.csv")
+        assert (await store.export_csv(csv_path, 11))["rows"] == 5
+
+        store.settle_s = 5.0
+        result = await store.sync()
+        assert result["new_frames"] == 3 and result["tail_frames"] == 0
+        export = await store.export_csv(csv_path, 11)
+        assert export["rewritten"] is False and len(read_csv(csv_path)) == 6  # tail replaced, not duplicated
+
+
+    @pytest.mark.asyncio
+    async def test_writer_with_a_lagging_clock_is_not_skipped(self, db, store):
+        db["buckets"].add(bucket("a", "Hello", 0, 2), 100)
+        await store.sync()
+        db["buckets"].add(bucket("b", "Yes", 2, 3), 40)  # committed after the mark passed its _id
+
+        assert (await store.sync())["new_frames"] == 3
+        assert (await store.sync())["new_frames"] == 0  # read once, not on every sync
+        assert store.get_stats()["high_water_marks"]["sensor_buckets"] == str(old_id(100))
+
+        db["buckets"].add(bucket("c", "No", 5, 1), 100 - int(store.lag_s) - 1)  # lagging more than lag_s
+        assert (await store.sync())["new_frames"] == 0
+
+
+class TestChangeLog:
+    @pytest.mark.asyncio
+    async def test_relabel_and_delete_refresh_only_their_sessions(self, db, store, tmp_path):
+        db["buckets"].add(bucket("a", "Hello", 0, 3), 1)
+        db["buckets"].add(bucket("b", "Yes", 3, 3), 2)
+        db["buckets"].add(bucket("c", "No", 6, 3), 3)
+        await store.sync()
+
+        db["buckets"].docs[0]["label"] = "Goodbye"
+        del db["buckets"].docs[1]
+        await training_store.record_change("relabel", "a")
+        await training_store.record_change("delete", "b")
+        result = await store.sync()
+        assert result["refreshed_sessions"] == 2 and result["new_frames"] == 0
+
+        csv_path = str(tmp_path / "gesture_data.csv")
+        await store.export_csv(csv_path, 11)
+        labels = [(r[0], r[1]) for r in read_csv(csv_path)[1:]]
+        assert sorted(set(labels)) == [("a", "Goodbye"), ("c", "No")] and len(labels) == 6
+
+    @pytest.mark.asyncio
+    async def test_store_wide_change_rebuilds_once(self, db, store):
+        db["buckets"].add(bucket("a", "Hello", 0, 3), 1)
+        await store.sync()
+        db["buckets"].docs.clear()
+        await training_store.record_change("clear")
+
+        result = await store.sync()
+        assert result["rebuilt"] is True and store.get_stats()["frames"] == 0
+        db["buckets"].add(bucket("b", "Yes", 0, 2), 2)
+        result = await store.sync()  # the clear entry is still inside the settle window
+        assert result["rebuilt"] is False and result["new_frames"] == 2
+
+    @pytest.mark.asyncio
+    async def test_manifest_survives_a_restart(self, db, store):
+        db["buckets"].add(bucket("a", "Hello", 0, 5), 1)
+        await store.sync()
+        reopened = TrainingStore(store.directory, segment_rows=4)
+        assert reopened.get_stats()["frames"] == 5
+        assert (await reopened.sync())["new_frames"] == 0
+        columns = list(reopened.iter_segments(width=11))
+        assert sum(len(c["values"]) for c in columns) == 5
+        assert columns[0]["timestamp"][1] == (T0 + timedelta(seconds=1)).replace(microsecond=0)
+
+    @pytest.mark.asyncio
+    async def test_dataset_is_rebuilt_only_when_segments_change(self, db, store, tmp_path):
+        dataset_path = str(tmp_path / "dataset")
+        db["buckets"].add(bucket("a", "Hello", 0, 3), 1)
+        db["buckets"].add(bucket("b", "Yes", 3, 2, width=22), 2)
+        await store.sync()
+        assert await store.export_dataset(11, dataset_path) == {"path": dataset_path, "rows": 3, "rewritten": True}
+        assert (await store.export_dataset(11, dataset_path))["rewritten"] is False
+
+        db["buckets"].add(bucket("c", "No", 5, 2), 3)
+        await store.sync()
+        assert (await store.export_dataset(11, dataset_path))["rows"] == 5
+        dataset = load_dataset(dataset_path)
+        assert dataset.label_names().tolist() == ["Hello"] * 3 + ["No"] * 2
+        assert dataset.values[3].tolist() == [5.0] * 11
+
+    @pytest.mark.asyncio
+    async def test_deleting_everything_removes_the_dataset(self, db, store, tmp_path):
+        dataset_path = str(tmp_path / "dataset")
+        db["buckets"].add(bucket("a", "Hello", 0, 3), 1)
+        await store.sync()
+        await store.export_dataset(11, dataset_path)
+        db["buckets"].docs.clear()
+        await training_store.record_change("clear")
+        await store.sync()
+
+        assert await store.export_dataset(11, dataset_path) == {"path": dataset_path, "rows": 0, "rewritten": True}
+        assert read_index(dataset_path) is None
+        assert (await store.export_dataset(11, dataset_path))["rewritten"] is False
+
+    @pytest.mark.asyncio
+    async def test_trigger_refuses_to_train_after_everything_was_deleted(self, db, store, tmp_path, monkeypatch):
+        pytest.importorskip("email_validator")  # routes import the auth models
+        import subprocess
+        from fastapi import HTTPException
+        import routes.training_routes as training_routes
+        monkeypatch.setattr(training_routes, "training_store", store)
+        monkeypatch.setattr(training_store, "dataset_dir", lambda width: str(tmp_path / "dataset"))
+        monkeypatch.setattr(subprocess, "Popen", lambda *a, **k: pytest.fail("training started"))
+        db["buckets"].add(bucket("a", "Hello", 0, 3), 1)
+        await store.sync()
+        await store.export_dataset(11)
+        db["buckets"].docs.clear()
+        await training_store.record_change("clear")
+
+        with pytest.raises(HTTPException) as error:
+            await training_routes.trigger_training_run(_user=None)
+        assert error.value.status_code == 400
+
+    @pytest.mark.asyncio
+    async def test_dataset_keeps_each_session_in_timestamp_order(self, db, store, tmp_path):
+        dataset_path = str(tmp_path / "dataset")
+        db["buckets"].add(bucket("a", "Hello", 4, 2), 1)   # the later half of "a" stored first
+        db["buckets"].add(bucket("b", "Yes", 10, 2), 2)
+        db["legacy"].add({"session_id": "a", "label": "Hello", "values": frame(0), "timestamp": T0}, 3)
+        db["buckets"].add(bucket("a", "Hello", 1, 3), 4)
+        await store.sync()
+        db["buckets"].docs[1]["label"] = "No"
+        await training_store.record_change("relabel", "b")
+        await store.sync()  # "b" now sits after everything else in the store
+
+        await store.export_dataset(11, dataset_path)
+        dataset = load_dataset(dataset_path)
+        sessions = np.asarray(dataset.index["sessions"])[dataset.sessions].tolist()
+        assert sessions == ["a"] * 6 + ["b"] * 2
+        assert dataset.values[:, 0].tolist() == [0, 1, 2, 3, 4, 5, 10, 11]
+